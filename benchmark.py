@@ -0,0 +1,489 @@
+"""Benchmarks for voting-system-v7.0.py on synthetic electorates
+
+    python benchmark.py                          # 1k and 100k voters, JSON storage
+    python benchmark.py --sizes 1k,100k,1m --storage json,sqlite
+    python benchmark.py --save                   # keep these results as the baselines
+    xvfb-run -a python benchmark.py --tk         # include the Tk views
+
+Each size gets a deterministic electorate (the same --seed always gives
+the same voters, candidates and ballots), written to storage through the
+ElectionEngine. Every operation is timed over several runs and reported
+as latency percentiles, then run once more under tracemalloc for its
+peak memory. With --save the results go to the baselines file; otherwise
+they are compared with it and the exit status is 1 if an operation got
+slower or bigger than the tolerance allows.
+
+The Tk views (update_voters_list, search_voters) need a display; they
+are measured when one is available, or always with --tk.
+"""
+import argparse
+import contextlib
+import gc
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from itertools import chain
+from pathlib import Path
+
+APP_PATH = Path(__file__).resolve().parent / "voting-system-v7.0.py"
+BASELINES = Path(__file__).resolve().parent / "benchmark_baselines.json"
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+GENERATOR_VERSION = 2  # Bump when the generated data changes, cached data is then rebuilt
+
+POSITIONS = ('President', 'Senator', 'Governor', 'Mayor')
+PARTIES = ('Progressive Alliance', 'National Unity', 'Green Future', 'Liberty Party', 'Independent')
+FIRST_NAMES = (
+    'Maria', 'James', 'Aisha', 'Wei', 'Carlos', 'Fatima', 'John', 'Priya', 'Ahmad', 'Sofia',
+    'Kenji', 'Amara', 'Liam', 'Nguyen', 'Olga', 'Mateo', 'Chloe', 'Sok', 'David', 'Zainab'
+)
+LAST_NAMES = (
+    'Santos', 'Smith', 'Rahman', 'Chen', 'Garcia', 'Okafor', 'Kumar', 'Ivanova', 'Tanaka', 'Mensah',
+    'Rossi', 'Kim', 'Novak', 'Haddad', 'Silva', 'Thammavong', 'Brown', 'Lopez', 'Nasser', 'Walsh'
+)
+CITIES = (
+    ('Manila', 'Metro Manila', 'Philippines'), ('Cebu City', 'Cebu', 'Philippines'),
+    ('Austin', 'Texas', 'USA'), ('Leeds', 'West Yorkshire', 'UK'), ('Pune', 'Maharashtra', 'India'),
+    ('Lagos', 'Lagos', 'Nigeria'), ('Osaka', 'Osaka', 'Japan'), ('Hanoi', 'Hanoi', 'Vietnam')
+)
+OCCUPATIONS = ('Teacher', 'Engineer', 'Nurse', 'Farmer', 'Driver', 'Student', 'Accountant', 'Retired')
+START_EPOCH = 1704067200  # 2024-01-01, first ballot of the generated history
+
+def load_app(path=APP_PATH):
+    """Import the application script as a module (its name is not importable as is)"""
+    spec = importlib.util.spec_from_file_location('voting_system', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@contextlib.contextmanager
+def quiet():
+    """Hide the application's print() logging"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+class Electorate:
+    """Deterministic synthetic voters, candidates and ballot history for one size
+
+    Candidates get full campaign profiles; voters vote with `turnout`
+    probability, for each position with `coverage` probability, with a
+    skewed preference so the standings are not flat. The voters who did
+    not vote are kept in `abstainers` for the vote benchmark.
+    """
+    def __init__(self, size, seed=2024, turnout=0.65, coverage=0.85):
+        self.size = size
+        self.seed = seed
+        self.turnout = turnout
+        self.coverage = coverage
+        self.candidates_per_position = 3 + min(5, size // 200_000)
+        self.abstainers = []
+
+    @property
+    def digest(self):
+        return f"v{GENERATOR_VERSION}:{self.size}:{self.seed}:{self.turnout}:{self.coverage}"
+
+    @staticmethod
+    def username(i):
+        return f"voter{i:07d}"
+
+    @staticmethod
+    def password(i):
+        return f"pass-{i}"
+
+    @staticmethod
+    def password_hash(i):
+        """password(i) in the app's PBKDF2 format at a single iteration, cheap to make for a million voters"""
+        salt = f"{i:032x}"
+        key = hashlib.pbkdf2_hmac('sha256', f"pass-{i}".encode('utf-8'), bytes.fromhex(salt), 1)
+        return f"pbkdf2_sha256$1${salt}${key.hex()}"
+
+    def _person(self, rng, username, i, age_from, age_to):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        city, state, country = rng.choice(CITIES)
+        return {
+            'username': username,
+            # Already hashed, so seeding skips the KDF (the app upgrades it on first login)
+            'password': self.password_hash(i),
+            'full_name': f"{first} {last}",
+            'date_of_birth': f"{2024 - rng.randint(age_from, age_to)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'gender': rng.choice(('Male', 'Female', 'Other')),
+            'national_id': f"NID{i:09d}",
+            'phone': f"+1 555 {rng.randint(0, 9999999):07d}",
+            'email': f"{username}@example.org",
+            'address': {
+                'street': f"{rng.randint(1, 9999)} {rng.choice(LAST_NAMES)} Street",
+                'city': city,
+                'state': state,
+                'postal_code': f"{rng.randint(1000, 99999)}",
+                'country': country
+            },
+            'occupation': rng.choice(OCCUPATIONS),
+            'is_candidate': False,
+            'registration_date': f"2024-01-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00:00"
+        }
+
+    def candidates(self):
+        """Candidate records, full names unique, for every position"""
+        rng = random.Random(f"{self.seed}:candidates")
+        records = []
+        for p, position in enumerate(POSITIONS):
+            for c in range(self.candidates_per_position):
+                i = p * 100 + c
+                record = self._person(rng, f"candidate{i:04d}", 900_000_000 + i, 35, 70)
+                record['full_name'] = f"{record['full_name']} {chr(65 + p)}{c}"
+                record.update({
+                    'is_candidate': True,
+                    'party': PARTIES[c % len(PARTIES)],
+                    'current_position': rng.choice(('Councillor', 'Senator', 'Lawyer', 'Professor')),
+                    'desired_position': position,
+                    'term_length': rng.choice(('4 Years', '6 Years')),
+                    'education': f"Degree in {rng.choice(('Law', 'Economics', 'Engineering', 'Medicine'))}",
+                    'experience': f"{rng.randint(3, 30)} years in public service",
+                    'platform': f"{position} platform of {record['full_name']}: " + " ".join(
+                        rng.choice(('jobs', 'schools', 'health', 'transport', 'housing', 'safety'))
+                        for _ in range(40)
+                    ),
+                    'promises': "Affordable housing, clean water, better roads",
+                    'political_experience': f"{rng.randint(0, 20)} years",
+                    'vision': f"A better {record['address']['city']} for everyone"
+                })
+                records.append(record)
+        return records
+
+    def voters(self):
+        """Yield the voter records"""
+        rng = random.Random(f"{self.seed}:voters")
+        for i in range(self.size):
+            yield self._person(rng, self.username(i), i, 18, 90)
+
+    def ballots(self, app, candidates):
+        """(counts, history) for the generated electorate, fills self.abstainers"""
+        rng = random.Random(f"{self.seed}:ballots")
+        by_position = {}
+        for record in candidates:
+            by_position.setdefault(record['desired_position'], []).append(record['full_name'])
+        # Weight 1/(rank+1): a clear leader per position, and a long tail
+        weights = [1 / (rank + 1) for rank in range(self.candidates_per_position)]
+        counts = {record['full_name']: 0 for record in candidates}
+        history = []
+        epoch = START_EPOCH
+        self.abstainers = []
+        for i in range(self.size):
+            username = self.username(i)
+            if rng.random() >= self.turnout:
+                self.abstainers.append(username)
+                continue
+            for position in POSITIONS:
+                if rng.random() >= self.coverage:
+                    continue
+                name = rng.choices(by_position[position], weights)[0]
+                epoch += rng.randint(0, 3)
+                counts[name] += 1
+                history.append(app.Ballot(username, name, position, epoch))
+        return counts, history
+
+    def queries(self, count=50):
+        """Search terms of the kinds typed in the voters tab: names, usernames, emails"""
+        rng = random.Random(f"{self.seed}:queries")
+        kinds = (
+            lambda: rng.choice(FIRST_NAMES)[:rng.randint(2, 5)],
+            lambda: rng.choice(LAST_NAMES),
+            lambda: self.username(rng.randrange(self.size))[:rng.randint(7, 12)],
+            lambda: f"{self.username(rng.randrange(self.size))}@",
+            lambda: "no such voter"
+        )
+        return [kinds[i % len(kinds)]() for i in range(count)]
+
+def populate(app, electorate, kind, directory):
+    """Write the electorate to a storage in directory, returns seconds taken"""
+    started = time.perf_counter()
+    with quiet():
+        engine = app.ElectionEngine(app.create_storage(kind, directory)).load()
+        candidates = electorate.candidates()
+        # Skipped when this directory already holds the same electorate
+        if engine.seed('benchmark-electorate', chain(candidates, electorate.voters()), electorate.digest):
+            engine.candidates, engine.voting_history = electorate.ballots(app, candidates)
+            engine.mark_dirty('votes')
+        else:
+            electorate.ballots(app, candidates)  # Only for the abstainers
+        engine.close()
+    return time.perf_counter() - started
+
+def percentile(ordered, q):
+    """q-th percentile (0-100) of sorted samples, linearly interpolated"""
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+class Operation:
+    """One benchmarked operation
+
+    prepare() runs untimed before each sample and returns the argument
+    for run(), which is the part measured.
+    """
+    def __init__(self, name, run, samples, prepare=None):
+        self.name = name
+        self.run = run
+        self.samples = samples
+        self.prepare = prepare
+
+    def once(self):
+        argument = self.prepare() if self.prepare is not None else None
+        started = time.perf_counter()
+        self.run(argument)
+        return time.perf_counter() - started
+
+    def peak(self):
+        """Bytes allocated at the peak of one run, beyond what was live before it"""
+        argument = self.prepare() if self.prepare is not None else None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            self.run(argument)
+            return tracemalloc.get_traced_memory()[1] - before
+        finally:
+            tracemalloc.stop()
+
+    def measure(self, memory=True):
+        # Once per operation, a full collection per sample is slow on a large heap
+        gc.collect()
+        with quiet():
+            times = sorted(self.once() for _ in range(self.samples))
+            peak = self.peak() if memory else None
+        result = {
+            'samples': len(times),
+            'p50_ms': percentile(times, 50) * 1000,
+            'p90_ms': percentile(times, 90) * 1000,
+            'p99_ms': percentile(times, 99) * 1000,
+            'max_ms': times[-1] * 1000,
+        }
+        if peak is not None:
+            result['peak_kb'] = peak / 1024
+        return result
+
+def engine_operations(app, electorate, kind, directory):
+    """Operations on the ElectionEngine, in an order where the mutating ones come last"""
+    heavy = 3 if electorate.size >= 1_000_000 else 5
+    kdf_target = float(os.environ.get('VOTING_KDF_TARGET', 0.1))
+
+    def fresh_engine():
+        return app.ElectionEngine(app.create_storage(kind, directory), kdf_target)
+
+    opened = []
+
+    def fresh(load_voters=False):
+        def prepare():
+            while opened:
+                opened.pop().storage.close()
+            engine = fresh_engine()
+            if load_voters:
+                engine.load_admin()
+                engine.load_voters()
+            opened.append(engine)
+            return engine
+        return prepare
+
+    with quiet():
+        engine = fresh_engine().load()
+    # The search index is built by the Tk class; its methods only need the
+    # engine's data, so an instance without a window can run them
+    search_app = app.VotingSystem.__new__(app.VotingSystem)
+    search_app.engine = engine
+    search_app.voter_search = None
+
+    def build_search(_):
+        search_app.voter_search = None
+        search_app.voter_search_index()
+
+    queries = iter(electorate.queries() * 4)
+    voters = iter(electorate.abstainers)
+    names = list(engine.candidate_index.by_name)
+    choices = random.Random(f"{electorate.seed}:cast")
+
+    def next_ballot():
+        return next(voters), choices.choice(names)
+
+    registered = iter(range(electorate.size, electorate.size + 1000))
+
+    def new_voter():
+        i = next(registered)
+        record = electorate._person(random.Random(i), f"newvoter{i}", i, 18, 90)
+        record['password'] = electorate.password(i)
+        return record.pop('username'), record
+
+    logins = iter(range(electorate.size))
+    cast_samples = min(500, len(electorate.abstainers) - 1)
+    export_file = Path(directory) / "export"
+
+    operations = [
+        Operation('load_voters', lambda e: e.load_voters(), heavy, fresh()),
+        Operation('load_votes', lambda e: e.load_votes(), heavy, fresh(load_voters=True)),
+        Operation('results_rows', lambda _: engine.results_rows(), 200),
+        Operation('search_index', build_search, heavy),
+        Operation('search', lambda _: search_app.voter_search_index().search(next(queries)), 100),
+        Operation('export_text', lambda _: engine.export(export_file.with_suffix('.txt'), 'text'), heavy),
+        Operation('export_csv', lambda _: engine.export(export_file.with_suffix('.csv'), 'csv'), heavy),
+        Operation('authenticate', lambda i: engine.authenticate(
+            electorate.username(i), electorate.password(i)), 10, lambda: next(logins)),
+        Operation('register', lambda voter: engine.register(*voter), 10, new_voter),
+        Operation('cast', lambda ballot: engine.cast(*ballot), cast_samples, next_ballot),
+    ]
+
+    def close():
+        while opened:
+            opened.pop().storage.close()
+        with quiet():
+            engine.close()
+    return operations, close
+
+def tk_operations(app, electorate, kind, directory):
+    """Operations on the Tk views; needs a display"""
+    import tkinter as tk
+    os.environ.setdefault('VOTING_ANIMATION_FPS', '0')  # Keep the login animation out of the timings
+    root = tk.Tk()
+    with quiet():
+        gui = app.VotingSystem(root, storage=app.create_storage(kind, directory))
+        gui.is_admin = True
+        gui.create_main_interface()
+        root.update()
+
+    def settle(result=None):
+        root.update_idletasks()
+        return result
+
+    def admin_view(_):
+        gui.create_main_interface()
+        settle()
+
+    queries = iter(electorate.queries() * 4)
+    operations = [
+        Operation('tk_admin_view', admin_view, 3),
+        Operation('tk_update_voters_list', lambda _: settle(gui.update_voters_list()), 20),
+        Operation('tk_search_voters', lambda _: settle(gui.search_voters(next(queries))), 100),
+    ]
+
+    def close():
+        with quiet():
+            gui.executor.shutdown()
+            gui.flush_storage()
+            gui.storage.close()
+        root.destroy()
+    return operations, close
+
+def display_available():
+    import tkinter as tk
+    try:
+        tk.Tk().destroy()
+        return True
+    except tk.TclError:
+        return False
+
+def compare(results, baselines, tolerance):
+    """Messages for results worse than their baselines by more than tolerance"""
+    # Below these differences a change is noise, whatever the ratio
+    floors = {'p50_ms': 0.05, 'p90_ms': 0.1, 'peak_kb': 64}
+    problems = []
+    for key, result in sorted(results.items()):
+        baseline = baselines.get(key)
+        if baseline is None:
+            continue
+        for metric, floor in floors.items():
+            if metric not in result or metric not in baseline:
+                continue
+            old, new = baseline[metric], result[metric]
+            if new > old * (1 + tolerance) and new - old > floor:
+                problems.append(f"{key} {metric}: {old:.2f} -> {new:.2f} (+{(new / old - 1) * 100 if old else float('inf'):.0f}%)")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the voting system on synthetic electorates")
+    parser.add_argument('--sizes', default='1k,100k', help=f"comma separated, from {', '.join(SIZES)} (default 1k,100k)")
+    parser.add_argument('--storage', default='json', help="comma separated backends: json, sqlite (default json)")
+    parser.add_argument('--seed', type=int, default=2024, help="random seed of the generated data")
+    parser.add_argument('--only', help="comma separated operation names to run")
+    parser.add_argument('--tk', dest='tk', action='store_true', default=None, help="measure the Tk views (needs a display)")
+    parser.add_argument('--no-tk', dest='tk', action='store_false', help="skip the Tk views")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc runs")
+    parser.add_argument('--data', help="directory caching the generated data between runs")
+    parser.add_argument('--baselines', default=str(BASELINES), help="baselines JSON file")
+    parser.add_argument('--save', action='store_true', help="store the results as the new baselines")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown before failing (default 0.25)")
+    args = parser.parse_args(argv)
+
+    app = load_app()
+    use_tk = display_available() if args.tk is None else args.tk
+    only = set(args.only.split(',')) if args.only else None
+    results = {}
+
+    for size_name in args.sizes.lower().split(','):
+        if size_name not in SIZES:
+            parser.error(f"unknown size {size_name}")
+        electorate = Electorate(SIZES[size_name], args.seed)
+        for kind in args.storage.lower().split(','):
+            with tempfile.TemporaryDirectory(prefix='voting-benchmark-') as work:
+                if args.data:
+                    # Generate once into the cache, then work on a copy so runs don't see each other's votes
+                    cached = Path(args.data) / f"{kind}-{size_name}-{args.seed}"
+                    cached.mkdir(parents=True, exist_ok=True)
+                    elapsed = populate(app, electorate, kind, cached)
+                    work = shutil.copytree(cached, Path(work) / "data")
+                else:
+                    elapsed = populate(app, electorate, kind, work)
+                print(f"{kind}/{size_name}: {electorate.size:,} voters ready in {elapsed:.1f}s")
+
+                builders = [engine_operations] + ([tk_operations] if use_tk else [])
+                cwd = os.getcwd()
+                os.chdir(work)  # Exports and caches the app writes stay in the work directory
+                try:
+                    for build in builders:
+                        operations, close = build(app, electorate, kind, work)
+                        try:
+                            for operation in operations:
+                                if only is not None and operation.name not in only:
+                                    continue
+                                key = f"{kind}/{size_name}/{operation.name}"
+                                results[key] = result = operation.measure(memory=not args.no_memory)
+                                memory = f"{result['peak_kb'] / 1024:9.1f} MB" if 'peak_kb' in result else ""
+                                print(
+                                    f"  {operation.name:<22} p50 {result['p50_ms']:10.3f} ms  "
+                                    f"p90 {result['p90_ms']:10.3f} ms  p99 {result['p99_ms']:10.3f} ms  {memory}"
+                                )
+                        finally:
+                            close()
+                finally:
+                    os.chdir(cwd)
+    if not use_tk:
+        print("Tk views skipped (no display, run under xvfb-run or pass --tk)")
+
+    baselines_file = Path(args.baselines)
+    if args.save:
+        saved = {}
+        if baselines_file.exists():
+            saved = json.loads(baselines_file.read_text())
+        saved.update(results)
+        baselines_file.write_text(json.dumps(saved, indent=2, sort_keys=True) + '\n')
+        print(f"Saved {len(results)} baselines to {baselines_file}")
+        return 0
+    if not baselines_file.exists():
+        print(f"No baselines yet, run with --save to store these results in {baselines_file}")
+        return 0
+    problems = compare(results, json.loads(baselines_file.read_text()), args.tolerance)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    if not problems:
+        print(f"No regressions against {baselines_file} (tolerance {args.tolerance:.0%})")
+    return 1 if problems else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
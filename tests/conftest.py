@@ -0,0 +1,91 @@
+"""Shared fixtures: the application script loaded as a module, and records to register"""
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+APP_PATH = Path(__file__).resolve().parent.parent / "voting-system-v7.0.py"
+
+
+def load_app(path=APP_PATH):
+    """Import the application script as a module (its name is not importable as is)"""
+    spec = importlib.util.spec_from_file_location("voting_system", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='session')
+def app():
+    return load_app()
+
+
+@pytest.fixture
+def make_voter():
+    """Build a voter record that passes the registration rules, i tells the identity values apart"""
+    def make(i=1, **overrides):
+        record = {
+            'password': f"pass-{i}",
+            'full_name': f"Voter {i}",
+            'date_of_birth': '1990-05-17',
+            'gender': 'Female',
+            'national_id': f"NID{i:06d}",
+            'phone': f"+63 900 {i:07d}",
+            'email': f"voter{i}@example.org",
+            'address': {
+                'street': f"{i} Rizal Street",
+                'city': 'Manila',
+                'state': 'Metro Manila',
+                'postal_code': '1000',
+                'country': 'Philippines'
+            },
+            'occupation': 'Teacher',
+            'is_candidate': False
+        }
+        record.update(overrides)
+        return record
+    return make
+
+
+@pytest.fixture
+def make_candidate(make_voter):
+    """Build a candidate record that passes the candidate rules"""
+    def make(i=1, position='President', **overrides):
+        record = make_voter(
+            i,
+            full_name=f"Candidate {i}",
+            date_of_birth='1970-01-01',
+            is_candidate=True,
+            party='Independent',
+            current_position='Mayor',
+            desired_position=position,
+            term_length='6 Years',
+            education='Law',
+            experience='Ten years in office',
+            platform='Roads',
+            promises='Schools',
+            political_experience='Council',
+            vision='Growth'
+        )
+        record.update(overrides)
+        return record
+    return make
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage_kind(request):
+    return request.param
+
+
+@pytest.fixture
+def open_engine(app, tmp_path, storage_kind):
+    """Open an ElectionEngine on a storage in tmp_path (reopen to check what was persisted)"""
+    opened = []
+
+    def open_():
+        engine = app.ElectionEngine(app.create_storage(storage_kind, tmp_path), kdf_target=0.001).load()
+        opened.append(engine)
+        return engine
+    yield open_
+    for engine in opened:
+        engine.storage.close()
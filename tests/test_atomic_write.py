@@ -0,0 +1,50 @@
+"""atomic_write: all-or-nothing replacement that keeps the file's mode"""
+import os
+import stat
+
+import pytest
+
+posix_only = pytest.mark.skipif(os.name != 'posix', reason="file modes are POSIX only")
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_replaces_the_contents(app, tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('old')
+    app.atomic_write(path, lambda f: f.write('new'))
+    assert path.read_text() == 'new'
+    app.atomic_write(path, lambda f: f.write(b'bytes'), binary=True)
+    assert path.read_bytes() == b'bytes'
+    assert os.listdir(tmp_path) == ['data.json']
+
+
+def test_a_failed_write_leaves_the_old_file(app, tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('old')
+
+    def write(f):
+        f.write('partial')
+        raise RuntimeError("disk full")
+    with pytest.raises(RuntimeError):
+        app.atomic_write(path, write)
+    assert path.read_text() == 'old'
+    assert os.listdir(tmp_path) == ['data.json']
+
+
+@posix_only
+def test_keeps_the_mode_of_an_existing_file(app, tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('old')
+    os.chmod(path, 0o640)
+    app.atomic_write(path, lambda f: f.write('new'))
+    assert mode(path) == 0o640
+
+
+@posix_only
+def test_new_files_get_the_umask_default(app, tmp_path):
+    path = tmp_path / "data.json"
+    app.atomic_write(path, lambda f: f.write('new'))
+    assert mode(path) == 0o666 & ~app._UMASK
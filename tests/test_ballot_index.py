@@ -0,0 +1,26 @@
+"""BallotIndex: the roles each voter already voted for"""
+
+
+def test_rebuild_from_history(app):
+    index = app.BallotIndex()
+    positions = {'Ana': 'President', 'Dee': 'Mayor'}
+    index.rebuild([
+        {'voter': 'v1', 'candidate': 'Ana', 'role': 'President'},
+        {'voter': 'v1', 'candidate': 'Dee'},  # Saved before ballots carried their role
+        {'voter': 'v2', 'candidate': 'Ana', 'role': 'President'},
+    ], positions.get)
+    assert index.get('v1', 'President') == 'Ana'
+    assert index.get('v1', 'Mayor') == 'Dee'
+    assert ('v2', 'President') in index
+    assert ('v2', 'Mayor') not in index
+    assert index.roles_for('v1') == {'President': 'Ana', 'Mayor': 'Dee'}
+    assert index.roles_for('nobody') == {}
+
+
+def test_the_first_ballot_per_role_is_kept(app):
+    index = app.BallotIndex()
+    index.record('v1', 'President', 'Ana')
+    index.record('v1', 'President', 'Ben')
+    assert index.get('v1', 'President') == 'Ana'
+    index.clear()
+    assert index.get('v1', 'President') is None
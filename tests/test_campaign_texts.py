@@ -0,0 +1,99 @@
+"""Campaign texts kept out of the voter records, in a CampaignTextStore read on demand"""
+import json
+
+import pytest
+
+
+@pytest.fixture
+def open_storage(app, tmp_path, storage_kind):
+    """Open a storage in tmp_path (reopen to check what was persisted)"""
+    opened = []
+
+    def open_():
+        storage = app.create_storage(storage_kind, tmp_path)
+        opened.append(storage)
+        return storage
+    yield open_
+    for storage in opened:
+        storage.close()
+
+
+def saved(storage, username):
+    """The record as written to the voter roll, without the store"""
+    if storage.name == 'json':
+        with open(storage.voters_file, 'r') as f:
+            return json.load(f)[username]
+    row = storage.conn.execute('SELECT data FROM voters WHERE username = ?', (username,)).fetchone()
+    return json.loads(row[0])
+
+
+def test_recently_read_texts_are_cached(app, tmp_path):
+    store = app.JsonCampaignStore(tmp_path, capacity=2)
+    for username in ('ann', 'bob', 'cy'):
+        store.put(username, {'platform': username})
+    assert store.get('ann') == {'platform': 'ann'}
+    assert store.get('bob') == {'platform': 'bob'}
+
+    # Changed behind the store's back: cached texts are served as they were read
+    store._write('ann', {'platform': 'changed'})
+    assert store.get('ann') == {'platform': 'ann'}
+    # Reading a third evicts the least recently used, bob
+    store.get('cy')
+    store._write('bob', {'platform': 'changed'})
+    assert store.get('bob') == {'platform': 'changed'}
+
+    # Writes through the store are never stale
+    store.put('cy', {'platform': 'new'})
+    assert store.get('cy') == {'platform': 'new'}
+    store.delete('cy')
+    assert store.get('cy') == {}
+
+
+def test_texts_are_saved_apart_and_read_on_demand(app, open_storage, make_candidate):
+    storage = open_storage()
+    voters = storage.load_voters()
+    voters = {} if voters is None else voters
+    voters['pres1'] = app.VoterRecord.from_dict(make_candidate(1))
+    storage.save_voters(voters)
+    assert 'platform' not in saved(storage, 'pres1')
+    storage.close()
+
+    storage = open_storage()
+    record = storage.load_voters()['pres1']
+    assert record.campaign == (storage.campaign, 'pres1')
+    assert record['platform'] == 'Roads' and record['vision'] == 'Growth'
+    assert record == make_candidate(1)
+
+
+def test_edited_and_deleted_texts(app, open_storage, make_candidate):
+    storage = open_storage()
+    voters = storage.load_voters()
+    voters = {} if voters is None else voters
+    voters['pres1'] = app.VoterRecord.from_dict(make_candidate(1))
+    voters['pres2'] = app.VoterRecord.from_dict(make_candidate(2))
+    storage.save_voters(voters)
+
+    record = voters['pres1']
+    record['platform'] = 'Bridges'
+    del record['vision']
+    # Edits stay on the record until saved, the store's copy is untouched
+    assert storage.campaign.get('pres1')['platform'] == 'Roads'
+    voters['pres1'] = record
+    del voters['pres2']
+    storage.save_voters(voters)
+    storage.close()
+
+    storage = open_storage()
+    record = storage.load_voters()['pres1']
+    assert record['platform'] == 'Bridges' and 'vision' not in record
+    assert storage.campaign.get('pres2') == {}
+
+
+def test_inline_texts_move_to_the_store(app, tmp_path, make_candidate):
+    with open(tmp_path / "voters.json", 'w') as f:
+        json.dump({'pres1': make_candidate(1)}, f)
+    storage = app.JsonStorage(tmp_path)
+    assert storage.load_voters()['pres1']['platform'] == 'Roads'
+    assert 'platform' not in saved(storage, 'pres1')
+    assert app.JsonCampaignStore(tmp_path / "campaign").get('pres1')['promises'] == 'Schools'
+    storage.close()
@@ -0,0 +1,47 @@
+"""CandidateIndex: candidates by full name and by desired position"""
+
+
+def candidate(name, position, is_candidate=True):
+    return {'full_name': name, 'desired_position': position, 'is_candidate': is_candidate}
+
+
+def test_rebuild_from_voters(app):
+    index = app.CandidateIndex()
+    index.rebuild({
+        'p1': candidate('Ana', 'President'),
+        'v1': candidate('Val', '', is_candidate=False),
+        'm1': candidate('Dee', 'Mayor'),
+        'p2': candidate('Ben', 'President'),
+    })
+    assert len(index) == 3 and 'Val' not in index
+    assert index.username('Ben') == 'p2'
+    assert index.position('Dee') == 'Mayor'
+    assert index.names_for('President') == ['Ana', 'Ben']
+    assert index.names_for('Governor') == []
+
+
+def test_update_refiles_renamed_and_moved_candidates(app):
+    index = app.CandidateIndex()
+    index.add('p1', candidate('Ana', 'President'))
+    index.add('p2', candidate('Ben', 'President'))
+    version = index.version
+
+    index.update('Ana', 'p1', candidate('Ana Cruz', 'Mayor'))
+    assert 'Ana' not in index and index.username('Ana Cruz') == 'p1'
+    assert index.names_for('President') == ['Ben']
+    assert index.names_for('Mayor') == ['Ana Cruz']
+    assert index.version > version
+
+    # No longer a candidate
+    index.update('Ben', 'p2', candidate('Ben', 'President', is_candidate=False))
+    assert 'Ben' not in index
+    assert index.names_for('President') == []
+    assert 'President' not in index.by_position
+
+
+def test_remove_returns_the_username(app):
+    index = app.CandidateIndex()
+    index.add('p1', candidate('Ana', 'President'))
+    assert index.remove('Ana') == 'p1'
+    assert index.remove('Ana') is None
+    assert len(index) == 0
@@ -0,0 +1,85 @@
+"""CredentialManager: salted KDF hashes, upgrades of older hashes and the login throttle"""
+import hashlib
+
+import pytest
+
+
+@pytest.fixture(params=['scrypt', 'pbkdf2_sha256'])
+def credentials(app, request):
+    credentials = app.CredentialManager(target=0.001)
+    if request.param == 'scrypt' and not hasattr(hashlib, 'scrypt'):
+        pytest.skip("hashlib has no scrypt")
+    credentials.algorithm = request.param
+    return credentials
+
+
+def test_hash_and_verify(app, credentials):
+    stored = credentials.hash('s3cret')
+    assert stored.startswith(credentials.algorithm + '$')
+    assert app.CredentialManager.is_hash(stored)
+    assert credentials.verify('s3cret', stored)
+    assert not credentials.verify('S3cret', stored)
+    # Salted, so the same password never gives the same hash
+    assert credentials.hash('s3cret') != stored
+    assert not credentials.needs_rehash(stored)
+
+
+def test_missing_or_corrupt_hashes_never_verify(credentials):
+    assert not credentials.verify('s3cret', None)
+    assert not credentials.verify('s3cret', '')
+    assert not credentials.verify('s3cret', 'scrypt$zz$8$1$00$00')
+    assert not credentials.verify('s3cret', 'pbkdf2_sha256$100$nothex$00')
+    assert not credentials.verify('s3cret', 'plain text')
+
+
+def test_legacy_sha256_verifies_and_is_upgraded(credentials):
+    legacy = hashlib.sha256(b's3cret').hexdigest()
+    assert credentials.verify('s3cret', legacy)
+    assert not credentials.verify('other', legacy)
+    assert credentials.needs_rehash(legacy)
+
+
+def test_bulk_hashes_are_cheap_and_upgraded(app, credentials):
+    stored = credentials.bulk_hash('s3cret')
+    assert app.CredentialManager.is_hash(stored)
+    assert credentials.verify('s3cret', stored)
+    assert credentials.needs_rehash(stored)
+    assert credentials.bulk_hash('s3cret') != stored
+
+
+def test_another_algorithm_is_upgraded(app):
+    credentials = app.CredentialManager(target=0.001)
+    credentials.algorithm = 'pbkdf2_sha256'
+    stored = credentials.hash('s3cret')
+    credentials.algorithm = 'scrypt'
+    assert credentials.needs_rehash(stored)
+    assert credentials.verify('s3cret', stored)
+
+
+def test_fixture_passwords(app):
+    credentials = app.CredentialManager(target=0.001)
+    stored = app.hash_fixture_password(1234, credentials)
+    assert credentials.verify('1234', stored)
+    assert app.hash_fixture_password(stored, credentials) == stored
+    # A bare digest is a password like any other, not a stored hash
+    digest = hashlib.sha256(b'1234').hexdigest()
+    assert app.hash_fixture_password(digest, credentials) != digest
+    assert not credentials.verify('1234', app.hash_fixture_password(digest, credentials))
+
+
+def test_throttle(app, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(app.time, 'monotonic', lambda: now[0])
+    credentials = app.CredentialManager(attempts=3, refill=10.0)
+    assert [credentials.throttle('ann') for _ in range(3)] == [0, 0, 0]
+    assert credentials.throttle('ann') == pytest.approx(10.0)
+    # Other usernames have their own bucket
+    assert credentials.throttle('bob') == 0
+
+    now[0] += 5
+    assert credentials.throttle('ann') == pytest.approx(5.0)
+    now[0] += 5
+    assert credentials.throttle('ann') == 0
+
+    credentials.reset('ann')
+    assert [credentials.throttle('ann') for _ in range(3)] == [0, 0, 0]
@@ -0,0 +1,128 @@
+"""ElectionEngine on both storage backends: registration, logins, ballots and what survives a reopen"""
+import csv
+
+import pytest
+
+
+def test_register_and_authenticate(app, open_engine, make_voter):
+    engine = open_engine()
+    voter = engine.register('ann', make_voter(1))
+    assert app.CredentialManager.is_hash(voter['password'])
+    engine.authenticate('ann', 'pass-1')
+    with pytest.raises(app.ElectionError, match="Invalid credentials"):
+        engine.authenticate('ann', 'wrong')
+    with pytest.raises(app.ElectionError, match="Invalid candidate credentials"):
+        engine.authenticate('ann', 'pass-1', kind='candidate')
+    engine.close()
+
+    reopened = open_engine()
+    assert reopened.voters['ann']['full_name'] == "Voter 1"
+    reopened.authenticate('ann', 'pass-1')
+
+
+def test_register_refuses_taken_identity(app, open_engine, make_voter):
+    engine = open_engine()
+    engine.register('ann', make_voter(1))
+    with pytest.raises(app.ElectionError, match="Username already exists"):
+        engine.register('ann', make_voter(2))
+    with pytest.raises(app.ElectionError, match="National ID is already registered"):
+        engine.register('bob', make_voter(2, national_id='nid-000001'))
+    with pytest.raises(app.ElectionError, match="email address is already registered"):
+        engine.register('bob', make_voter(2, email='VOTER1@example.org'))
+    with pytest.raises(app.ElectionError, match="18 or older"):
+        engine.register('bob', make_voter(2, date_of_birth='2020-01-01'))
+    assert 'bob' not in engine.voters
+
+
+def test_login_upgrades_legacy_hash(app, open_engine):
+    engine = open_engine()
+    assert app.PASSWORD_HASH.fullmatch(engine.admin_data['admin'])
+    engine.authenticate('admin', 'admin123', kind='admin')
+    upgraded = engine.admin_data['admin']
+    assert app.CredentialManager.is_hash(upgraded)
+    engine.authenticate('admin', 'admin123', kind='admin')
+    assert engine.admin_data['admin'] == upgraded
+
+
+def test_logins_are_throttled(app, open_engine, make_voter):
+    engine = open_engine()
+    engine.register('ann', make_voter(1))
+    for _ in range(engine.credentials.attempts):
+        with pytest.raises(app.ElectionError, match="Invalid credentials"):
+            engine.authenticate('ann', 'wrong')
+    with pytest.raises(app.ElectionError, match="Too many login attempts"):
+        engine.authenticate('ann', 'pass-1')
+
+
+def test_cast_counts_once_per_role_and_persists(app, open_engine, make_voter, make_candidate):
+    engine = open_engine()
+    engine.register('pres1', make_candidate(1))
+    engine.register('pres2', make_candidate(2))
+    engine.register('mayor', make_candidate(3, position='Mayor'))
+    for i in range(1, 4):
+        engine.register(f"v{i}", make_voter(10 + i))
+
+    ballot = engine.cast('v1', 'Candidate 1')
+    assert (ballot['voter'], ballot['candidate'], ballot['role']) == ('v1', 'Candidate 1', 'President')
+    engine.cast('v2', 'Candidate 2')
+    engine.cast('v3', 'Candidate 2')
+    engine.cast('v1', 'Candidate 3')
+    with pytest.raises(app.AlreadyVoted, match="Candidate 1"):
+        engine.cast('v1', 'Candidate 2')
+    with pytest.raises(app.ElectionError, match="Unknown voter"):
+        engine.cast('nobody', 'Candidate 1')
+
+    assert engine.candidates == {'Candidate 1': 1, 'Candidate 2': 2, 'Candidate 3': 1}
+    assert [row[:3] + row[4:5] for row in engine.results_rows()] == [
+        ('Mayor', 1, 'Candidate 3', 1),
+        ('President', 1, 'Candidate 2', 2),
+        ('President', 2, 'Candidate 1', 1),
+    ]
+    engine.close()
+
+    reopened = open_engine()
+    assert reopened.candidates == {'Candidate 1': 1, 'Candidate 2': 2, 'Candidate 3': 1}
+    assert len(reopened.voting_history) == 4
+    # The one-vote-per-role index is rebuilt from the stored history
+    with pytest.raises(app.AlreadyVoted):
+        reopened.cast('v2', 'Candidate 1')
+
+
+def test_reset_votes(open_engine, make_voter, make_candidate):
+    engine = open_engine()
+    engine.register('pres1', make_candidate(1))
+    engine.register('v1', make_voter(2))
+    engine.cast('v1', 'Candidate 1')
+    history = engine.voting_history
+    engine.reset_votes()
+    assert engine.candidates == {'Candidate 1': 0}
+    assert engine.voting_history == [] and len(history) == 1
+    engine.cast('v1', 'Candidate 1')
+    engine.close()
+
+    assert open_engine().candidates == {'Candidate 1': 1}
+
+
+def test_seed_is_applied_once(open_engine, make_voter, make_candidate):
+    engine = open_engine()
+    records = [dict(make_candidate(1), username='pres1'), dict(make_voter(2), username='v2')]
+    assert engine.seed('fixture', records) == 2
+    assert engine.seed('fixture', records) == 0
+    assert engine.candidates == {'Candidate 1': 0}
+    engine.close()
+
+    reopened = open_engine()
+    assert reopened.seed('fixture', records) == 0
+    reopened.authenticate('v2', 'pass-2')
+
+
+def test_csv_export(tmp_path, open_engine, make_voter, make_candidate):
+    engine = open_engine()
+    engine.register('pres1', make_candidate(1))
+    engine.register('v1', make_voter(2))
+    engine.cast('v1', 'Candidate 1')
+    filename = engine.export(tmp_path / "history.csv", 'csv')
+    with open(filename, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['Timestamp', 'Voter', 'Candidate', 'Role']
+    assert rows[1][1:] == ['v1', 'Candidate 1', 'President']
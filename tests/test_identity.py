@@ -0,0 +1,66 @@
+"""IdentityIndex: who already holds a username, national ID or email"""
+import pytest
+
+
+@pytest.fixture
+def accounts():
+    return {'ann': None, 'bob': None}
+
+
+@pytest.fixture
+def identity(app, accounts):
+    identity = app.IdentityIndex(
+        {'username': lambda username: username if username in accounts else None},
+        {'username': lambda: ((username, username) for username in accounts)}
+    )
+    identity.rebuild([
+        ('ann', 'NID-0001', 'Ann@Example.org'),
+        ('bob', 'NID0002', 'bob@example.org'),
+    ])
+    return identity
+
+
+def test_values_are_normalized(identity):
+    assert identity.owner('national_id', 'nid 0001') == 'ann'
+    assert identity.owner('national_id', 'N.I.D/00-02') == 'bob'
+    assert identity.owner('email', '  ANN@example.ORG ') == 'ann'
+    assert identity.owner('email', 'cy@example.org') is None
+    assert identity.owner('username', 'bob') == 'bob'
+    assert identity.owner('phone', '123') is None
+
+
+def test_the_first_holder_keeps_a_duplicate(app):
+    identity = app.IdentityIndex({})
+    identity.rebuild([('ann', 'NID1', 'same@example.org'), ('bob', 'NID2', 'SAME@example.org')])
+    assert identity.owner('email', 'same@example.org') == 'ann'
+
+
+def test_add_and_remove(identity):
+    identity.add('cy', {'national_id': 'NID0003', 'email': 'cy@example.org'})
+    assert identity.owner('national_id', 'NID0003') == 'cy'
+    # Removing someone else's value leaves it alone
+    identity.remove('bob', {'national_id': 'NID0003', 'email': 'cy@example.org'})
+    assert identity.owner('email', 'cy@example.org') == 'cy'
+    identity.remove('cy', {'national_id': 'NID0003', 'email': 'cy@example.org'})
+    assert identity.owner('national_id', 'NID0003') is None
+
+
+def test_clash(identity):
+    fields = ('username', 'national_id', 'email')
+    assert identity.clash('cy', {'national_id': 'NID0003', 'email': 'cy@example.org'}, fields) is None
+    assert identity.clash('bob', {'national_id': 'NID0003'}, fields) == 'username'
+    assert identity.clash('cy', {'national_id': 'nid0002'}, fields) == 'national_id'
+    assert identity.clash('cy', {'email': 'BOB@example.org'}, fields) == 'email'
+    # An edit may keep the record's own values
+    assert identity.clash('bob', {'national_id': 'NID0002', 'email': 'bob@example.org'}, fields, editing=True) is None
+    assert identity.clash('bob', {'email': 'ann@example.org'}, fields, editing=True) == 'email'
+
+
+def test_snapshot_is_frozen(identity, accounts):
+    snapshot = identity.snapshot()
+    identity.add('cy', {'national_id': 'NID0003', 'email': 'cy@example.org'})
+    accounts['cy'] = None
+    assert snapshot.owner('national_id', 'NID0003') is None
+    assert snapshot.owner('username', 'cy') is None
+    assert snapshot.owner('username', 'ann') == 'ann'
+    assert snapshot.owner('email', 'bob@example.org') == 'bob'
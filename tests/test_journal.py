@@ -0,0 +1,91 @@
+"""VoteJournal and its replay on top of the votes.json snapshot"""
+
+
+def ballot(voter, candidate='Candidate 1', role='President', timestamp='2024-05-01 10:00:00'):
+    return {'voter': voter, 'candidate': candidate, 'role': role, 'timestamp': timestamp}
+
+
+def test_replay_returns_appended_records(app, tmp_path):
+    journal = app.VoteJournal(tmp_path / "votes.journal")
+    assert journal.append(ballot('v1')) == 1
+    assert journal.append(ballot('v2')) == 2
+    journal.close()
+
+    reopened = app.VoteJournal(tmp_path / "votes.journal")
+    assert [record['voter'] for record in reopened.replay()] == ['v1', 'v2']
+    assert reopened.seq == 2 and reopened.entries == 2
+    # Numbering carries on after the replayed records
+    assert reopened.append(ballot('v3')) == 3
+
+
+def test_replay_skips_records_covered_by_the_snapshot(app, tmp_path):
+    journal = app.VoteJournal(tmp_path / "votes.journal")
+    for voter in ('v1', 'v2', 'v3'):
+        journal.append(ballot(voter))
+    journal.close()
+
+    reopened = app.VoteJournal(tmp_path / "votes.journal")
+    assert [record['seq'] for record in reopened.replay(after_seq=2)] == [3]
+    assert reopened.seq == 3
+
+
+def test_torn_tail_is_dropped(app, tmp_path):
+    path = tmp_path / "votes.journal"
+    journal = app.VoteJournal(path)
+    journal.append(ballot('v1'))
+    journal.append(ballot('v2'))
+    journal.close()
+    intact = path.stat().st_size
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"voter": "v3", "cand')  # A crash in the middle of a write
+
+    reopened = app.VoteJournal(path)
+    assert [record['voter'] for record in reopened.replay()] == ['v1', 'v2']
+    assert path.stat().st_size == intact
+    reopened.append(ballot('v3'))
+    reopened.close()
+    assert [record['voter'] for record in app.VoteJournal(path).replay()] == ['v1', 'v2', 'v3']
+
+
+def test_fsync_batches(app, tmp_path):
+    journal = app.VoteJournal(tmp_path / "votes.journal", fsync_every=3, fsync_interval=3600)
+    journal.append(ballot('v1'))
+    journal.append(ballot('v2'))
+    assert journal.pending_sync
+    journal.append(ballot('v3'))
+    assert not journal.pending_sync
+    journal.close()
+
+
+def test_json_storage_replays_the_journal_over_the_snapshot(app, tmp_path):
+    storage = app.JsonStorage(tmp_path)
+    candidates, history = {'Candidate 1': 1}, [app.Ballot.from_dict(ballot('v1'))]
+    storage.save_votes(candidates, history)
+    for voter in ('v2', 'v3'):
+        vote = app.Ballot.from_dict(ballot(voter))
+        candidates['Candidate 1'] += 1
+        history.append(vote)
+        storage.append_ballot(vote, candidates, history)
+    storage.close()
+
+    candidates, history = app.JsonStorage(tmp_path).load_votes()
+    assert candidates == {'Candidate 1': 3}
+    assert [vote['voter'] for vote in history] == ['v1', 'v2', 'v3']
+    assert history[1]['timestamp'] == '2024-05-01 10:00:00'
+
+
+def test_json_storage_compacts_the_journal(app, tmp_path):
+    storage = app.JsonStorage(tmp_path)
+    storage.journal.compact_after = 2
+    candidates, history = {'Candidate 1': 0}, []
+    for voter in ('v1', 'v2', 'v3'):
+        vote = app.Ballot.from_dict(ballot(voter))
+        candidates['Candidate 1'] += 1
+        history.append(vote)
+        storage.append_ballot(vote, candidates, history)
+    storage.close()
+
+    # The first two went into votes.json, only the third is still journaled
+    assert len(list(app.VoteJournal(tmp_path / "votes.journal").replay())) == 1
+    candidates, history = app.JsonStorage(tmp_path).load_votes()
+    assert candidates == {'Candidate 1': 3} and len(history) == 3
@@ -0,0 +1,65 @@
+"""The slotted VoterRecord, Address and Ballot records and their dict-style access"""
+import json
+
+import pytest
+
+
+def test_voter_record_behaves_like_the_dict_it_replaced(app, make_voter):
+    data = dict(make_voter(1), nickname='Annie')
+    record = app.VoterRecord.from_dict(data)
+    assert record == data and record.to_dict() == data
+    assert isinstance(record['address'], app.Address)
+    assert record['address']['city'] == 'Manila'
+    assert record['nickname'] == 'Annie' and record.extra == {'nickname': 'Annie'}
+    assert 'party' not in record and record.get('party', 'Independent') == 'Independent'
+    with pytest.raises(KeyError):
+        record['party']
+
+    record['party'] = 'Green'
+    record.update({'occupation': 'Nurse'}, phone='123')
+    assert (record['party'], record['occupation'], record['phone']) == ('Green', 'Nurse', '123')
+    assert record.pop('nickname') == 'Annie' and record.extra is None
+    assert record.pop('nickname', None) is None
+    assert record.setdefault('term_length', '6 Years') == '6 Years'
+    del record['party']
+    assert 'party' not in record
+    assert set(record) == set(data) - {'nickname'} | {'term_length'}
+
+
+def test_repeated_values_are_interned(app, make_voter):
+    first = app.VoterRecord.from_dict(make_voter(1, gender=''.join(['Fe', 'male'])))
+    second = app.VoterRecord.from_dict(make_voter(2, gender=''.join(['Fem', 'ale'])))
+    assert first['gender'] is second['gender']
+    assert first['address']['country'] is second['address']['country']
+
+
+def test_edits_call_on_change(app, make_voter):
+    record = app.VoterRecord.from_dict(make_voter(1))
+    changes = []
+    record.on_change = lambda: changes.append(1)
+    record['address'] = dict(record['address'])
+    record['address']['city'] = 'Cebu City'
+    record.setdefault('party', 'Green')
+    del record['party']
+    assert len(changes) == 4
+
+
+def test_json_round_trip(app, make_voter):
+    record = app.VoterRecord.from_dict(make_voter(1))
+    text = json.dumps({'ann': record}, default=app.record_json)
+    assert json.loads(text) == {'ann': make_voter(1)}
+
+
+def test_ballot_keeps_an_integer_timestamp(app):
+    data = {'candidate': 'Ana', 'voter': 'v1', 'role': 'President', 'timestamp': '2024-02-29 23:59:58'}
+    ballot = app.Ballot.from_dict(data)
+    assert ballot == data
+    assert isinstance(ballot.epoch, int)
+    assert ballot['timestamp'] == '2024-02-29 23:59:58'
+    assert json.loads(json.dumps(ballot, default=app.record_json)) == data
+    assert app.Ballot('v1', 'Ana', None, ballot.epoch + 2)['timestamp'] == '2024-03-01 00:00:00'
+
+
+@pytest.mark.parametrize('text', ['1999-12-31 00:00:00', '2024-06-01 12:34:56', '2038-01-19 03:14:08'])
+def test_timestamps_round_trip(app, text):
+    assert app.format_timestamp(app.parse_timestamp(text)) == text
@@ -0,0 +1,91 @@
+"""RegistrationValidator: the shared registration rules"""
+from datetime import date
+
+import pytest
+
+
+@pytest.fixture
+def identity(app):
+    identity = app.IdentityIndex({'username': lambda username: username if username == 'ann' else None})
+    identity.add('ann', {'national_id': 'NID000001', 'email': 'voter1@example.org'})
+    return identity
+
+
+@pytest.fixture
+def voter_rules(app, identity):
+    return app.RegistrationValidator(app.VOTER_REQUIRED, min_age=18, identity=identity)
+
+
+def test_a_complete_record_passes(voter_rules, make_voter):
+    assert voter_rules.check('bob', make_voter(2)) is None
+
+
+@pytest.mark.parametrize('field, message', [
+    ('full_name', "Full name is required"),
+    ('national_id', "National ID is required"),
+    ('date_of_birth', "Date of birth is required"),
+    ('occupation', "Occupation is required"),
+])
+def test_required_fields(voter_rules, make_voter, field, message):
+    assert voter_rules.check('bob', make_voter(2, **{field: '  '})) == message
+
+
+def test_required_address_parts(voter_rules, make_voter):
+    record = make_voter(2)
+    record['address'] = dict(record['address'], street='')
+    assert voter_rules.check('bob', record) == "Address is required"
+    del record['address']
+    assert voter_rules.check('bob', record) == "Address is required"
+
+
+def test_username_is_required_for_new_records(voter_rules, make_voter):
+    assert voter_rules.check('', make_voter(2)) == "Username is required"
+
+
+def test_dates_and_ages(app, make_candidate):
+    rules = app.RegistrationValidator(app.CANDIDATE_REQUIRED, min_age=25, role="a candidate")
+    today = date(2024, 6, 1)
+    assert rules.check('bob', make_candidate(2, date_of_birth='2023-02-30'), today=today) == (
+        "Invalid date of birth, expected YYYY-MM-DD"
+    )
+    record = make_candidate(2, date_of_birth='1999-06-02')
+    assert rules.check('bob', record, today=today) == "Must be 25 or older to register as a candidate"
+    record['date_of_birth'] = '1999-06-01'
+    assert rules.check('bob', record, today=today) is None
+
+
+def test_taken_identity_values(voter_rules, make_voter):
+    assert voter_rules.check('ann', make_voter(2)) == "Username already exists"
+    assert voter_rules.check('bob', make_voter(2, national_id='nid 000 001')) == (
+        "This National ID is already registered"
+    )
+    assert voter_rules.check('bob', make_voter(2, email='Voter1@Example.ORG')) == (
+        "This email address is already registered"
+    )
+
+
+def test_editing_ignores_the_records_own_values(voter_rules, make_voter):
+    assert voter_rules.check('ann', make_voter(1), editing=True) is None
+    assert voter_rules.check('bob', make_voter(1), editing=True) == "This National ID is already registered"
+
+
+def test_check_many_rejects_clashes_within_the_batch(voter_rules, make_voter):
+    accepted, errors = voter_rules.check_many([
+        ('bob', make_voter(2)),
+        ('cy', make_voter(3, email='VOTER2@example.org')),
+        ('bob', make_voter(4)),
+        ('dee', make_voter(5, email='bad')),
+        ('eli', make_voter(6)),
+    ])
+    assert list(accepted) == ['bob', 'eli']
+    assert errors == [
+        (2, 'cy', "This email address is already registered"),
+        (3, 'bob', "Username already exists"),
+        (4, 'dee', "Invalid email address"),
+    ]
+
+
+def test_using_another_identity_index(app, voter_rules, make_voter):
+    empty = app.IdentityIndex({})
+    assert voter_rules.using(empty).check('ann', make_voter(1)) is None
+    assert voter_rules.check('ann', make_voter(1)) == "Username already exists"
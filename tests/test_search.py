@@ -0,0 +1,62 @@
+"""SearchIndex: substring search over normalized fields"""
+import random
+
+import pytest
+
+
+@pytest.fixture
+def index(app):
+    index = app.SearchIndex()
+    index.build([
+        ('ann', ('ann', 'Ann Santos', 'ann@example.org')),
+        ('bob', ('bob', 'Bob  Reyes', 'bob@example.org')),
+        ('cruz', ('cruz', 'Maria Cruz', 'maria.cruz@example.org')),
+    ])
+    return index
+
+
+def test_matches_any_field_ignoring_case_and_spacing(index):
+    assert index.search('SANTOS') == ['ann']
+    assert index.search('bob reyes') == ['bob']
+    assert index.search('example.org') == ['ann', 'bob', 'cruz']
+    assert index.search('') == ['ann', 'bob', 'cruz']
+    assert index.search('nobody') == []
+
+
+def test_a_query_never_spans_two_fields(index):
+    # "bob" ends one field and "Bob" starts the next
+    assert index.search('bob bob') == []
+
+
+def test_add_replace_and_remove(index):
+    index.add('dee', 'dee', 'Dee Santos', '')
+    assert index.search('santos') == ['ann', 'dee']
+    index.add('ann', 'ann', 'Ann Lim', 'ann@example.org')
+    assert index.search('santos') == ['dee']
+    assert index.search('lim') == ['ann']
+    index.remove('dee')
+    assert index.search('santos') == []
+    assert len(index) == 3
+
+
+def test_narrowed_queries_match_a_fresh_search(app):
+    rng = random.Random(7)
+    words = ['santos', 'reyes', 'cruz', 'garcia', 'lim', 'tan']
+    entries = [(i, (f"user{i}", f"{rng.choice(words)} {rng.choice(words)}")) for i in range(500)]
+    index = app.SearchIndex()
+    index.build(entries)
+    for query in ('s', 'sa', 'san', 'sant', 'santos r', 'santos re'):
+        fresh = app.SearchIndex()
+        fresh.build(entries)
+        assert index.search(query) == fresh.search(query)
+
+
+def test_results_survive_compaction(app):
+    index = app.SearchIndex()
+    index.build((i, (f"voter {i}",)) for i in range(100))
+    for i in range(0, 100, 2):
+        index.remove(i)
+    assert index.search('voter 1') == [1] + list(range(11, 20, 2))
+    assert len(index) == 50
+    index.add(200, 'voter 1000')
+    assert index.search('voter 100') == [200]
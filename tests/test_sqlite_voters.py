@@ -0,0 +1,131 @@
+"""SqliteVoterMap: loading on access, dirty tracking, pending adds/deletes and flush"""
+import pytest
+
+
+@pytest.fixture
+def storage(app, tmp_path):
+    storage = app.SqliteStorage(tmp_path / "voting.db")
+    yield storage
+    storage.close()
+
+
+@pytest.fixture
+def voters(app, storage, make_voter):
+    """A voter map holding a1..a5, already flushed to the table"""
+    voters = storage.load_voters()
+    for i in range(1, 6):
+        voters[f"a{i}"] = app.VoterRecord.from_dict(make_voter(i))
+    voters.flush()
+    return voters
+
+
+@pytest.fixture
+def reopened(app, storage):
+    """Open the same database again, to see what was actually written"""
+    opened = []
+
+    def open_():
+        opened.append(app.SqliteStorage(storage.path))
+        return opened[-1].load_voters()
+    yield open_
+    for other in opened:
+        other.close()
+
+
+def written_rows(storage, action):
+    """The voters table upserts executed while running action(), one per row written"""
+    statements = []
+    storage.conn.set_trace_callback(statements.append)
+    try:
+        action()
+    finally:
+        storage.conn.set_trace_callback(None)
+    return [statement for statement in statements if statement.startswith('INSERT INTO voters')]
+
+
+def test_in_place_edits_are_written_on_flush(storage, reopened, voters):
+    voters['a2']['occupation'] = 'Nurse'
+    voters['a3']['address']['city'] = 'Cebu City'
+    assert len(written_rows(storage, voters.flush)) == 2
+
+    other = reopened()
+    assert other['a2']['occupation'] == 'Nurse'
+    assert other['a3']['address']['city'] == 'Cebu City'
+    assert other['a1']['occupation'] == 'Teacher'
+
+
+def test_flush_without_changes_writes_nothing(storage, voters):
+    for username in list(voters):
+        voters[username].get('full_name')
+    assert written_rows(storage, voters.flush) == []
+
+
+def test_reading_rows_does_not_mark_them_dirty(storage, voters):
+    for _, record in voters.items():
+        record.get('email')
+    voters.peek('a4')
+    voters.usernames()
+    assert written_rows(storage, voters.flush) == []
+
+
+def test_edits_keep_the_row_order(app, reopened, voters):
+    voters['a2']['full_name'] = "Renamed"
+    voters['a1'] = app.VoterRecord.from_dict(dict(voters['a1'], occupation='Farmer'))
+    voters.flush()
+    assert list(reopened()) == ['a1', 'a2', 'a3', 'a4', 'a5']
+
+
+def test_pending_adds_keep_registration_order(app, reopened, voters, make_voter):
+    for i, username in enumerate(('zz', 'b1', 'mm', 'c0', 'aa'), 100):
+        voters[username] = app.VoterRecord.from_dict(make_voter(i))
+    expected = ['a1', 'a2', 'a3', 'a4', 'a5', 'zz', 'b1', 'mm', 'c0', 'aa']
+    assert list(voters) == expected
+    assert [username for username, _ in voters.items()] == expected
+    assert voters.usernames() == expected
+    voters.flush()
+    assert list(reopened()) == expected
+
+
+def test_deletes(app, reopened, voters, make_voter):
+    del voters['a2']
+    assert 'a2' not in voters
+    with pytest.raises(KeyError):
+        voters['a2']
+    with pytest.raises(KeyError):
+        del voters['a2']
+    voters['new'] = app.VoterRecord.from_dict(make_voter(50))
+    del voters['new']
+    assert len(voters) == 4
+    voters.flush()
+
+    other = reopened()
+    assert list(other) == ['a1', 'a3', 'a4', 'a5']
+    assert len(other) == 4
+
+
+def test_reassigned_record_is_not_clobbered_by_the_old_one(app, reopened, voters, make_voter):
+    old = voters['a1']
+    voters['a1'] = app.VoterRecord.from_dict(make_voter(1, occupation='Driver'))
+    old['occupation'] = 'Stale'
+    voters.flush()
+    assert reopened()['a1']['occupation'] == 'Driver'
+
+
+def test_clean_records_are_cached_up_to_the_limit(app, voters, make_voter, monkeypatch):
+    monkeypatch.setattr(app.SqliteVoterMap, 'CACHE_SIZE', 3)
+    for i in range(6, 20):
+        voters[f"a{i}"] = app.VoterRecord.from_dict(make_voter(i))
+    voters.flush()
+    for username in list(voters):
+        voters[username]
+    assert len(voters._cache) == 3
+    # An evicted record is read again from its row
+    assert voters['a1']['full_name'] == "Voter 1"
+
+
+def test_candidate_listing(app, reopened, voters, make_candidate):
+    voters['cand'] = app.VoterRecord.from_dict(make_candidate(7))
+    assert voters.usernames(candidates=True) == ['cand']
+    assert [username for username, _ in voters.candidate_items()] == ['cand']
+    voters.flush()
+    assert reopened().usernames(candidates=True) == ['cand']
@@ -0,0 +1,80 @@
+"""TallyEngine: per-position totals and standings kept up to date vote by vote"""
+import random
+
+import pytest
+
+
+@pytest.fixture
+def index(app):
+    index = app.CandidateIndex()
+    for username, name, position in (
+        ('p1', 'Ana', 'President'), ('p2', 'Ben', 'President'), ('p3', 'Cy', 'President'),
+        ('m1', 'Dee', 'Mayor'), ('m2', 'Eli', 'Mayor'),
+    ):
+        index.add(username, {'full_name': name, 'desired_position': position})
+    return index
+
+
+def vote(tally, counts, name):
+    counts[name] += 1
+    tally.record(counts, name)
+
+
+def test_standings_and_totals(app, index):
+    counts = {'Ana': 0, 'Ben': 0, 'Cy': 0, 'Dee': 0, 'Eli': 0}
+    tally = app.TallyEngine(index)
+    tally.sync(counts)
+    for name in ('Ben', 'Ana', 'Ben', 'Dee', 'Cy', 'Ben'):
+        vote(tally, counts, name)
+
+    assert tally.positions() == ['Mayor', 'President']
+    assert tally.position_total('President') == 5
+    assert tally.total == 6
+    assert tally.standings('President') == [
+        (1, 'Ben', 3, 60.0), (2, 'Ana', 1, 20.0), (2, 'Cy', 1, 20.0)
+    ]
+    assert tally.standings('Mayor') == [(1, 'Dee', 1, 100.0), (2, 'Eli', 0, 0.0)]
+    assert tally.percentage('Ben') == 60.0
+
+
+def test_incremental_updates_match_a_rebuild(app, index):
+    rng = random.Random(11)
+    names = ['Ana', 'Ben', 'Cy', 'Dee', 'Eli']
+    counts = dict.fromkeys(names, 0)
+    tally = app.TallyEngine(index)
+    tally.sync(counts)
+    for _ in range(300):
+        vote(tally, counts, rng.choice(names))
+        fresh = app.TallyEngine(index)
+        fresh.sync(dict(counts))
+        for position in ('President', 'Mayor'):
+            assert tally.standings(position) == fresh.standings(position)
+
+
+def test_candidate_changes_trigger_a_rebuild(app, index):
+    counts = {'Ana': 2, 'Ben': 1, 'Cy': 0, 'Dee': 0, 'Eli': 0}
+    tally = app.TallyEngine(index)
+    tally.sync(counts)
+
+    # Ana moves to the mayor's race
+    index.update('Ana', 'p1', {'full_name': 'Ana', 'desired_position': 'Mayor', 'is_candidate': True})
+    vote(tally, counts, 'Ben')
+    assert [name for _, name, _, _ in tally.standings('Mayor')] == ['Ana', 'Dee', 'Eli']
+    assert tally.position_total('President') == 2
+
+    # A new candidate
+    index.add('g1', {'full_name': 'Fay', 'desired_position': 'Governor'})
+    counts['Fay'] = 0
+    vote(tally, counts, 'Fay')
+    assert tally.positions() == ['Governor', 'Mayor', 'President']
+    assert tally.standings('Governor') == [(1, 'Fay', 1, 100.0)]
+
+
+def test_reset_counts(app, index):
+    counts = {'Ana': 2, 'Ben': 1, 'Cy': 0, 'Dee': 0, 'Eli': 0}
+    tally = app.TallyEngine(index)
+    tally.sync(counts)
+    counts = dict.fromkeys(counts, 0)
+    vote(tally, counts, 'Cy')
+    assert tally.standings('President')[0] == (1, 'Cy', 1, 100.0)
+    assert tally.total == 1
@@ -0,0 +1,129 @@
+"""VoterRollImport and read_fixture: bulk rows checked one by one, bad rows reported"""
+import csv
+import json
+
+import pytest
+
+
+@pytest.fixture
+def identity(app):
+    """An identity index where 'taken' holds NID000900 and taken@example.org"""
+    identity = app.IdentityIndex(
+        {'username': lambda username: username if username == 'taken' else None},
+        {'username': lambda: [('taken', 'taken')]}
+    )
+    identity.add('taken', {'national_id': 'NID000900', 'email': 'taken@example.org'})
+    return identity
+
+
+@pytest.fixture
+def importer(app, identity):
+    validator = app.RegistrationValidator(app.VOTER_REQUIRED, min_age=18, identity=identity)
+    return app.VoterRollImport(validator.using(identity.snapshot()), app.CredentialManager())
+
+
+def row(make_voter, username, i, **overrides):
+    return dict(make_voter(i, **overrides), username=username)
+
+
+def test_accepts_valid_rows_with_hashed_passwords(app, importer, make_voter):
+    importer.run([row(make_voter, 'ann', 1), row(make_voter, 'bob', 2)])
+    assert importer.rows == 2 and importer.errors == []
+    number, record = importer.accepted['bob']
+    assert number == 2
+    assert record['full_name'] == "Voter 2" and record['address']['city'] == 'Manila'
+    assert not record['is_candidate'] and record['registration_date']
+    assert app.CredentialManager.is_hash(record['password'])
+    assert importer.credentials.verify('pass-2', record['password'])
+
+
+def test_rejects_bad_rows_and_keeps_going(importer, make_voter):
+    importer.run([
+        row(make_voter, 'ann', 1),
+        row(make_voter, 'bad-email', 2, email='not-an-email'),
+        row(make_voter, 'no-phone', 3, phone=''),
+        row(make_voter, 'young', 4, date_of_birth='2020-02-02'),
+        row(make_voter, 'bad-date', 5, date_of_birth='02/02/1990'),
+        row(make_voter, 'same-email', 6, email='Voter1@Example.org'),
+        row(make_voter, 'ann', 7),
+        row(make_voter, 'taken', 8),
+        row(make_voter, 'taken-id', 9, national_id='nid-000900'),
+        row(make_voter, 'bob', 10),
+    ])
+    assert list(importer.accepted) == ['ann', 'bob']
+    assert importer.errors == [
+        (2, 'bad-email', "Invalid email address"),
+        (3, 'no-phone', "Phone is required"),
+        (4, 'young', "Must be 18 or older to register"),
+        (5, 'bad-date', "Invalid date of birth, expected YYYY-MM-DD"),
+        (6, 'same-email', "This email address is already registered"),
+        (7, 'ann', "Username already exists"),
+        (8, 'taken', "Username already exists"),
+        (9, 'taken-id', "This National ID is already registered"),
+    ]
+
+
+def test_malformed_rows_are_rejected_one_at_a_time(importer, make_voter):
+    importer.run([
+        ['not', 'an', 'object'],
+        row(make_voter, 'numeric-email', 1, email=123),
+        row(make_voter, 'list-name', 2, full_name=['Ann', 'Santos']),
+        row(make_voter, 'flat-address', 3, address='1 Rizal Street'),
+        row(make_voter, 'ok', 4),
+    ])
+    assert list(importer.accepted) == ['ok']
+    assert [(number, message) for number, _, message in importer.errors] == [
+        (1, "Invalid row, expected an object with the voter's fields"),
+        (2, "Invalid email address"),
+        (3, "Invalid full name"),
+        (4, "Invalid address"),
+    ]
+
+
+def test_digests_are_not_taken_as_stored_hashes(app, importer, make_voter):
+    digest = 'a' * 64
+    kdf_hash = app.CredentialManager().bulk_hash('secret')
+    importer.run([row(make_voter, 'ann', 1, password=digest), row(make_voter, 'bob', 2, password=kdf_hash)])
+    _, ann = importer.accepted['ann']
+    assert ann['password'] != digest and importer.credentials.verify(digest, ann['password'])
+    assert importer.accepted['bob'][1]['password'] == kdf_hash
+
+
+def test_an_export_is_not_importable_as_is(app, importer, make_voter):
+    assert 'password' not in app.VOTER_ROLL_EXPORT_COLUMNS
+    exported = row(make_voter, 'ann', 1)
+    del exported['password']
+    importer.run([exported])
+    assert importer.errors == [(1, 'ann', "Password is required")]
+
+
+def test_reads_csv_jsonl_and_json(app, tmp_path, make_voter):
+    records = [row(make_voter, 'ann', 1), row(make_voter, 'bob', 2)]
+
+    with open(tmp_path / "roll.csv", 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(app.VOTER_ROLL_COLUMNS)
+        for record in records:
+            writer.writerow([
+                record['address'][column[8:]] if column.startswith('address.') else record.get(column, '')
+                for column in app.VOTER_ROLL_COLUMNS
+            ])
+    (tmp_path / "roll.jsonl").write_text(''.join(json.dumps(record) + '\n' for record in records))
+    (tmp_path / "roll.json").write_text(json.dumps({
+        record['username']: {key: value for key, value in record.items() if key != 'username'}
+        for record in records
+    }))
+
+    for name in ("roll.csv", "roll.jsonl", "roll.json"):
+        rows = list(app.read_fixture(tmp_path / name))
+        assert [r['username'] for r in rows] == ['ann', 'bob'], name
+        assert rows[1]['address']['street'] == "2 Rizal Street", name
+    with pytest.raises(ValueError):
+        list(app.read_fixture(tmp_path / "roll.txt"))
+
+
+def test_error_report(tmp_path, importer, make_voter):
+    importer.run([row(make_voter, 'ann', 1, email='nope')])
+    report = importer.write_report(tmp_path / "errors.csv")
+    with open(report, newline='', encoding='utf-8') as f:
+        assert list(csv.reader(f)) == [['Row', 'Username', 'Error'], ['1', 'ann', "Invalid email address"]]
@@ -11,50 +11,3178 @@ import random
 import math
 import sys
 import subprocess
-from PIL import Image, ImageTk
 import time
+import sqlite3
+import bisect
+import calendar
+from dataclasses import dataclass, fields
+from urllib.parse import quote
+import tempfile
+import stat
+from collections.abc import MutableMapping
+from collections import OrderedDict
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+import csv
+import importlib.util
+import copy
+import hmac
 
-# Initialize darkdetect
-darkdetect_module = None
-try:
-    import darkdetect as darkdetect_module
-except ImportError:
-    def install_darkdetect():
+
+# Optional libraries (Pillow, ReportLab, NumPy, darkdetect) are imported on first use
+# so the login screen doesn't wait for them; set VOTING_STARTUP_TRACE=1 to see the timings
+STARTUP_STARTED = time.perf_counter()
+STARTUP_TARGET = 1.0  # Seconds from import to a usable login screen
+
+
+def startup_trace(stage):
+    """Print the time since startup for a stage when VOTING_STARTUP_TRACE is set"""
+    if os.environ.get('VOTING_STARTUP_TRACE'):
+        elapsed = time.perf_counter() - STARTUP_STARTED
+        note = f" (over the {STARTUP_TARGET:.1f}s target)" if elapsed > STARTUP_TARGET else ""
+        print(f"[startup] {stage}: {elapsed * 1000:.0f} ms{note}")
+
+
+def detect_dark_mode(budget=0.25):
+    """The system dark mode setting via darkdetect, if installed, within budget seconds
+
+    darkdetect shells out on some platforms, so it runs on a daemon thread
+    and a slow or missing answer simply means light mode.
+    """
+    result = []
+    
+    def probe():
+        try:
+            import darkdetect
+            result.append(bool(darkdetect.isDark()))
+        except Exception:
+            pass
+    
+    thread = threading.Thread(target=probe, name="darkdetect", daemon=True)
+    thread.start()
+    thread.join(budget)
+    return result[0] if result else False
+
+
+def load_pil():
+    """Import Pillow on first use, it is only needed for profile photos"""
+    from PIL import Image, ImageTk
+    return Image, ImageTk
+
+
+# os.umask() can only be read by setting it, so do that once before any threads start
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def atomic_write(path, write, binary=False):
+    """Call write(f) on a temp file next to path, then rename it over path
+
+    Readers (and a restart after a crash) see either the old file or the
+    complete new one, never a truncated mix.
+    """
+    path = Path(path)
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb' if binary else 'w') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600, keep the target's mode (or the usual one for a new file)
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(temp, mode)
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        raise
+    
+    # Make the rename itself durable (POSIX only, directories can't be opened on Windows)
+    if os.name == 'posix':
+        try:
+            dir_fd = os.open(path.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+
+_UNSET = object()  # Marks a record field that was never set, so `key in record` is False
+
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+_day_epochs = {}  # "YYYY-MM-DD" -> seconds at midnight, timestamps share very few dates
+
+
+def parse_timestamp(text):
+    """"YYYY-MM-DD HH:MM:SS" -> integer seconds
+
+    The wall-clock time is stored as-is (as if it were UTC), so
+    format_timestamp() gives back exactly the text that was parsed.
+    """
+    day = _day_epochs.get(text[:10])
+    if day is None:
+        day = _day_epochs[text[:10]] = calendar.timegm(time.strptime(text[:10], "%Y-%m-%d"))
+    if len(text) != 19 or text[10] != ' ':
+        # Unusual layout, let strptime validate it
+        return calendar.timegm(time.strptime(text, TIMESTAMP_FORMAT))
+    return day + int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19])
+
+
+def format_timestamp(epoch):
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(epoch))
+
+
+def current_epoch():
+    """The local wall-clock time in the same form as parse_timestamp()"""
+    return calendar.timegm(time.localtime())
+
+
+class RecordMapping:
+    """dict-style access for the slotted record classes
+
+    Voters, addresses and ballots used to be plain dicts and the rest of
+    the app still reads and edits them with record['key'], `in`, get(),
+    pop() and friends. Known keys live in slots; anything else goes into
+    the optional `extra` dict.
+    """
+    __slots__ = ()
+    FIELDS = ()
+    INTERNED = frozenset()
+
+    def _get(self, key):
+        if key in self.FIELD_SET:
+            return getattr(self, key)
+        extra = getattr(self, 'extra', None)
+        return _UNSET if extra is None else extra.get(key, _UNSET)
+
+    def _set(self, key, value):
+        if key in self.INTERNED and isinstance(value, str):
+            value = sys.intern(value)
+        if key in self.FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __getitem__(self, key):
+        value = self._get(key)
+        if value is _UNSET:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._set(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        if self._get(key) is _UNSET:
+            raise KeyError(key)
+        if key in self.FIELD_SET:
+            setattr(self, key, _UNSET)
+        else:
+            del self.extra[key]
+            if not self.extra:
+                self.extra = None
+        self._changed()
+
+    def _changed(self):
+        """Tell the owner an edit happened, see SqliteVoterMap"""
+        on_change = getattr(self, 'on_change', None)
+        if on_change is not None:
+            on_change()
+
+    def __contains__(self, key):
+        return self._get(key) is not _UNSET
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (dict, RecordMapping)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def get(self, key, default=None):
+        value = self._get(key)
+        return default if value is _UNSET else value
+
+    def setdefault(self, key, default=None):
+        value = self._get(key)
+        if value is _UNSET:
+            self._set(key, default)
+            self._changed()
+            value = self._get(key)
+        return value
+
+    def pop(self, key, *default):
+        value = self._get(key)
+        if value is _UNSET:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        del self[key]
+        return value
+
+    def update(self, other=(), **kwargs):
+        for key, value in dict(other, **kwargs).items():
+            self[key] = value
+
+    def keys(self):
+        keys = [field for field in self.FIELDS if getattr(self, field) is not _UNSET]
+        extra = getattr(self, 'extra', None)
+        if extra:
+            keys.extend(extra)
+        return keys
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def copy(self):
+        return self.to_dict()
+
+    def to_json(self):
+        """What gets written to storage, see record_json()"""
+        return self.to_dict()
+
+    def to_dict(self):
+        """Plain dict form for JSON, nested records included"""
+        return {
+            key: value.to_dict() if isinstance(value, RecordMapping) else value
+            for key, value in self.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, cls):
+            return data
+        record = cls()
+        for key, value in data.items():
+            record._set(key, value)
+        return record
+
+
+def record_class(cls):
+    """Turn cls into a slotted dataclass whose fields all default to unset"""
+    internal = ('extra', 'campaign', 'on_change')
+    for name in cls.__annotations__:
+        setattr(cls, name, None if name in internal else _UNSET)
+    cls = dataclass(slots=True, eq=False, repr=False)(cls)
+    cls.FIELDS = tuple(field.name for field in fields(cls) if field.name not in internal)
+    cls.FIELD_SET = frozenset(cls.FIELDS)
+    return cls
+
+
+@record_class
+class Address(RecordMapping):
+    """A voter's residential address"""
+    INTERNED = frozenset({'city', 'state', 'country'})
+
+    street: str
+    city: str
+    state: str
+    postal_code: str
+    country: str
+    extra: dict
+    on_change: object
+
+
+@record_class
+class VoterRecord(RecordMapping):
+    """One entry of the voter roll; unknown keys live in `extra`
+
+    The bulky campaign texts are not kept on the record: `campaign` is
+    None, a (store, username) reference resolved through the store's LRU
+    when one of those keys is read, or a dict of edits not yet saved.
+    """
+    INTERNED = frozenset({'gender', 'party', 'current_position', 'desired_position', 'term_length', 'occupation'})
+    CAMPAIGN_FIELDS = ('platform', 'promises', 'vision', 'experience', 'education', 'political_experience')
+
+    password: str
+    full_name: str
+    date_of_birth: str
+    national_id: str
+    phone: str
+    email: str
+    address: Address
+    occupation: str
+    gender: str
+    is_candidate: bool
+    party: str
+    current_position: str
+    desired_position: str
+    term_length: str
+    registration_date: str
+    profile_photo: str
+    extra: dict
+    campaign: object
+    on_change: object  # Called after every edit, set by the SQLite voter map
+
+    def campaign_texts(self):
+        """{field: text} for the campaign texts, read from the store if only referenced"""
+        campaign = self.campaign
+        if campaign is None:
+            return {}
+        if isinstance(campaign, dict):
+            return campaign
+        store, username = campaign
+        return store.get(username)
+
+    def _get(self, key):
+        if key in self.CAMPAIGN_FIELDS:
+            return self.campaign_texts().get(key, _UNSET)
+        return RecordMapping._get(self, key)
+
+    def _set(self, key, value):
+        if key in self.CAMPAIGN_FIELDS:
+            # Copy on first edit, the store's cached dict is shared
+            if not isinstance(self.campaign, dict):
+                self.campaign = dict(self.campaign_texts())
+            self.campaign[key] = value
+            return
+        if key == 'address' and isinstance(value, dict):
+            value = Address.from_dict(value)
+        if key == 'address' and isinstance(value, Address):
+            # Edits to the address count as edits to the record
+            value.on_change = self.on_change
+        RecordMapping._set(self, key, value)
+
+    def __delitem__(self, key):
+        if key in self.CAMPAIGN_FIELDS:
+            texts = dict(self.campaign_texts())
+            del texts[key]
+            self.campaign = texts
+            self._changed()
+            return
+        RecordMapping.__delitem__(self, key)
+
+    def keys(self):
+        keys = RecordMapping.keys(self)
+        if self.campaign is not None:
+            texts = self.campaign_texts()
+            keys.extend(key for key in self.CAMPAIGN_FIELDS if key in texts)
+        return keys
+
+    def to_json(self):
+        """The slim core record; campaign texts are saved through a CampaignTextStore"""
+        return {
+            key: value.to_dict() if isinstance(value, RecordMapping) else value
+            for key, value in ((key, self[key]) for key in RecordMapping.keys(self))
+        }
+
+
+class Ballot(RecordMapping):
+    """One cast vote; the timestamp is held as integer seconds and formatted on access"""
+    __slots__ = ('voter', 'candidate', 'role', 'epoch', 'extra')
+    FIELDS = ('candidate', 'voter', 'role', 'timestamp')
+    FIELD_SET = frozenset(('candidate', 'voter', 'role'))
+    INTERNED = FIELD_SET
+
+    def __init__(self, voter=_UNSET, candidate=_UNSET, role=_UNSET, epoch=_UNSET):
+        self.voter = sys.intern(voter) if isinstance(voter, str) else voter
+        self.candidate = sys.intern(candidate) if isinstance(candidate, str) else candidate
+        self.role = sys.intern(role) if isinstance(role, str) else role
+        self.epoch = epoch
+        self.extra = None
+
+    def _get(self, key):
+        if key == 'timestamp':
+            return _UNSET if self.epoch is _UNSET else format_timestamp(self.epoch)
+        return RecordMapping._get(self, key)
+
+    def _set(self, key, value):
+        if key == 'timestamp':
+            self.epoch = parse_timestamp(value)
+        else:
+            RecordMapping._set(self, key, value)
+
+    def __delitem__(self, key):
+        if key == 'timestamp' and self.epoch is not _UNSET:
+            self.epoch = _UNSET
+        else:
+            RecordMapping.__delitem__(self, key)
+
+    def keys(self):
+        keys = [key for key in self.FIELDS if self._get(key) is not _UNSET]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+
+def record_json(value):
+    """json.dump default= hook writing records as the plain dicts they replaced"""
+    if isinstance(value, RecordMapping):
+        return value.to_json()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class VoteJournal:
+    """Append-only JSON Lines journal of ballots cast since the last votes.json snapshot"""
+    def __init__(self, path, fsync_every=32, fsync_interval=1.0, compact_after=5000):
+        self.path = Path(path)
+        self.fsync_every = fsync_every  # fsync after this many unsynced ballots
+        self.fsync_interval = fsync_interval  # ...or after this many seconds
+        self.compact_after = compact_after  # Fold into a snapshot after this many ballots
+        self.seq = 0
+        self.entries = 0
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def replay(self, after_seq=0):
+        """Yield journal records newer than the snapshot sequence number"""
+        self.seq = max(self.seq, after_seq)
+        self.entries = 0
+        if not self.path.exists():
+            return
+
+        good_offset = 0
+        torn = False
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    good_offset += len(line)
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Partially written record from a crash, drop it and anything after
+                    torn = True
+                    break
+                good_offset += len(line)
+                seq = record.get('seq', 0)
+                self.seq = max(self.seq, seq)
+                if seq > after_seq:
+                    self.entries += 1
+                    yield record
+
+        if torn:
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_offset)
+
+    def append(self, record):
+        """Append one record, fsyncing in batches"""
+        self.seq += 1
+        record = dict(record.items(), seq=self.seq)
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        self.entries += 1
+        self._unsynced += 1
+
+        if (self._unsynced >= self.fsync_every or
+                time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.sync()
+        return self.seq
+
+    @property
+    def pending_sync(self):
+        return self._unsynced > 0
+
+    def sync(self):
+        """Force buffered journal records to disk"""
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def needs_compaction(self):
+        return self.entries >= self.compact_after
+
+    def truncate(self):
+        """Discard all records, called once they are covered by a snapshot"""
+        self.close()
+        with open(self.path, 'w', encoding='utf-8'):
+            pass
+        self.entries = 0
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+
+class CandidateIndex:
+    """In-memory index of candidates by full name and by desired position"""
+    def __init__(self):
+        self.by_name = {}  # full_name -> username
+        self.by_position = {}  # desired_position -> {full_name: None} (ordered set)
+        self._positions = {}  # full_name -> position it is filed under
+        self.version = 0  # Bumped on every change so dependent caches can tell they are stale
+
+    def rebuild(self, voters):
+        """Build the index from scratch, called once after loading voters"""
+        self.by_name.clear()
+        self.by_position.clear()
+        self._positions.clear()
+        self.version += 1
+        # The SQLite voter map can stream candidates straight from its index
+        items = voters.candidate_items() if hasattr(voters, 'candidate_items') else voters.items()
+        for username, data in items:
+            if data.get('is_candidate', False):
+                self.add(username, data)
+
+    def add(self, username, data):
+        name = data['full_name']
+        self.remove(name)
+        position = data.get('desired_position', 'Not specified')
+        self.by_name[name] = username
+        self.by_position.setdefault(position, {})[name] = None
+        self._positions[name] = position
+        self.version += 1
+
+    def remove(self, full_name):
+        """Drop a candidate from the index and return their username"""
+        username = self.by_name.pop(full_name, None)
+        position = self._positions.pop(full_name, None)
+        if position is not None:
+            names = self.by_position[position]
+            names.pop(full_name, None)
+            if not names:
+                del self.by_position[position]
+            self.version += 1
+        return username
+
+    def update(self, old_name, username, data):
+        """Re-file a record after its name, position or candidate flag changed"""
+        if self.by_name.get(old_name) == username:
+            self.remove(old_name)
+        if data.get('is_candidate', False):
+            self.add(username, data)
+
+    def username(self, full_name):
+        return self.by_name.get(full_name)
+
+    def position(self, full_name):
+        return self._positions.get(full_name)
+
+    def names_for(self, position):
+        return list(self.by_position.get(position, ()))
+
+    def __contains__(self, full_name):
+        return full_name in self.by_name
+
+    def __len__(self):
+        return len(self.by_name)
+
+
+class TallyEngine:
+    """Per-position vote totals and standings, kept up to date as ballots are recorded
+
+    Counts themselves live in the candidates dict (name -> votes). The
+    engine adds what the results views need on top of it: totals per
+    position and each position's candidates in rank order. A vote only
+    moves one name up its position's list; anything else (candidates
+    added, renamed, moved or the votes reset) is noticed through the
+    candidate index version and triggers a rebuild on next use.
+    """
+    def __init__(self, candidate_index):
+        self.candidate_index = candidate_index
+        self.counts = None
+        self.total = 0
+        self._standings = {}  # position -> candidate names, most votes first
+        self._rank_of = {}  # candidate name -> index in its position's standings
+        self._totals = {}  # position -> votes cast for that position
+        self._positions = []
+        self._stamp = None
+
+    def position_of(self, name):
+        return self.candidate_index.position(name) or 'Not specified'
+
+    def _current_stamp(self, counts):
+        return id(counts), len(counts), self.candidate_index.version
+
+    def sync(self, counts):
+        """Rebuild from counts if candidates or their positions changed since the last call"""
+        stamp = self._current_stamp(counts)
+        if self.counts is counts and self._stamp == stamp:
+            return
+        self.counts = counts
+        self._stamp = stamp
+        self._standings = {}
+        self._totals = {}
+        for name, votes in counts.items():
+            position = self.position_of(name)
+            self._standings.setdefault(position, []).append(name)
+            self._totals[position] = self._totals.get(position, 0) + votes
+        self._rank_of = {}
+        for names in self._standings.values():
+            names.sort(key=lambda name: (-counts[name], name))
+            for i, name in enumerate(names):
+                self._rank_of[name] = i
+        self._positions = sorted(self._standings)
+        self.total = sum(self._totals.values())
+
+    def record(self, counts, name):
+        """Account for one more vote for name, already added to counts"""
+        if self.counts is not counts or self._stamp != self._current_stamp(counts):
+            self.sync(counts)
+            return
+        position = self.position_of(name)
+        self.total += 1
+        self._totals[position] += 1
+        
+        # Bubble the name up past anyone it now beats, usually zero or one step
+        names = self._standings[position]
+        votes = counts[name]
+        i = self._rank_of[name]
+        while i > 0:
+            above = names[i - 1]
+            if (-counts[above], above) < (-votes, name):
+                break
+            names[i] = above
+            self._rank_of[above] = i
+            i -= 1
+        names[i] = name
+        self._rank_of[name] = i
+
+    def positions(self):
+        """Positions with at least one candidate, alphabetically"""
+        return list(self._positions)
+
+    def position_total(self, position):
+        return self._totals.get(position, 0)
+
+    def votes(self, name):
+        return self.counts.get(name, 0) if self.counts is not None else 0
+
+    def percentage(self, name):
+        """Share of the votes cast for name's position"""
+        total = self.position_total(self.position_of(name))
+        return (self.votes(name) / total * 100) if total > 0 else 0
+
+    def standings(self, position):
+        """(rank, name, votes, percentage) rows for a position, tied candidates share a rank"""
+        total = self._totals.get(position, 0)
+        rows = []
+        rank = 0
+        previous = None
+        for i, name in enumerate(self._standings.get(position, ())):
+            votes = self.counts[name]
+            if votes != previous:
+                rank = i + 1
+                previous = votes
+            rows.append((rank, name, votes, (votes / total * 100) if total > 0 else 0))
+        return rows
+
+
+class HistoryAnalytics:
+    """Columnar copy of the voting history for fast aggregate reports (needs NumPy)
+
+    Every ballot becomes one row of parallel arrays: interned voter,
+    candidate and role ids plus an int64 epoch timestamp. New ballots are
+    appended incrementally by sync(); reports are single bincount/unique
+    passes over those arrays instead of loops over the ballot dicts.
+    """
+    def __init__(self):
+        import numpy as np  # Optional dependency, only needed for analytics
+        self.np = np
+        self._reset()
+
+    def _reset(self):
+        np = self.np
+        self.voters, self.candidates, self.roles = [], [], []  # id -> name
+        self._ids = ({}, {}, {})  # name -> id, for voters, candidates and roles
+        self.voter_ids = np.empty(0, dtype=np.int32)
+        self.candidate_ids = np.empty(0, dtype=np.int32)
+        self.role_ids = np.empty(0, dtype=np.int32)
+        self.epochs = np.empty(0, dtype=np.int64)
+        self.count = 0
+        self._history = None
+
+    def _intern(self, which, names, value):
+        ids = self._ids[which]
+        id_ = ids.get(value)
+        if id_ is None:
+            id_ = ids[value] = len(names)
+            names.append(value)
+        return id_
+
+    def _grow(self, needed):
+        # Amortised doubling, like a list
+        np = self.np
+        capacity = len(self.epochs)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        for name in ('voter_ids', 'candidate_ids', 'role_ids', 'epochs'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def sync(self, history, chunk_size=100000):
+        """Bring the arrays up to date with history, appending only new ballots when possible"""
+        if history is not self._history or len(history) < self.count:
+            self._reset()
+            self._history = history
+        total = len(history)
+        if total == self.count:
+            return self
+        np = self.np
+        self._grow(total)
+        for start in range(self.count, total, chunk_size):
+            chunk = history[start:min(start + chunk_size, total)]
+            stop = start + len(chunk)
+            self.voter_ids[start:stop] = [self._intern(0, self.voters, vote['voter']) for vote in chunk]
+            self.candidate_ids[start:stop] = [self._intern(1, self.candidates, vote['candidate']) for vote in chunk]
+            self.role_ids[start:stop] = [self._intern(2, self.roles, vote.get('role') or 'Unknown Role') for vote in chunk]
+            try:
+                self.epochs[start:stop] = np.fromiter((vote.epoch for vote in chunk), np.int64, len(chunk))
+            except AttributeError:
+                # Plain dict rows: NumPy parses "YYYY-MM-DD HH:MM:SS" far faster than strptime per row
+                self.epochs[start:stop] = np.array(
+                    [vote['timestamp'] for vote in chunk], dtype='datetime64[s]'
+                ).astype(np.int64)
+            self.count = stop
+        return self
+
+    def _column(self, name):
+        return getattr(self, name)[:self.count]
+
+    def format_epoch(self, epoch):
+        """Back to the "YYYY-MM-DD HH:MM:SS" form used in the history"""
+        return str(self.np.datetime64(int(epoch), 's')).replace('T', ' ')
+
+    def turnout(self, interval=3600, distinct_voters=False):
+        """[(bucket start, ballots)] per interval seconds; with distinct_voters, count first ballots only"""
+        np = self.np
+        epochs = self._column('epochs')
+        if distinct_voters and self.count:
+            # Earliest ballot of each voter
+            voter_ids = self._column('voter_ids')
+            order = np.lexsort((epochs, voter_ids))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = voter_ids[order][1:] != voter_ids[order][:-1]
+            epochs = epochs[order[first]]
+        if not len(epochs):
+            return []
+        buckets, counts = np.unique(epochs // interval, return_counts=True)
+        return [(self.format_epoch(bucket * interval), int(count)) for bucket, count in zip(buckets, counts)]
+
+    def role_counts(self):
+        """{role: ballots cast for it}"""
+        counts = self.np.bincount(self._column('role_ids'), minlength=len(self.roles))
+        return {role: int(count) for role, count in zip(self.roles, counts)}
+
+    def candidate_by_hour(self):
+        """{candidate: [ballots in hour 0, ..., hour 23]} by hour of day"""
+        np = self.np
+        hours = (self._column('epochs') // 3600) % 24
+        cells = self._column('candidate_ids').astype(np.int64) * 24 + hours
+        matrix = np.bincount(cells, minlength=len(self.candidates) * 24).reshape(len(self.candidates), 24)
+        return {candidate: matrix[i].tolist() for i, candidate in enumerate(self.candidates)}
+
+    def voter_rows(self, voter):
+        """Indices into the history of the ballots cast by voter, oldest first"""
+        voter_id = self._ids[0].get(voter)
+        if voter_id is None:
+            return []
+        return self.np.flatnonzero(self._column('voter_ids') == voter_id).tolist()
+
+    def demographics(self, group_of):
+        """{group: {candidate: ballots}} where group_of(voter username) names the voter's group"""
+        np = self.np
+        # One lookup per distinct voter, then a vectorised gather per ballot
+        groups, group_ids = [], {}
+        codes = np.empty(len(self.voters), dtype=np.int64)
+        for i, voter in enumerate(self.voters):
+            group = group_of(voter)
+            code = group_ids.get(group)
+            if code is None:
+                code = group_ids[group] = len(groups)
+                groups.append(group)
+            codes[i] = code
+        cells = codes[self._column('voter_ids')] * len(self.candidates) + self._column('candidate_ids')
+        matrix = np.bincount(cells, minlength=len(groups) * len(self.candidates)).reshape(len(groups), len(self.candidates))
+        return {
+            group: {candidate: int(count) for candidate, count in zip(self.candidates, matrix[g]) if count}
+            for g, group in enumerate(groups)
+        }
+
+
+class BallotIndex:
+    """Per-voter index of the roles already voted for, used to enforce one vote per role"""
+    def __init__(self):
+        self._by_voter = {}  # voter -> {role: candidate}
+
+    def rebuild(self, history, role_of=None):
+        """Rebuild from the voting history; role_of resolves rows saved without a role"""
+        self._by_voter.clear()
+        for vote in history:
+            role = vote.get('role')
+            if role is None and role_of is not None:
+                role = role_of(vote['candidate'])
+            if role is not None:
+                self.record(vote['voter'], role, vote['candidate'])
+
+    def record(self, voter, role, candidate):
+        # Keep the first ballot per role, matching what the duplicate check reports
+        self._by_voter.setdefault(voter, {}).setdefault(role, candidate)
+
+    def get(self, voter, role):
+        """Return the candidate this voter chose for the role, or None"""
+        return self._by_voter.get(voter, {}).get(role)
+
+    def roles_for(self, voter):
+        return self._by_voter.get(voter, {})
+
+    def __contains__(self, key):
+        voter, role = key
+        return role in self._by_voter.get(voter, ())
+
+    def clear(self):
+        self._by_voter.clear()
+
+
+class CampaignTextStore:
+    """Candidates' long campaign texts, kept out of the voter records and read on demand
+
+    Records only hold a (store, username) reference; get() reads the texts
+    from the backend and keeps the most recently viewed ones in a small LRU.
+    """
+    def __init__(self, capacity=32):
+        self.capacity = capacity
+        self._cache = OrderedDict()  # username -> {field: text}
+
+    def ref(self, username):
+        return (self, username)
+
+    def get(self, username):
+        """Return {field: text} for username (empty if none); treat it as read-only"""
+        texts = self._cache.get(username)
+        if texts is None:
+            texts = self._read(username)
+            self._cache[username] = texts
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(username)
+        return texts
+
+    def put(self, username, texts):
+        self._write(username, texts)
+        self._cache.pop(username, None)
+
+    def delete(self, username):
+        self._delete(username)
+        self._cache.pop(username, None)
+
+    def save_pending(self, voters):
+        """Write texts edited in memory and swap them for references; returns whether any were written"""
+        written = False
+        for username, record in voters:
+            if isinstance(record.campaign, dict):
+                self.put(username, record.campaign)
+                record.campaign = self.ref(username)
+                written = True
+        return written
+
+
+class JsonCampaignStore(CampaignTextStore):
+    """Campaign texts as one small JSON file per candidate"""
+    def __init__(self, directory, capacity=32):
+        CampaignTextStore.__init__(self, capacity)
+        self.directory = Path(directory)
+
+    def _path(self, username):
+        return self.directory / f"{quote(username, safe='')}.json"
+
+    def _read(self, username):
+        try:
+            with open(self._path(username), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, username, texts):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        atomic_write(self._path(username), lambda f: json.dump(texts, f))
+
+    def _delete(self, username):
+        try:
+            os.remove(self._path(username))
+        except FileNotFoundError:
+            pass
+
+
+class SqliteCampaignStore(CampaignTextStore):
+    """Campaign texts in their own table, next to the slim voters rows"""
+    def __init__(self, conn, capacity=32):
+        CampaignTextStore.__init__(self, capacity)
+        self.conn = conn
+
+    def _read(self, username):
+        row = self.conn.execute(
+            'SELECT data FROM campaign_texts WHERE username = ?', (username,)
+        ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _write(self, username, texts):
+        # Callers batch these inside their own transaction
+        self.conn.execute(
+            'INSERT OR REPLACE INTO campaign_texts (username, data) VALUES (?, ?)',
+            (username, json.dumps(texts))
+        )
+
+    def _delete(self, username):
+        self.conn.execute('DELETE FROM campaign_texts WHERE username = ?', (username,))
+
+
+class JsonStorage:
+    """Storage backend using the original flat JSON files plus the vote journal"""
+    name = 'json'
+
+    def __init__(self, directory='.'):
+        directory = Path(directory)
+        self.votes_file = directory / "votes.json"
+        self.admin_file = directory / "admin.json"
+        self.voters_file = directory / "voters.json"
+        self.seeds_file = directory / "seeds.json"
+        self.journal = VoteJournal(directory / "votes.journal")
+        self.campaign = JsonCampaignStore(directory / "campaign")
+        self._campaign_owners = set()  # Usernames with a campaign file, to clean up after deletes
+
+    def load_admin(self):
+        """Return the stored admin accounts, or None if there are none"""
+        if not self.admin_file.exists():
+            return None
+        with open(self.admin_file, 'r') as f:
+            return json.load(f)
+
+    def save_admin(self, admin_data):
+        atomic_write(self.admin_file, lambda f: json.dump(admin_data, f))
+
+    def load_voters(self):
+        """Return the voter roll, or None if it has never been saved"""
+        if not self.voters_file.exists():
+            return None
+        with open(self.voters_file, 'r') as f:
+            voters = {username: VoterRecord.from_dict(data) for username, data in json.load(f).items()}
+        for username, record in voters.items():
+            if record.campaign is None and record.get('is_candidate', False):
+                record.campaign = self.campaign.ref(username)
+        
+        # Older files carry the campaign texts inline, move them out once
+        if any(isinstance(record.campaign, dict) for record in voters.values()):
+            self.save_voters(voters)
+        else:
+            self._campaign_owners = {username for username, record in voters.items() if record.campaign is not None}
+        return voters
+
+    def save_voters(self, voters):
+        self.campaign.save_pending(voters.items())
+        owners = {username for username, record in voters.items() if record.campaign is not None}
+        for username in self._campaign_owners - owners:
+            self.campaign.delete(username)
+        self._campaign_owners = owners
+        
+        atomic_write(self.voters_file, lambda f: json.dump(voters, f, default=record_json))
+
+    def load_votes(self):
+        """Return (candidates, history) from the snapshot plus the journal"""
+        candidates, history, snapshot_seq = {}, [], 0
+        if self.votes_file.exists():
+            with open(self.votes_file, 'r') as f:
+                data = json.load(f)
+                candidates = data.get('candidates', {})
+                history = [Ballot.from_dict(vote) for vote in data.get('history', [])]
+                snapshot_seq = data.get('journal_seq', 0)
+        
+        # Replay ballots journaled since the snapshot was written
+        for record in self.journal.replay(snapshot_seq):
+            record.pop('seq', None)
+            candidates[record['candidate']] = candidates.get(record['candidate'], 0) + 1
+            history.append(Ballot.from_dict(record))
+        return candidates, history
+
+    def save_votes(self, candidates, history):
+        data = {
+            'candidates': candidates,
+            'history': history,
+            'journal_seq': self.journal.seq
+        }
+        atomic_write(self.votes_file, lambda f: json.dump(data, f, default=record_json))
+        # The snapshot now covers every journaled ballot
+        self.journal.truncate()
+
+    def load_seeds(self):
+        """Return {fixture name: digest} for the fixtures applied so far"""
+        if not self.seeds_file.exists():
+            return {}
+        with open(self.seeds_file, 'r') as f:
+            return json.load(f)
+
+    def save_seed(self, name, digest, voters=None, votes=None):
+        """Record an applied fixture, writing the voters and (candidates, history) passed with it"""
+        if voters is not None:
+            self.save_voters(voters)
+        if votes is not None:
+            self.save_votes(*votes)
+        # The digest goes last, an interrupted seed is simply applied again
+        seeds = self.load_seeds()
+        seeds[name] = digest
+        atomic_write(self.seeds_file, lambda f: json.dump(seeds, f))
+
+    def append_ballot(self, ballot, candidates, history):
+        """Persist one ballot; candidates/history are already updated in memory"""
+        self.journal.append(ballot)
+        if self.journal.needs_compaction():
+            self.save_votes(candidates, history)
+
+    @property
+    def pending_sync(self):
+        return self.journal.pending_sync
+
+    @property
+    def sync_interval(self):
+        return self.journal.fsync_interval
+
+    def sync(self):
+        self.journal.sync()
+
+    def close(self):
+        self.journal.close()
+
+
+class SqliteVoterMap(MutableMapping):
+    """Dict-like view of the voters table that loads records on first access
+
+    Records fetched with [] watch themselves (VoterRecord.on_change), so
+    in-place edits behave like the plain dict used by the JSON backend:
+    an edited or assigned record is kept until flush() writes it, and
+    only those rows are written. Clean records stay in a small LRU.
+    items()/values() and peek() read rows without caching them, so treat
+    records obtained that way as read-only.
+    """
+    CACHE_SIZE = 2048  # Clean records kept for repeated [] access
+
+    def __init__(self, conn, campaign):
+        self._conn = conn
+        self._campaign = campaign
+        self._cache = OrderedDict()  # username -> clean record, least recently used first
+        self._dirty = {}  # username -> record edited or assigned since the last flush
+        self._new = {}  # Usernames not yet in the table, as dict keys to keep them in registration order
+        self._deleted = set()  # Usernames pending deletion
+
+    def _exists(self, username):
+        return self._conn.execute(
+            'SELECT 1 FROM voters WHERE username = ?', (username,)
+        ).fetchone() is not None
+
+    def _decode(self, username, data):
+        record = VoterRecord.from_dict(json.loads(data))
+        if record.campaign is None and record.get('is_candidate', False):
+            record.campaign = self._campaign.ref(username)
+        return record
+
+    def _loaded(self, username):
+        """The record held in memory for username, or None"""
+        record = self._dirty.get(username)
+        return record if record is not None else self._cache.get(username)
+
+    def _row_record(self, username, data):
+        record = self._loaded(username)
+        return record if record is not None else self._decode(username, data)
+
+    def _watch(self, username, record):
+        """Move the record to the dirty set whenever it is edited"""
+        def changed():
+            # Never clobber a different record assigned since
+            if username not in self._deleted and self._dirty.get(username, record) is record:
+                self._cache.pop(username, None)
+                self._dirty[username] = record
+        record.on_change = changed
+        address = record.get('address')
+        if isinstance(address, Address):
+            address.on_change = changed
+
+    @staticmethod
+    def _unwatch(record):
+        if record is not None:
+            record.on_change = None
+            address = record.get('address')
+            if isinstance(address, Address):
+                address.on_change = None
+
+    def _keep(self, username, record):
+        """Cache a clean record, dropping the least recently used ones past CACHE_SIZE"""
+        self._cache[username] = record
+        self._cache.move_to_end(username)
+        while len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def peek(self, username):
+        """The record for username without caching it, for read-only use like drawing rows"""
+        record = self._loaded(username)
+        if record is not None:
+            return record
+        if username in self._deleted:
+            raise KeyError(username)
+        row = self._conn.execute(
+            'SELECT data FROM voters WHERE username = ?', (username,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(username)
+        return self._decode(username, row[0])
+
+    def __getitem__(self, username):
+        record = self._dirty.get(username)
+        if record is not None:
+            return record
+        record = self._cache.get(username)
+        if record is not None:
+            self._cache.move_to_end(username)
+            return record
+        record = self.peek(username)
+        self._watch(username, record)
+        self._keep(username, record)
+        return record
+
+    def __setitem__(self, username, record):
+        if username in self._deleted:
+            self._deleted.discard(username)
+        elif username not in self._new and self._loaded(username) is None and not self._exists(username):
+            self._new[username] = None
+        previous = self._loaded(username)
+        if previous is not record:
+            self._unwatch(previous)
+        self._cache.pop(username, None)
+        self._dirty[username] = record
+        self._watch(username, record)
+
+    def __delitem__(self, username):
+        if username in self._new:
+            self._new.pop(username)
+        elif username in self._deleted or not self._exists(username):
+            raise KeyError(username)
+        else:
+            self._deleted.add(username)
+        self._unwatch(self._loaded(username))
+        self._cache.pop(username, None)
+        self._dirty.pop(username, None)
+
+    def __contains__(self, username):
+        if username in self._dirty or username in self._cache:
+            return True
+        if username in self._deleted:
+            return False
+        return self._exists(username)
+
+    def __iter__(self):
+        for (username,) in self._conn.execute('SELECT username FROM voters ORDER BY rowid'):
+            if username not in self._deleted:
+                yield username
+        yield from list(self._new)
+
+    def __len__(self):
+        (count,) = self._conn.execute('SELECT COUNT(*) FROM voters').fetchone()
+        return count - len(self._deleted) + len(self._new)
+
+    def items(self):
+        for username, data in self._conn.execute('SELECT username, data FROM voters ORDER BY rowid'):
+            if username not in self._deleted:
+                yield username, self._row_record(username, data)
+        for username in list(self._new):
+            yield username, self._dirty[username]
+
+    def values(self):
+        for _, record in self.items():
+            yield record
+
+    def usernames(self, candidates=False):
+        """List voter or candidate usernames without loading their records"""
+        rows = self._conn.execute(
+            'SELECT username FROM voters WHERE is_candidate = ? ORDER BY rowid',
+            (1 if candidates else 0,)
+        )
+        names = [username for (username,) in rows if username not in self._deleted]
+        names.extend(u for u in self._new if self._dirty[u].get('is_candidate', False) == candidates)
+        return names
+
+    def candidate_items(self):
+        """Stream only candidate records using the is_candidate index"""
+        rows = self._conn.execute(
+            'SELECT username, data FROM voters WHERE is_candidate = 1 ORDER BY rowid'
+        )
+        for username, data in rows:
+            if username not in self._deleted:
+                yield username, self._row_record(username, data)
+        for username in list(self._new):
+            if self._dirty[username].get('is_candidate', False):
+                yield username, self._dirty[username]
+
+    def identity_items(self):
+        """Stream (username, national_id, email) with json_extract, without decoding whole records"""
+        rows = self._conn.execute(
+            "SELECT username, json_extract(data, '$.national_id'), json_extract(data, '$.email') "
+            "FROM voters ORDER BY rowid"
+        )
+        for username, national_id, email in rows:
+            if username in self._deleted:
+                continue
+            # Clean records match their row, only unsaved edits can differ
+            record = self._dirty.get(username)
+            if record is not None:
+                yield username, record.get('national_id'), record.get('email')
+            else:
+                yield username, national_id, email
+        for username in list(self._new):
+            record = self._dirty[username]
+            yield username, record.get('national_id'), record.get('email')
+
+    def flush(self):
+        """Write changed rows and pending deletes in a single transaction"""
+        with self._conn:
+            self.write_changes()
+
+    def write_changes(self):
+        """Queue edited rows and pending deletes on the connection, the caller commits"""
+        if not self._dirty and not self._deleted:
+            return
+        changed = [
+            (
+                username,
+                record.get('full_name', ''),
+                1 if record.get('is_candidate', False) else 0,
+                record.get('desired_position'),
+                json.dumps(record, default=record_json)
+            )
+            for username, record in self._dirty.items()
+        ]
+        edited = [(username, record) for username, record in self._dirty.items() if isinstance(record.campaign, dict)]
+        self._conn.executemany(
+            # An upsert, not INSERT OR REPLACE: replacing deletes the row, so an edited voter
+            # would get a new rowid and move to the end of every listing
+            'INSERT INTO voters (username, full_name, is_candidate, desired_position, data) '
+            'VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT(username) DO UPDATE SET full_name = excluded.full_name, '
+            'is_candidate = excluded.is_candidate, desired_position = excluded.desired_position, '
+            'data = excluded.data',
+            changed
+        )
+        self._conn.executemany(
+            'DELETE FROM voters WHERE username = ?',
+            [(username,) for username in self._deleted]
+        )
+        self._campaign.save_pending(edited)
+        for username in self._deleted:
+            self._campaign.delete(username)
+        # Written, so clean again
+        dirty, self._dirty = self._dirty, {}
+        for username, record in dirty.items():
+            self._keep(username, record)
+        self._new.clear()
+        self._deleted.clear()
+
+
+class SqliteStorage:
+    """Storage backend keeping voters, candidates and ballots in an SQLite database"""
+    name = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS admin (
+            username TEXT PRIMARY KEY,
+            password_hash TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS voters (
+            username TEXT PRIMARY KEY,
+            full_name TEXT NOT NULL,
+            is_candidate INTEGER NOT NULL DEFAULT 0,
+            desired_position TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_voters_candidate ON voters (is_candidate);
+        CREATE INDEX IF NOT EXISTS idx_voters_full_name ON voters (full_name);
+        CREATE TABLE IF NOT EXISTS campaign_texts (
+            username TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS candidates (
+            full_name TEXT PRIMARY KEY,
+            votes INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS ballots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            voter TEXT NOT NULL,
+            candidate TEXT NOT NULL,
+            role TEXT,
+            timestamp TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_ballots_voter_role ON ballots (voter, role);
+        CREATE TABLE IF NOT EXISTS seeds (
+            name TEXT PRIMARY KEY,
+            digest TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path="voting.db", migrate_from=None):
+        self.path = Path(path)
+        is_new = not self.path.exists()
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(self.SCHEMA)
+        self.campaign = SqliteCampaignStore(self.conn)
+        self.voters = None
+        
+        # Seed a fresh database from existing JSON files
+        if is_new and migrate_from is not None:
+            self.import_from(migrate_from)
+
+    def import_from(self, other):
+        """Copy everything from another storage backend"""
+        admin_data = other.load_admin()
+        if admin_data:
+            self.save_admin(admin_data)
+        
+        voters = self.load_voters()
+        for username, record in (other.load_voters() or {}).items():
+            # Bring the campaign texts along, they live in the other backend's store
+            if record.campaign is not None:
+                record.campaign = dict(record.campaign_texts())
+            voters[username] = record
+        voters.flush()
+        
+        candidates, history = other.load_votes()
+        self.save_votes(candidates, history)
+
+    def load_admin(self):
+        rows = self.conn.execute('SELECT username, password_hash FROM admin').fetchall()
+        return dict(rows) if rows else None
+
+    def save_admin(self, admin_data):
+        with self.conn:
+            self.conn.execute('DELETE FROM admin')
+            self.conn.executemany(
+                'INSERT INTO admin (username, password_hash) VALUES (?, ?)',
+                list(admin_data.items())
+            )
+
+    def load_voters(self):
+        if self.voters is None:
+            self.voters = SqliteVoterMap(self.conn, self.campaign)
+        return self.voters
+
+    def save_voters(self, voters):
+        voters.flush()
+
+    def read_voters(self):
+        """Yield (username, record) for every voter over a separate connection, safe on a worker thread"""
+        conn = sqlite3.connect(str(self.path))
+        try:
+            for username, data in conn.execute('SELECT username, data FROM voters ORDER BY rowid'):
+                yield username, VoterRecord.from_dict(json.loads(data))
+        finally:
+            conn.close()
+
+    def load_votes(self):
+        candidates = dict(self.conn.execute('SELECT full_name, votes FROM candidates ORDER BY rowid'))
+        history = [
+            Ballot(voter, candidate, role, parse_timestamp(timestamp))
+            for voter, candidate, role, timestamp in self.conn.execute(
+                'SELECT voter, candidate, role, timestamp FROM ballots ORDER BY id'
+            )
+        ]
+        return candidates, history
+
+    def save_votes(self, candidates, history):
+        with self.conn:
+            self._write_votes(candidates, history)
+
+    def _write_votes(self, candidates, history):
+        (stored,) = self.conn.execute('SELECT COUNT(*) FROM ballots').fetchone()
+        self.conn.execute('DELETE FROM candidates')
+        self.conn.executemany(
+            'INSERT INTO candidates (full_name, votes) VALUES (?, ?)',
+            list(candidates.items())
+        )
+        # Ballots are normally appended one by one; only rewrite when the history shrank
+        if len(history) < stored:
+            self.conn.execute('DELETE FROM ballots')
+            stored = 0
+        self.conn.executemany(
+            'INSERT INTO ballots (voter, candidate, role, timestamp) VALUES (?, ?, ?, ?)',
+            [(vote['voter'], vote['candidate'], vote.get('role'), vote['timestamp'])
+             for vote in history[stored:]]
+        )
+
+    def load_seeds(self):
+        return dict(self.conn.execute('SELECT name, digest FROM seeds'))
+
+    def save_seed(self, name, digest, voters=None, votes=None):
+        """Record an applied fixture and write its voters and votes in the same transaction"""
+        with self.conn:
+            if voters is not None:
+                voters.write_changes()
+            if votes is not None:
+                self._write_votes(*votes)
+            self.conn.execute(
+                'INSERT OR REPLACE INTO seeds (name, digest) VALUES (?, ?)', (name, digest)
+            )
+
+    def append_ballot(self, ballot, candidates, history):
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO ballots (voter, candidate, role, timestamp) VALUES (?, ?, ?, ?)',
+                (ballot['voter'], ballot['candidate'], ballot.get('role'), ballot['timestamp'])
+            )
+            self.conn.execute(
+                'INSERT INTO candidates (full_name, votes) VALUES (?, 1) '
+                'ON CONFLICT(full_name) DO UPDATE SET votes = votes + 1',
+                (ballot['candidate'],)
+            )
+
+    pending_sync = False
+    sync_interval = 1.0
+
+    def sync(self):
+        pass
+
+    def close(self):
+        self.conn.close()
+
+
+class SearchIndex:
+    """Substring search over normalized record text kept in one flat string
+
+    Each record's searchable fields are casefolded and stored as one line
+    of a single string, so a query is a few str.find() calls over
+    contiguous memory rather than a Python loop over every record. A
+    query that extends the previous one only re-checks the previous hits.
+    """
+    def __init__(self):
+        self._blob = ''
+        self._pending = []  # Lines added since the blob was last joined
+        self._starts = []  # Offset of each line in the blob
+        self._keys = []  # Key for each line, None once removed
+        self._line_of = {}  # key -> line number
+        self._length = 0
+        self._dead = 0
+        self._last_query = None
+        self._last_results = None
+
+    @staticmethod
+    def normalize(text):
+        return ' '.join(str(text).casefold().split())
+
+    def build(self, entries):
+        """Index an iterable of (key, fields) pairs from scratch"""
+        self.__init__()
+        for key, fields in entries:
+            self.add(key, *fields)
+
+    def add(self, key, *fields):
+        """Add or replace the searchable text for a key"""
+        if key in self._line_of:
+            self.remove(key)
+        # Fields are tab separated so a query can never match across two of them
+        line = '\t'.join(self.normalize(field) for field in fields if field) + '\n'
+        self._line_of[key] = len(self._keys)
+        self._keys.append(key)
+        self._starts.append(self._length)
+        self._pending.append(line)
+        self._length += len(line)
+        self._last_query = None
+
+    def remove(self, key):
+        line = self._line_of.pop(key, None)
+        if line is not None:
+            self._keys[line] = None
+            self._dead += 1
+            self._last_query = None
+
+    def __len__(self):
+        return len(self._line_of)
+
+    def _flush(self):
+        if self._pending:
+            self._blob += ''.join(self._pending)
+            self._pending = []
+        # Drop removed lines once they make up a quarter of the index
+        if self._dead and self._dead * 4 > len(self._keys):
+            live = [(key, self._line(line)) for line, key in enumerate(self._keys) if key is not None]
+            self.__init__()
+            for key, text in live:
+                self._line_of[key] = len(self._keys)
+                self._keys.append(key)
+                self._starts.append(self._length)
+                self._pending.append(text)
+                self._length += len(text)
+            self._blob = ''.join(self._pending)
+            self._pending = []
+
+    def _line(self, line):
+        end = self._starts[line + 1] if line + 1 < len(self._starts) else self._length
+        return self._blob[self._starts[line]:end]
+
+    def search(self, query):
+        """Return matching keys in the order they were added"""
+        self._flush()
+        query = self.normalize(query)
+        if not query:
+            return [key for key in self._keys if key is not None]
+        
+        if self._last_query is not None and self._last_query in query:
+            # Extending the previous query can only narrow its results
+            results = [key for key in self._last_results if query in self._line(self._line_of[key])]
+        else:
+            results = []
+            blob, starts = self._blob, self._starts
+            index = blob.find(query)
+            while index != -1:
+                line = bisect.bisect_right(starts, index) - 1
+                key = self._keys[line]
+                if key is not None:
+                    results.append(key)
+                # Continue from the next line so each record is reported once
+                if line + 1 >= len(starts):
+                    break
+                index = blob.find(query, starts[line + 1])
+        
+        self._last_query = query
+        self._last_results = results
+        return results
+
+
+class VirtualTreeview:
+    """Treeview that only materializes the rows currently in view
+
+    The full list lives in self.keys; row_values(key) builds the column
+    values for one key on demand. A fixed pool of Treeview items (the
+    visible rows plus a small overscan) is reused while scrolling, so
+    Tk only ever holds a screenful of rows however long the list is.
+    """
+    def __init__(self, parent, columns, row_values, overscan=10, **tree_options):
+        self.row_values = row_values
+        self.overscan = overscan
+        self.keys = []
+        self._positions = None  # key -> index in self.keys, built by _move_selection() when needed
+        self.offset = 0
+        self.visible = 20
+        self.selected_key = None
+        self._rendered = {}  # iid -> (key, values)
+        self._blank = ('',) * len(columns)
+        
+        self.tree = ttk.Treeview(parent, columns=columns, show='headings', **tree_options)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+        
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<<TreeviewSelect>>', self._on_select, add='+')
+        self.tree.bind('<MouseWheel>', lambda e: self._scroll_units(-1 if e.delta > 0 else 1))
+        self.tree.bind('<Button-4>', lambda e: self._scroll_units(-1))
+        self.tree.bind('<Button-5>', lambda e: self._scroll_units(1))
+        self.tree.bind('<Up>', lambda e: self._move_selection(-1))
+        self.tree.bind('<Down>', lambda e: self._move_selection(1))
+        self.tree.bind('<Prior>', lambda e: self._move_selection(-self.visible))
+        self.tree.bind('<Next>', lambda e: self._move_selection(self.visible))
+
+    def set_keys(self, keys):
+        """Replace the underlying row list and redraw the current window"""
+        self.keys = keys if isinstance(keys, list) else list(keys)
+        self._positions = None
+        self.offset = max(0, min(self.offset, len(self.keys) - self.visible))
+        self.refresh()
+
+    def key_for(self, iid):
+        rendered = self._rendered.get(iid)
+        return rendered[0] if rendered else None
+
+    def refresh(self):
+        """Re-render the visible window, touching only rows whose values changed"""
+        window = self.keys[self.offset:self.offset + self.visible + self.overscan]
+        pool = self.tree.get_children()
+        
+        # Grow or shrink the item pool to the window size
+        for i in range(len(pool), len(window)):
+            self.tree.insert('', 'end', iid=f"row{i}", values=self._blank)
+        for iid in pool[len(window):]:
+            self.tree.delete(iid)
+            self._rendered.pop(iid, None)
+        
+        selected_iid = None
+        for i, key in enumerate(window):
+            iid = f"row{i}"
+            try:
+                values = self.row_values(key)
+            except KeyError:
+                values = self._blank  # Row vanished since the key list was built
+            if self._rendered.get(iid) != (key, values):
+                self.tree.item(iid, values=values)
+                self._rendered[iid] = (key, values)
+            if key == self.selected_key:
+                selected_iid = iid
+        
+        if selected_iid is not None:
+            if self.tree.selection() != (selected_iid,):
+                self.tree.selection_set(selected_iid)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        
+        self.tree.yview_moveto(0)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.keys)
+        if total <= self.visible:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible) / total)
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), len(self.keys) - self.visible))
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', n, 'units'|'pages')"""
+        if args[0] == 'moveto':
+            self.scroll_to(float(args[1]) * len(self.keys))
+        elif args[0] == 'scroll':
+            step = self.visible if args[2] == 'pages' else 1
+            self.scroll_to(self.offset + int(args[1]) * step)
+
+    def _scroll_units(self, units):
+        self.scroll_to(self.offset + units * 3)
+        return 'break'
+
+    def _move_selection(self, delta):
+        if not self.keys:
+            return 'break'
+        if self._positions is None:
+            # Built once per key list, not a scan of the whole list on every keypress
+            self._positions = {key: index for index, key in enumerate(self.keys)}
+        index = self._positions.get(self.selected_key)
+        index = self.offset if index is None else index + delta
+        index = max(0, min(index, len(self.keys) - 1))
+        self.selected_key = self.keys[index]
+        
+        # Keep the newly selected row inside the visible window
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible:
+            self.offset = index - self.visible + 1
+        self.refresh()
+        return 'break'
+
+    def _on_select(self, event=None):
+        selection = self.tree.selection()
+        if selection and selection[0] in self._rendered:
+            self.selected_key = self._rendered[selection[0]][0]
+
+    def _on_resize(self, event):
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        heading_height = 25
+        visible = max(1, (event.height - heading_height) // row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.offset = max(0, min(self.offset, len(self.keys) - self.visible))
+            self.refresh()
+
+
+class CandidateCardPool:
+    """Keeps one card per candidate alive on the ballot screen and updates it in place
+
+    Cards are created in batches as the list is scrolled towards the end;
+    refresh() only reconfigures the labels and buttons whose text or
+    state actually changed.
+    """
+    def __init__(self, app, frame, is_admin, batch_size=20):
+        self.app = app
+        self.frame = frame
+        self.is_admin = is_admin
+        self.batch_size = batch_size
+        self.limit = batch_size  # Number of cards allowed to exist so far
+        self.cards = {}  # candidate name -> {'widgets': {...}, 'state': {...}}
+        self.empty_label = None
+        self._names = []
+        self._refresh_pending = False
+
+    def load_more(self):
+        """Allow another batch of cards, deferred so it is safe to call from scroll callbacks"""
+        if self.limit >= len(self._names) or self._refresh_pending:
+            return
+        self.limit += self.batch_size
+        self._refresh_pending = True
+        self.frame.after_idle(self.refresh)
+
+    def refresh(self, names=None):
+        """Sync cards with the candidate list; with names, only update those cards"""
+        self._refresh_pending = False
+        if not self.frame.winfo_exists():
+            return
+        if names is not None:
+            for name in names:
+                if name in self.cards:
+                    self._update_card(name)
+            return
+        
+        self._names = [name for name in self.app.candidates if name in self.app.candidate_index]
+        
+        if not self._names:
+            for name in list(self.cards):
+                self.cards.pop(name)['widgets']['card'].destroy()
+            if self.empty_label is None:
+                # Show message if no candidates
+                self.empty_label = tk.Label(
+                    self.frame,
+                    text="No candidates available at this time",
+                    font=('Arial', 12, 'italic'),
+                    bg=self.app.style['bg'],
+                    fg='#888888'
+                )
+                self.empty_label.pack(pady=20)
+            return
+        if self.empty_label is not None:
+            self.empty_label.destroy()
+            self.empty_label = None
+        
+        wanted = set(self._names[:self.limit])
+        for name in list(self.cards):
+            if name not in wanted:
+                self.cards.pop(name)['widgets']['card'].destroy()
+        for name in self._names[:self.limit]:
+            if name not in self.cards:
+                self._create_card(name)
+            self._update_card(name)
+
+    def _create_card(self, name):
+        app = self.app
+        # Card frame with border effect
+        card = tk.Frame(
+            self.frame,
+            bg='#1A1A1A',
+            padx=20,
+            pady=15,
+            relief=tk.GROOVE,
+            bd=1
+        )
+        card.pack(fill='x', padx=10, pady=5)
+        
+        # Left side: Candidate info
+        info_frame = tk.Frame(card, bg='#1A1A1A')
+        info_frame.pack(side=tk.LEFT, fill='both', expand=True)
+        
+        # Candidate name
+        name_label = tk.Label(
+            info_frame,
+            font=('Arial', 14, 'bold'),
+            bg='#1A1A1A',
+            fg='#00BFFF'
+        )
+        name_label.pack(anchor='w')
+        
+        # Party and Position
+        party_label = tk.Label(
+            info_frame,
+            font=('Arial', 10),
+            bg='#1A1A1A',
+            fg='#888888'
+        )
+        party_label.pack(anchor='w')
+        
+        # View Details button, looks the record up when clicked so it never goes stale
+        details_btn = tk.Button(
+            info_frame,
+            text="View Details",
+            command=lambda: app.show_candidate_details_popup(app.find_candidate(name)[1]),
+            font=('Arial', 10),
+            bg='#2C2C2C',
+            fg='white',
+            relief=tk.FLAT,
+            padx=10,
+            pady=2,
+            cursor='hand2'
+        )
+        details_btn.pack(anchor='w', pady=5)
+        
+        # Add hover effect for details button
+        details_btn.bind('<Enter>', lambda e: e.widget.configure(bg='#404040'))
+        details_btn.bind('<Leave>', lambda e: e.widget.configure(bg='#2C2C2C'))
+        
+        widgets = {'card': card, 'name': name_label, 'party': party_label}
+        
+        # Right side: Vote button or vote count
+        if self.is_admin:
+            widgets['votes'] = tk.Label(
+                card,
+                font=app.style['font'],
+                bg='#1A1A1A',
+                fg='#00BFFF'
+            )
+            widgets['votes'].pack(side=tk.RIGHT, padx=10)
+        else:
+            vote_btn = tk.Button(
+                card,
+                text="🗳️ Vote",
+                command=lambda: app.vote(name),
+                font=app.style['font'],
+                bg='#00BFFF',
+                fg='white',
+                relief=tk.FLAT,
+                padx=20,
+                pady=5,
+                cursor='hand2'
+            )
+            vote_btn.pack(side=tk.RIGHT, padx=10)
+            
+            # Add hover effect
+            vote_btn.bind('<Enter>', lambda e: e.widget.configure(bg='#33CCFF'))
+            vote_btn.bind('<Leave>', lambda e: e.widget.configure(bg='#00BFFF'))
+            widgets['vote'] = vote_btn
+        
+        self.cards[name] = {'widgets': widgets, 'state': {}}
+
+    def _update_card(self, name):
+        app = self.app
+        _, data = app.find_candidate(name)
+        if data is None:
+            return
+        card = self.cards[name]
+        position = data.get('desired_position', 'Not specified')
+        state = {
+            'name': {'text': name},
+            'party': {'text': f"Party: {data.get('party', 'Independent')} | Running for: {position}"}
+        }
+        if self.is_admin:
+            state['votes'] = {'text': f"Votes: {app.candidates.get(name, 0)}"}
+        else:
+            # One vote per role: lock the buttons for roles this voter has already used
+            voted_for = app.ballot_index.get(app.current_user, position)
+            if voted_for is None:
+                state['vote'] = {'text': "🗳️ Vote", 'state': tk.NORMAL}
+            elif voted_for == name:
+                state['vote'] = {'text': "✓ Voted", 'state': tk.DISABLED}
+            else:
+                state['vote'] = {'text': "🗳️ Vote", 'state': tk.DISABLED}
+        
+        for key, options in state.items():
+            if card['state'].get(key) != options:
+                card['widgets'][key].configure(**options)
+                card['state'][key] = options
+
+
+class TaskCancelled(Exception):
+    """Raised inside a background task once it has been cancelled"""
+
+
+class BackgroundTask:
+    """Handle for work submitted to a TaskExecutor"""
+    def __init__(self, executor, on_done=None, on_error=None, on_progress=None):
+        self.executor = executor
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.future = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Ask the task to stop; it notices on its next check() or progress()"""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def check(self):
+        """Called from the worker, raises TaskCancelled if the task was cancelled"""
+        if self._cancelled.is_set():
+            raise TaskCancelled()
+
+    def progress(self, *args):
+        """Called from the worker, forwards args to on_progress on the main loop"""
+        self.check()
+        if self.on_progress is not None:
+            self.executor.call_soon(self, self.on_progress, *args)
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+
+class TaskExecutor:
+    """Runs slow work on a thread pool and delivers the results on the Tk main loop
+
+    Workers never touch widgets: results, errors and progress updates are
+    queued and handed to the callbacks from a root.after() poll, which only
+    runs while tasks are outstanding.
+    """
+    def __init__(self, root, max_workers=2, poll_interval=50):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="voting-worker")
+        self._results = queue.SimpleQueue()
+        self._tasks = set()
+        self._poll_job = None
+
+    def submit(self, fn, *args, on_done=None, on_error=None, on_progress=None, **kwargs):
+        """Run fn(task, *args, **kwargs) in the background and return its BackgroundTask"""
+        task = BackgroundTask(self, on_done, on_error, on_progress)
+        self._tasks.add(task)
+        task.future = self._pool.submit(self._run, task, fn, args, kwargs)
+        # Marks the task as finished, also when it is cancelled before a worker picks it up
+        task.future.add_done_callback(lambda future: self._results.put((task, None, None)))
+        self._schedule_poll()
+        return task
+
+    def call_soon(self, task, callback, *args):
+        """Queue callback(*args) to run on the main loop (safe from any thread)"""
+        self._results.put((task, callback, args))
+
+    def _run(self, task, fn, args, kwargs):
+        try:
+            task.check()
+            result = fn(task, *args, **kwargs)
+        except TaskCancelled:
+            pass
+        except Exception as e:
+            self.call_soon(task, task.on_error or self._report_error, e)
+        else:
+            self.call_soon(task, task.on_done, result)
+
+    def _report_error(self, error):
+        print(f"Error in background task: {error}")
+
+    def _schedule_poll(self):
+        if self._poll_job is None:
+            self._poll_job = self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        while True:
+            try:
+                task, callback, args = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if args is None:
+                self._tasks.discard(task)
+            elif callback is not None and not task.cancelled:
+                try:
+                    callback(*args)
+                except Exception as e:
+                    print(f"Error in background task callback: {e}")
+        if self._tasks:
+            self._schedule_poll()
+
+    def shutdown(self):
+        """Cancel outstanding work and stop the workers without waiting for them"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class FrameScheduler:
+    """Runs every canvas animation from a single root.after() tick
+
+    An animation is step(dt), called once per frame with the seconds since
+    the previous one; it is dropped when it returns False or its widget is
+    destroyed (e.g. the screen changed). The tick only runs while there is
+    something to animate and stops while the main window is minimized.
+    """
+    def __init__(self, root, fps=20):
+        self.root = root
+        self.interval = round(1000 / fps) if fps > 0 else None  # None turns animation off
+        self._animations = {}  # key -> (widget, step)
+        self._job = None
+        self._last = None
+        self._paused = False
+        root.bind('<Map>', self._on_map, add='+')
+        root.bind('<Unmap>', self._on_unmap, add='+')
+
+    @property
+    def enabled(self):
+        return self.interval is not None
+
+    def add(self, key, widget, step):
+        """Animate step(dt) while widget exists, replacing any animation under the same key"""
+        if not self.enabled:
+            return
+        self._animations[key] = (widget, step)
+        self._schedule()
+
+    def remove(self, key):
+        self._animations.pop(key, None)
+
+    def on_resize(self, widget, callback, delay=150):
+        """Call callback(width, height) once widget's size settles rather than on every <Configure>"""
+        pending = [None, None]  # after() job, last size handed to callback
+        
+        def settle(width, height):
+            pending[0] = None
+            if widget.winfo_exists() and (width, height) != pending[1]:
+                pending[1] = (width, height)
+                callback(width, height)
+        
+        def configure(event):
+            if pending[0] is not None:
+                self.root.after_cancel(pending[0])
+            pending[0] = self.root.after(delay, settle, event.width, event.height)
+        
+        widget.bind('<Configure>', configure)
+
+    def _schedule(self):
+        if self._job is None and self._animations and not self._paused:
+            self._job = self.root.after(self.interval, self._tick)
+
+    def _tick(self):
+        self._job = None
+        now = time.perf_counter()
+        dt = now - self._last if self._last is not None else self.interval / 1000
+        self._last = now
+        for key, (widget, step) in list(self._animations.items()):
+            try:
+                if not widget.winfo_exists() or step(dt) is False:
+                    self._animations.pop(key, None)
+            except tk.TclError:
+                self._animations.pop(key, None)  # Destroyed during the frame
+        if not self._animations:
+            self._last = None
+        self._schedule()
+
+    def _on_unmap(self, event):
+        # The binding also sees every child widget, only the main window counts
+        if event.widget is self.root:
+            self._paused = True
+            if self._job is not None:
+                self.root.after_cancel(self._job)
+                self._job = None
+
+    def _on_map(self, event):
+        if event.widget is self.root and self._paused:
+            self._paused = False
+            self._last = None  # Don't jump ahead by the time spent minimized
+            self._schedule()
+
+
+class ThumbnailCache:
+    """Profile photo thumbnails, kept as PhotoImages in memory and as PNGs on disk
+
+    Entries are keyed by source path and modification time, so replacing a
+    photo on disk is simply a miss for the new version.
+    """
+    def __init__(self, directory="thumbnails", size=(150, 150), capacity=64):
+        self.directory = Path(directory)
+        self.size = size
+        self.capacity = capacity
+        self._photos = OrderedDict()  # (path, mtime_ns) -> PhotoImage, least recent first
+
+    def _key(self, path):
+        path = os.path.abspath(path)
+        return path, os.stat(path).st_mtime_ns
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(f"{key[0]}:{key[1]}:{self.size[0]}x{self.size[1]}".encode()).hexdigest()
+        return self.directory / f"{digest}.png"
+
+    def fit(self, image):
+        """Resize an image to fit inside the thumbnail size, keeping the aspect ratio"""
+        width, height = image.size
+        ratio = min(self.size[0]/width, self.size[1]/height)
+        new_size = (max(1, int(width * ratio)), max(1, int(height * ratio)))
+        Image, _ = load_pil()
+        return image.resize(new_size, Image.Resampling.LANCZOS)
+
+    def decode(self, path):
+        """Open an image file and return it fitted to the thumbnail size"""
+        Image, _ = load_pil()
+        with Image.open(path) as source:
+            return self.fit(source)
+
+    def image(self, path):
+        """Return the thumbnail as a PIL image, decoding the source only on a disk miss"""
+        key = self._key(path)
+        cached = self._disk_path(key)
+        if cached.exists():
+            Image, _ = load_pil()
+            try:
+                with Image.open(cached) as image:
+                    image.load()
+                    return image.copy()
+            except OSError:
+                pass  # Corrupt cache file, rebuild it below
+        image = self.decode(path)
+        self._write(cached, image)
+        return image
+
+    def cached(self, path):
+        """Return the in-memory PhotoImage for path, or None on a miss"""
+        key = self._key(path)
+        photo = self._photos.get(key)
+        if photo is not None:
+            self._photos.move_to_end(key)
+        return photo
+
+    def photo(self, path):
+        """Return a PhotoImage thumbnail for path, raising OSError if it can't be read"""
+        photo = self.cached(path)
+        if photo is None:
+            photo = self.add(path, self.image(path))
+        return photo
+
+    def prime(self, path, image):
+        """Write the disk thumbnail for an already decoded image, safe to call from a worker"""
+        if image.width > self.size[0] or image.height > self.size[1]:
+            image = self.fit(image)
+        self._write(self._disk_path(self._key(path)), image)
+        return image
+
+    def add(self, path, image):
+        """Wrap a thumbnail image in a PhotoImage and keep it in memory (main thread only)"""
+        _, ImageTk = load_pil()
+        return self._remember(self._key(path), ImageTk.PhotoImage(image))
+
+    def store(self, path, image):
+        """Prime both caches with an already decoded image, e.g. right after an upload"""
+        return self.add(path, self.prime(path, image))
+
+    def discard(self, path):
+        """Forget every cached version of path"""
+        path = os.path.abspath(path)
+        for key in [key for key in self._photos if key[0] == path]:
+            del self._photos[key]
+
+    def _remember(self, key, photo):
+        # Drop older versions of the same file before adding the new one
+        self.discard(key[0])
+        self._photos[key] = photo
+        while len(self._photos) > self.capacity:
+            self._photos.popitem(last=False)
+        return photo
+
+    def _write(self, target, image):
         try:
-            subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'darkdetect'])
-            return True
-        except subprocess.CalledProcessError:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            atomic_write(target, lambda f: image.save(f, format='PNG'), binary=True)
+        except OSError:
+            pass  # The disk cache is only an optimisation
+
+
+class BackgroundCache:
+    """The login screen's hexagon pattern, rendered once per size bucket
+
+    Window sizes are rounded up to a multiple of `bucket` so a resize
+    usually reuses an existing image. Images are kept as PhotoImages in
+    memory and as PNGs on disk, and shown as a single canvas image item
+    instead of one polygon per hexagon.
+    """
+    HEX_SIZE = 40  # Corner radius; CORNERS repeats it since class-level comprehensions can't see class names
+    FILL = '#E8F5E9'  # Very light green
+    OUTLINE = '#C8E6C9'  # Light green
+    MIN_SIZE = (800, 600)
+    # Corner offsets of a flat-topped hexagon, computed once instead of per cell
+    CORNERS = [
+        (40 * math.cos(math.radians(angle)), 40 * math.sin(math.radians(angle)))
+        for angle in range(0, 360, 60)
+    ]
+
+    def __init__(self, background, directory="backgrounds", bucket=256, capacity=4):
+        self.background = background  # Canvas colour showing between the hexagons
+        self.directory = Path(directory)
+        self.bucket = bucket
+        self.capacity = capacity
+        self.available = True  # False once Pillow turned out to be missing
+        self._photos = OrderedDict()  # (width, height) -> PhotoImage, least recent first
+
+    def size_for(self, width, height):
+        """The bucket size covering a width x height canvas"""
+        width = max(width, self.MIN_SIZE[0])
+        height = max(height, self.MIN_SIZE[1])
+        return -(-width // self.bucket) * self.bucket, -(-height // self.bucket) * self.bucket
+
+    def centers(self, width, height):
+        """Hexagon centres covering the area, the same grid for every size"""
+        step = self.HEX_SIZE * 2
+        for x in range(-50, width + 50, step):
+            for y in range(-50, height + 50, step):
+                yield x, y
+
+    def outline(self, x, y):
+        return [coordinate for dx, dy in self.CORNERS for coordinate in (x + dx, y + dy)]
+
+    def _disk_path(self, size):
+        return self.directory / f"hexagons_{size[0]}x{size[1]}_{self.background.lstrip('#')}.png"
+
+    def render(self, size):
+        """Return the pattern as a PIL image, drawing it only on a disk miss (safe on a worker)"""
+        Image, _ = load_pil()
+        from PIL import ImageDraw
+        cached = self._disk_path(size)
+        if cached.exists():
+            try:
+                with Image.open(cached) as image:
+                    image.load()
+                    return image.copy()
+            except OSError:
+                pass  # Corrupt cache file, draw it again
+        image = Image.new('RGB', size, self.background)
+        draw = ImageDraw.Draw(image)
+        for x, y in self.centers(*size):
+            draw.polygon(self.outline(x, y), fill=self.FILL, outline=self.OUTLINE)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            atomic_write(cached, lambda f: image.save(f, format='PNG'), binary=True)
+        except OSError:
+            pass  # The disk cache is only an optimisation
+        return image
+
+    def cached(self, size):
+        """Return the in-memory PhotoImage for a bucket size, or None on a miss"""
+        photo = self._photos.get(size)
+        if photo is not None:
+            self._photos.move_to_end(size)
+        return photo
+
+    def add(self, size, image):
+        """Wrap a rendered image in a PhotoImage and keep it in memory (main thread only)"""
+        _, ImageTk = load_pil()
+        photo = self._photos[size] = ImageTk.PhotoImage(image)
+        while len(self._photos) > self.capacity:
+            self._photos.popitem(last=False)
+        return photo
+
+
+# Ballots per history slice when exporting, about one PDF page worth
+EXPORT_CHUNK_ROWS = 30
+
+
+PASSWORD_HASH = re.compile(r'[0-9a-f]{64}')  # A legacy unsalted sha256 hex digest, still accepted at login
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
+def hash_fixture_password(password, credentials):
+    """Hash a plain-text password from a fixture or import file with credentials.bulk_hash()
+
+    Only hashes in CredentialManager's own format pass through. Anything
+    else, a bare hex digest included, is the password itself, so nobody
+    gets an account from a digest without knowing its password.
+    """
+    password = str(password)
+    if CredentialManager.is_hash(password):
+        return password
+    return credentials.bulk_hash(password)
+
+
+def read_fixture(path):
+    """Yield voter/candidate dicts from a .csv, .jsonl or .json fixture file
+
+    CSV columns use dotted names for nested fields (address.city) and
+    is_candidate accepts 1/0, true/false or yes/no. A .json file is either
+    a list of records or a {username: record} object.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix not in ('.csv', '.jsonl', '.json'):
+        raise ValueError(f"Unsupported fixture format: {path.suffix}")
+    with open(path, 'r', encoding='utf-8', newline='' if suffix == '.csv' else None) as f:
+        if suffix == '.csv':
+            for row in csv.DictReader(f):
+                record = {}
+                for key, value in row.items():
+                    if key is None or value in (None, ''):
+                        continue
+                    *parents, leaf = key.split('.')
+                    target = record
+                    for parent in parents:
+                        target = target.setdefault(parent, {})
+                    target[leaf] = value
+                if 'is_candidate' in record:
+                    record['is_candidate'] = record['is_candidate'].strip().lower() in ('1', 'true', 'yes')
+                yield record
+        elif suffix == '.jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            data = json.load(f)
+            if isinstance(data, dict):
+                for username, record in data.items():
+                    yield {'username': username, **record}
+            else:
+                yield from data
+
+
+class CredentialManager:
+    """Salted password hashes tuned to a target cost, plus a per-username login throttle
+
+    New hashes look like "scrypt$n$r$p$salt$key" (or "pbkdf2_sha256$
+    iterations$salt$key" where hashlib has no scrypt), with the cost
+    calibrated on first use so one check takes about `target` seconds.
+    Bare sha256 hex digests from older data still verify, and
+    needs_rehash() says when to replace one after a good login.
+    """
+    SCRYPT_R = 8
+    SCRYPT_P = 1
+    MIN_SCRYPT_N = 1 << 14
+    MAX_SCRYPT_N = 1 << 20
+    MIN_PBKDF2_ITERATIONS = 100_000
+    # Cost for bulk_hash(), a few milliseconds: still salted, and upgraded at the first login
+    BULK_SCRYPT_N = 1 << 10
+    BULK_PBKDF2_ITERATIONS = 10_000
+    MAX_BUCKETS = 10_000  # Idle throttle buckets are dropped past this many
+
+    def __init__(self, target=0.1, attempts=5, refill=10.0):
+        self.target = target
+        self.attempts = attempts  # Login attempts allowed in a burst, per username
+        self.refill = refill  # Seconds to earn back one attempt
+        self.algorithm = 'scrypt' if hasattr(hashlib, 'scrypt') else 'pbkdf2_sha256'
+        self._cost = None  # scrypt n or PBKDF2 iterations, see cost()
+        self._calibrate_lock = threading.Lock()
+        self._bucket_lock = threading.Lock()
+        self._buckets = {}  # username -> (tokens, time of last update)
+
+    @staticmethod
+    def is_hash(text):
+        return isinstance(text, str) and text.startswith(('scrypt$', 'pbkdf2_sha256$'))
+
+    def cost(self):
+        """The calibrated cost, measured once on first use (workers may call this too)"""
+        with self._calibrate_lock:
+            if self._cost is None:
+                self._cost = self._calibrate()
+            return self._cost
+
+    def _calibrate(self):
+        password, salt = b'calibration', b'0' * 16
+        if self.algorithm == 'scrypt':
+            # Double n while the next step would still fit in the target
+            n = self.MIN_SCRYPT_N
+            while n < self.MAX_SCRYPT_N:
+                started = time.perf_counter()
+                self._scrypt(password, salt, n, self.SCRYPT_R, self.SCRYPT_P)
+                if (time.perf_counter() - started) * 2 > self.target:
+                    break
+                n *= 2
+            return n
+        started = time.perf_counter()
+        hashlib.pbkdf2_hmac('sha256', password, salt, self.MIN_PBKDF2_ITERATIONS)
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        return max(self.MIN_PBKDF2_ITERATIONS, int(self.MIN_PBKDF2_ITERATIONS * self.target / elapsed))
+
+    @staticmethod
+    def _scrypt(password, salt, n, r, p):
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, maxmem=256 * r * n, dklen=32)
+
+    def hash(self, password, cost=None):
+        """A new salted hash of password at the calibrated cost (or the given one)"""
+        cost = cost or self.cost()
+        salt = os.urandom(16)
+        if self.algorithm == 'scrypt':
+            key = self._scrypt(password.encode('utf-8'), salt, cost, self.SCRYPT_R, self.SCRYPT_P)
+            return f"scrypt${cost}${self.SCRYPT_R}${self.SCRYPT_P}${salt.hex()}${key.hex()}"
+        key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, cost)
+        return f"pbkdf2_sha256${cost}${salt.hex()}${key.hex()}"
+
+    def bulk_hash(self, password):
+        """A salted hash at the cheap bulk cost, for imports and fixtures where the full cost would take hours
+
+        needs_rehash() is true for these, so each is replaced with a full
+        cost hash the first time its owner logs in.
+        """
+        return self.hash(password, self.BULK_SCRYPT_N if self.algorithm == 'scrypt' else self.BULK_PBKDF2_ITERATIONS)
+
+    def verify(self, password, stored):
+        """Whether password matches the stored hash, in constant time
+
+        A missing hash (unknown username) costs as much as a real check so
+        the timing doesn't tell which usernames exist.
+        """
+        if not stored:
+            self.hash(password)
             return False
+        parts = stored.split('$')
+        try:
+            if parts[0] == 'scrypt' and len(parts) == 6:
+                n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+                key = self._scrypt(password.encode('utf-8'), bytes.fromhex(parts[4]), n, r, p)
+                return hmac.compare_digest(key, bytes.fromhex(parts[5]))
+            if parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+                key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), bytes.fromhex(parts[2]), int(parts[1]))
+                return hmac.compare_digest(key, bytes.fromhex(parts[3]))
+            if PASSWORD_HASH.fullmatch(stored):
+                # Legacy unsalted hash
+                return hmac.compare_digest(hashlib.sha256(password.encode('utf-8')).hexdigest(), stored)
+        except (ValueError, MemoryError):
+            pass  # Corrupt or absurd parameters
+        return False
+
+    def needs_rehash(self, stored):
+        """Whether stored is a legacy hash, another algorithm or well under today's cost"""
+        parts = stored.split('$')
+        if parts[0] != self.algorithm:
+            return True
+        try:
+            return int(parts[1]) * 2 <= self.cost()
+        except ValueError:
+            return True
+
+    def throttle(self, username):
+        """Take one login attempt from username's token bucket; returns 0 if allowed, else seconds to wait"""
+        now = time.monotonic()
+        with self._bucket_lock:
+            tokens, last = self._buckets.get(username, (self.attempts, now))
+            tokens = min(self.attempts, tokens + (now - last) / self.refill)
+            if tokens < 1:
+                self._buckets[username] = (tokens, now)
+                return (1 - tokens) * self.refill
+            self._buckets[username] = (tokens - 1, now)
+            if len(self._buckets) > self.MAX_BUCKETS:
+                # Forget buckets that have refilled completely
+                self._buckets = {
+                    name: (left, when) for name, (left, when) in self._buckets.items()
+                    if left + (now - when) / self.refill < self.attempts
+                }
+            return 0
+
+    def reset(self, username):
+        """Refill username's bucket after a successful login"""
+        with self._bucket_lock:
+            self._buckets.pop(username, None)
+
+
+# Voter roll columns for import/export, address parts use dotted names like read_fixture()
+VOTER_ROLL_COLUMNS = (
+    'username', 'password', 'full_name', 'date_of_birth', 'gender', 'national_id', 'phone', 'email',
+    'address.street', 'address.city', 'address.state', 'address.postal_code', 'address.country',
+    'occupation', 'registration_date'
+)
+
+
+# Credentials never leave the system, so an export is one-way: import rejects its rows until passwords are added
+VOTER_ROLL_EXPORT_COLUMNS = tuple(column for column in VOTER_ROLL_COLUMNS if column != 'password')
+
+
+# Fields a registration must fill in, address parts use dotted names
+VOTER_REQUIRED = (
+    'password', 'full_name', 'date_of_birth', 'gender', 'national_id', 'phone', 'email',
+    'address.street', 'address.city', 'address.state', 'address.postal_code', 'address.country',
+    'occupation'
+)
+CANDIDATE_REQUIRED = (
+    'password', 'full_name', 'date_of_birth', 'gender', 'national_id', 'phone', 'email',
+    'address.street', 'address.city', 'address.state', 'address.postal_code', 'address.country',
+    'party', 'current_position', 'desired_position', 'term_length', 'education', 'experience',
+    'platform', 'promises', 'political_experience', 'vision'
+)
+
+
+class IdentityIndex:
+    """Finds who already holds an identity value: username, national ID or email
+
+    Usernames go through lookup functions (the voter roll and admin
+    accounts are keyed by username already). National IDs and emails are
+    kept in hash maps of normalized value -> username, built at load and
+    updated with add()/remove() whenever a record is registered, edited or
+    deleted. snapshot() copies everything for use on a worker thread.
+    """
+    INDEXED = ('national_id', 'email')
+    ID_SEPARATORS = re.compile(r'[\s\-./]')
+
+    def __init__(self, lookups, sources=None):
+        self.lookups = lookups  # field -> function(value) -> username or None
+        self.sources = sources or {}  # field -> function() yielding (value, username), for snapshot()
+        self.values = {field: {} for field in self.INDEXED}  # field -> {normalized value: username}
+
+    @classmethod
+    def key(cls, field, value):
+        """The normalized form duplicates are detected on"""
+        if field == 'email':
+            return str(value).strip().casefold()
+        if field == 'national_id':
+            return cls.ID_SEPARATORS.sub('', str(value)).upper()
+        return value
+
+    def rebuild(self, rows):
+        """Index (username, national_id, email) rows from scratch"""
+        national_ids, emails = self.values['national_id'], self.values['email']
+        national_ids.clear()
+        emails.clear()
+        for username, national_id, email in rows:
+            # The first account keeps a value that was already registered twice
+            if national_id:
+                national_ids.setdefault(self.key('national_id', national_id), username)
+            if email:
+                emails.setdefault(self.key('email', email), username)
+
+    def add(self, username, record):
+        for field in self.INDEXED:
+            value = record.get(field)
+            if value:
+                self.values[field].setdefault(self.key(field, value), username)
+
+    def remove(self, username, record):
+        """Drop username's values, call before a record is edited or deleted"""
+        for field in self.INDEXED:
+            value = record.get(field)
+            if value:
+                key = self.key(field, value)
+                if self.values[field].get(key) == username:
+                    del self.values[field][key]
+
+    def owner(self, field, value):
+        if field in self.values:
+            return self.values[field].get(self.key(field, value))
+        lookup = self.lookups.get(field)
+        return lookup(value) if lookup is not None else None
+
+    def clash(self, username, record, fields, editing=False):
+        """The first of fields whose value another account already holds, or None
+
+        When editing, username's own values don't count and the username
+        itself isn't checked.
+        """
+        for field in fields:
+            if field == 'username':
+                if editing:
+                    continue
+                value = username
+            else:
+                value = record.get(field)
+                if not value:
+                    continue
+            owner = self.owner(field, value)
+            if owner is not None and (not editing or owner != username):
+                return field
+        return None
+
+    def snapshot(self):
+        """A frozen copy backed by plain dicts, safe to read from any thread"""
+        frozen = IdentityIndex({
+            field: dict(source()).get for field, source in self.sources.items()
+        })
+        frozen.values = {field: dict(values) for field, values in self.values.items()}
+        return frozen
+
+
+class RegistrationValidator:
+    """Registration rules compiled once and shared by the forms, edit screens and bulk import
+
+    Records are checked in their stored layout (full_name, address.city
+    and so on) with the password still in plain text. check() returns the
+    first problem with one record, check_many() runs a whole batch and
+    also rejects records that clash with an earlier one in it.
+    """
+    DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+    LABELS = {'national_id': 'National ID', 'date_of_birth': 'Date of birth', 'address.street': 'Address'}
+    UNIQUE_MESSAGES = {
+        'username': "Username already exists",
+        'national_id': "This National ID is already registered",
+        'email': "This email address is already registered"
+    }
+
+    def __init__(self, required=(), min_age=None, role=None, identity=None, unique=('username', 'national_id', 'email')):
+        self.required = tuple((field, field.split('.')) for field in required)
+        self.min_age = min_age
+        self.age_message = f"Must be {min_age} or older to register" + (f" as {role}" if role else "")
+        self.identity = identity
+        self.unique = unique
+
+    def using(self, identity):
+        """The same rules checked against another IdentityIndex"""
+        validator = copy.copy(self)
+        validator.identity = identity
+        return validator
+
+    @classmethod
+    def label(cls, field):
+        return cls.LABELS.get(field) or field.split('.')[-1].replace('_', ' ').capitalize()
+
+    @classmethod
+    def parse_date(cls, text):
+        """A YYYY-MM-DD string as a date, or None if it isn't a valid one"""
+        if not isinstance(text, str) or not cls.DATE_PATTERN.fullmatch(text):
+            return None
+        try:
+            return datetime.fromisoformat(text).date()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def age(birth_date, today):
+        return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+    def check(self, username, record, editing=False, seen=None, today=None):
+        """The first problem with record as a message, or None if it passes
+
+        username owns the record; when editing, its own identity values
+        don't count as taken. seen collects the identity values of earlier
+        records in a batch.
+        """
+        if not editing and not username:
+            return "Username is required"
+        for field, path in self.required:
+            value = record
+            for key in path:
+                value = value.get(key) if value is not None else None
+            if value is None or not str(value).strip():
+                return f"{self.label(field)} is required"
+        
+        email = record.get('email')
+        # str() as imported JSON may hold numbers or other non-text values
+        if email and not EMAIL_PATTERN.match(str(email)):
+            return "Invalid email address"
+        birth = record.get('date_of_birth')
+        if birth:
+            birth_date = self.parse_date(birth)
+            if birth_date is None:
+                return "Invalid date of birth, expected YYYY-MM-DD"
+            if self.min_age is not None and self.age(birth_date, today or datetime.now().date()) < self.min_age:
+                return self.age_message
+        
+        message = self.conflict(username, record, editing)
+        if message is not None:
+            return message
+        if seen is not None:
+            keys = []
+            for field in self.unique:
+                value = username if field == 'username' else record.get(field)
+                if not value or (editing and field == 'username'):
+                    continue
+                key = (field, IdentityIndex.key(field, value))
+                if key in seen:
+                    return self.UNIQUE_MESSAGES[field]
+                keys.append(key)
+            seen.update(dict.fromkeys(keys, username))
+        return None
+
+    def conflict(self, username, record, editing=False):
+        """The message for an identity value another account holds, or None"""
+        if self.identity is None:
+            return None
+        field = self.identity.clash(username, record, self.unique, editing)
+        return None if field is None else self.UNIQUE_MESSAGES[field]
+
+    def check_many(self, records):
+        """Validate (username, record) pairs, returns (accepted, errors)
+
+        accepted is a {username: record} dict, errors a list of (row number,
+        username, message) with rows counted from 1.
+        """
+        today = datetime.now().date()
+        seen = {}
+        accepted, errors = {}, []
+        for number, (username, record) in enumerate(records, 1):
+            message = self.check(username, record, seen=seen, today=today)
+            if message is None:
+                accepted[username] = record
+            else:
+                errors.append((number, username, message))
+        return accepted, errors
+
+
+class VoterRollImport:
+    """Check a stream of voter rows with a RegistrationValidator, collecting per-row errors
+
+    Meant for a worker thread, so give it a validator using a snapshot()
+    of the identity index; the main thread adds the accepted records
+    afterwards.
+    """
+    def __init__(self, validator, credentials):
+        self.validator = validator
+        self.credentials = credentials  # Hashes the passwords, see hash_fixture_password()
+        self.accepted = {}  # username -> (row number, VoterRecord)
+        self.errors = []  # (row number, username, message)
+        self.rows = 0
+        self._seen = {}  # Identity values used by earlier rows
+        self._now = datetime.now()
+
+    def run(self, rows, task=None, report_every=5000):
+        for number, row in enumerate(rows, 1):
+            self.add(number, row)
+            if task is not None and number % report_every == 0:
+                task.progress(f"Checked {number:,} rows, {len(self.errors):,} rejected...")
+        return self
+
+    def add(self, number, row):
+        """Validate one row and keep it as a record, or note why it was rejected"""
+        self.rows = number
+        if not isinstance(row, dict):
+            return self.reject(number, '', "Invalid row, expected an object with the voter's fields")
+        username = str(row.get('username', '')).strip()
+        if not isinstance(row.get('address', {}), dict):
+            return self.reject(number, username, "Invalid address")
+        for key, value in row.items():
+            if key != 'address' and isinstance(value, (dict, list)):
+                return self.reject(number, username, f"Invalid {RegistrationValidator.label(key).lower()}")
+        try:
+            message = self.validator.check(username, row, seen=self._seen, today=self._now.date())
+            if message is not None:
+                return self.reject(number, username, message)
+            
+            data = {key: value for key, value in row.items() if key != 'username'}
+            data['password'] = hash_fixture_password(row['password'], self.credentials)
+            data['is_candidate'] = False
+            data.setdefault('registration_date', self._now.strftime(TIMESTAMP_FORMAT))
+            self.accepted[username] = (number, VoterRecord.from_dict(data))
+        except (TypeError, ValueError, AttributeError, KeyError) as e:
+            # An odd value in one row must not abort the whole import
+            self.reject(number, username, f"Invalid row: {e}")
+
+    def reject(self, number, username, message):
+        self.errors.append((number, username, message))
+
+    def write_report(self, filename):
+        """Write the rejected rows as CSV"""
+        def write(f):
+            writer = csv.writer(f)
+            writer.writerow(['Row', 'Username', 'Error'])
+            writer.writerows(self.errors)
+        atomic_write(filename, write)
+        return filename
+
+
+def create_storage(kind=None, directory='.'):
+    """Create the storage backend selected by name or the VOTING_STORAGE variable"""
+    kind = (kind or os.environ.get('VOTING_STORAGE', 'json')).lower()
+    if kind == 'sqlite':
+        return SqliteStorage(Path(directory) / "voting.db", migrate_from=JsonStorage(directory))
+    if kind == 'json':
+        return JsonStorage(directory)
+    raise ValueError(f"Unknown storage backend: {kind}")
+
+
+class ElectionError(Exception):
+    """An operation the election rules refused, str(error) is the message for the user"""
+
+
+class AlreadyVoted(ElectionError):
+    """The voter already has a ballot for the candidate's role"""
+
+
+class ElectionEngine:
+    """The election data and rules, without any UI
+
+    Registers voters and candidates, checks logins, casts ballots, keeps
+    the tally and writes the exports. Refused operations raise
+    ElectionError instead of showing a dialog, so the same core can be
+    scripted or driven by another frontend (VotingSystem is the Tk one).
+    
+    Changes are only marked dirty. on_dirty(part) is called for each one
+    so a frontend can schedule a flush(); without it call flush(), or
+    close() when done.
+    """
+    LOGIN_FAILURES = {
+        'admin': "Invalid admin credentials!",
+        'candidate': "Invalid candidate credentials!",
+        'voter': "Invalid credentials!"
+    }
+
+    def __init__(self, storage=None, kdf_target=0.1, on_dirty=None):
+        self.storage = storage if storage is not None else create_storage()
+        self.on_dirty = on_dirty
+        self._dirty = set()  # Parts of the data ('admin', 'voters', 'votes') waiting to be written
+        self.admin_data = {}
+        self.voters = {}
+        self.candidates = {}  # Full name -> votes
+        self.voting_history = []
+        self.candidate_index = CandidateIndex()
+        self.ballot_index = BallotIndex()
+        self.tally = TallyEngine(self.candidate_index)
+        self.credentials = CredentialManager(kdf_target)
+        self.identity = IdentityIndex(
+            {'username': self.username_owner},
+            {'username': lambda: ((username, username) for username in chain(self.voters, self.admin_data))}
+        )
+        self.voter_rules = RegistrationValidator(VOTER_REQUIRED, min_age=18, identity=self.identity)
+        self.candidate_rules = RegistrationValidator(
+            CANDIDATE_REQUIRED, min_age=25, role="a candidate", identity=self.identity
+        )
+        self.profile_rules = RegistrationValidator(('full_name', 'email', 'phone'), identity=self.identity)
+
+    def load(self):
+        """Read everything from storage, returns the engine"""
+        # Voters first so the candidate index can resolve roles while loading votes
+        self.load_admin()
+        self.load_voters()
+        self.load_votes()
+        return self
+
+    def load_votes(self):
+        self.candidates, self.voting_history = self.storage.load_votes()
+        
+        self.ballot_index.rebuild(self.voting_history, self.candidate_index.position)
+        self.tally.sync(self.candidates)
+            
+    def load_admin(self):
+        try:
+            self.admin_data = self.storage.load_admin()
+            if self.admin_data is not None:
+                print(f"Loaded admin data: {self.admin_data}")
+        except:
+            # If there's any error loading the file, reset to default
+            self.admin_data = {}
+        
+        # Always ensure default admin exists (a legacy hash, so startup doesn't wait for
+        # the KDF calibration; it is upgraded on the first login)
+        default_password = "admin123".encode('utf-8')
+        default_hash = hashlib.sha256(default_password).hexdigest()
+        
+        # Set or reset admin credentials
+        self.admin_data = {"admin": default_hash}
+        print(f"Setting admin data: {self.admin_data}")
+        self.mark_dirty('admin')
+        
+    def load_voters(self):
+        self.voters = self.storage.load_voters()
+        if self.voters is None:
+            self.voters = {}
+            self.mark_dirty('voters')
+        self.candidate_index.rebuild(self.voters)
+        # The SQLite voter map can read the two fields without loading whole records
+        if hasattr(self.voters, 'identity_items'):
+            self.identity.rebuild(self.voters.identity_items())
+        else:
+            self.identity.rebuild(
+                (username, record.get('national_id'), record.get('email'))
+                for username, record in self.voters.items()
+            )
+
+    def mark_dirty(self, part):
+        """Note that part of the data needs writing, repeated changes before the flush are merged"""
+        self._dirty.add(part)
+        if self.on_dirty is not None:
+            self.on_dirty(part)
+
+    def flush(self):
+        """Write every dirty part now"""
+        dirty, self._dirty = self._dirty, set()
+        if 'admin' in dirty:
+            self.storage.save_admin(self.admin_data)
+        if 'voters' in dirty:
+            self.storage.save_voters(self.voters)
+        if 'votes' in dirty:
+            self.storage.save_votes(self.candidates, self.voting_history)
+
+    def close(self):
+        self.flush()
+        self.storage.close()
     
-    if install_darkdetect():
+    def seed(self, name, records, digest=None):
+        """Register fixture records whose usernames are free, returns how many were added
+
+        Existing records and vote counts are never touched. When the digest
+        matches the one stored the last time fixture `name` was applied,
+        nothing is read or written. Plain-text passwords are hashed at the
+        bulk cost, see hash_fixture_password().
+        """
+        if digest is None:
+            records = list(records)
+            digest = hashlib.sha256(json.dumps(records, sort_keys=True).encode('utf-8')).hexdigest()
+        if self.storage.load_seeds().get(name) == digest:
+            return 0
+        
+        now = datetime.now().strftime(TIMESTAMP_FORMAT)
+        added = 0
+        new_candidates = False
+        for data in records:
+            username = data.get('username')
+            if not username or username in self.voters:
+                continue
+            data = dict(data)
+            data['password'] = hash_fixture_password(data.get('password', ''), self.credentials)
+            data.setdefault('registration_date', now)
+            record = VoterRecord.from_dict(data)
+            self.voters[username] = record
+            self.identity.add(username, record)
+            added += 1
+            if record.get('is_candidate', False):
+                self.candidate_index.add(username, record)
+                if record['full_name'] not in self.candidates:
+                    self.candidates[record['full_name']] = 0
+                    new_candidates = True
+        
+        # One write for the whole fixture (one transaction with SQLite), digest included
+        self.storage.save_seed(
+            name, digest,
+            self.voters if added else None,
+            (self.candidates, self.voting_history) if new_candidates else None
+        )
+        return added
+
+    def seed_file(self, path):
+        """Apply a .csv, .jsonl or .json fixture file, see seed() and read_fixture()"""
+        path = Path(path)
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        # Only parsed when the file changed since it was last applied
+        return self.seed(f"file:{path.resolve()}", read_fixture(path), digest.hexdigest())
+
+    def username_owner(self, username):
+        """username if a voter, candidate or admin already has it, otherwise None"""
+        return username if username in self.voters or username in self.admin_data else None
+
+    def find_candidate(self, full_name):
+        """Return (username, record) for a candidate, or (None, None)"""
+        username = self.candidate_index.username(full_name)
+        if username is None or username not in self.voters:
+            return None, None
+        return username, self.voters[username]
+
+    def validate(self, username, record):
+        """Raise ElectionError if the registration rules refuse record"""
+        rules = self.candidate_rules if record.get('is_candidate', False) else self.voter_rules
+        problem = rules.check(username, record)
+        if problem is not None:
+            raise ElectionError(f"{problem}!")
+
+    def register(self, username, record, hashed=False):
+        """Register a voter, or a candidate when record['is_candidate'] is set, returns the VoterRecord
+
+        record holds the plain-text password, it is hashed here once the
+        registration rules accept the record. With hashed=True it already
+        holds a CredentialManager hash (the Tk forms hash on a worker).
+        """
+        candidate = record.get('is_candidate', False)
+        self.validate(username, record)
+        
+        if not hashed:
+            record = dict(record, password=self.credentials.hash(record['password']))
+        voter = VoterRecord.from_dict(record)
+        self.voters[username] = voter
+        self.identity.add(username, voter)
+        self.mark_dirty('voters')
+        if candidate:
+            self.candidates[voter['full_name']] = 0
+            self.candidate_index.add(username, voter)
+            self.mark_dirty('votes')
+        return voter
+
+    def password_hash(self, username, kind='voter'):
+        """The stored hash of an 'admin', 'candidate' or 'voter' account, None if there is no such account"""
+        if kind == 'admin':
+            return self.admin_data.get(username)
+        record = self.voters.get(username)
+        if record is None or (kind == 'candidate' and not record.get('is_candidate', False)):
+            return None
+        return record['password']
+
+    def set_password(self, username, password_hash, kind='voter'):
+        if kind == 'admin':
+            self.admin_data[username] = password_hash
+            self.mark_dirty('admin')
+        else:
+            self.voters[username]['password'] = password_hash
+            self.mark_dirty('voters')
+
+    def login_attempt(self, username):
+        """Use up one login attempt for username, raises ElectionError while it is throttled"""
+        wait = self.credentials.throttle(username)
+        if wait:
+            raise ElectionError(f"Too many login attempts. Try again in {math.ceil(wait)} seconds.")
+
+    def check_password(self, password, stored):
+        """(valid, new hash or None when no rehash is due), the slow part of a login and safe on a worker"""
+        if not self.credentials.verify(password, stored):
+            return False, None
+        return True, self.credentials.hash(password) if self.credentials.needs_rehash(stored) else None
+
+    def accept_login(self, username, kind, stored, new_hash):
+        """Finish a good login: clear the throttle and store the rehashed password"""
+        self.credentials.reset(username)
+        # Unless the password changed meanwhile
+        if new_hash is not None and self.password_hash(username, kind) == stored:
+            self.set_password(username, new_hash, kind)
+
+    def authenticate(self, username, password, kind='voter'):
+        """Check a login of the given kind, raises ElectionError when it is refused
+
+        The same steps as VotingSystem.check_login(), which runs
+        check_password() on a worker instead.
+        """
+        self.login_attempt(username)
+        stored = self.password_hash(username, kind)
+        valid, new_hash = self.check_password(password, stored)
+        if not valid:
+            raise ElectionError(self.LOGIN_FAILURES[kind])
+        self.accept_login(username, kind, stored, new_hash)
+
+    def cast(self, voter, candidate):
+        """Record voter's ballot for candidate, returns the Ballot
+
+        Raises AlreadyVoted if the voter already voted for the candidate's
+        role, ElectionError for anything else that is refused.
+        """
+        if voter not in self.voters:
+            raise ElectionError(f"Unknown voter: {voter}")
+        role = self.candidate_index.position(candidate)
+        if not role:
+            raise ElectionError("Could not determine candidate's role!")
+        
+        # One vote per role
+        voted_for = self.ballot_index.get(voter, role)
+        if voted_for is not None:
+            raise AlreadyVoted(
+                f"You have already voted for a {role}!\n"
+                f"Your vote was cast for {voted_for}"
+            )
+        
+        ballot = Ballot(voter, candidate, role, current_epoch())
+        self.candidates[candidate] += 1
+        self.tally.record(self.candidates, candidate)
+        self.voting_history.append(ballot)
+        self.ballot_index.record(voter, role, candidate)
+        # Persisted on its own, without rewriting the whole history
+        self.storage.append_ballot(ballot, self.candidates, self.voting_history)
+        return ballot
+
+    def reset_votes(self):
+        """Set every count back to zero and drop the voting history"""
+        self.candidates = {candidate: 0 for candidate in self.candidates}
+        # A new list, see history_snapshot()
+        self.voting_history = []
+        self.ballot_index.clear()
+        self.mark_dirty('votes')
+
+    def current_tally(self):
+        """The tally engine, brought up to date with any candidate changes"""
+        self.tally.sync(self.candidates)
+        return self.tally
+
+    def results_rows(self):
+        """(position, rank, candidate, party, votes, percentage) rows, grouped by position in rank order"""
+        tally = self.current_tally()
+        rows = []
+        for position in tally.positions():
+            for rank, candidate_name, votes, percentage in tally.standings(position):
+                # Find candidate's party from voters data
+                _, candidate_data = self.find_candidate(candidate_name)
+                party = candidate_data.get('party', 'Independent') if candidate_data else "Independent"
+                rows.append((position, rank, candidate_name, party, votes, percentage))
+        return rows
+
+    def history_snapshot(self):
+        """The ballots cast so far as (history, count)
+
+        reset_votes() replaces the list rather than clearing it, so the
+        snapshot stays valid while a worker reads it.
+        """
+        return self.voting_history, len(self.voting_history)
+
+    @staticmethod
+    def history_chunks(snapshot, task=None, chunk_size=EXPORT_CHUNK_ROWS):
+        """Yield a history snapshot in slices of chunk_size ballots, reporting progress to task"""
+        history, count = snapshot
+        for start in range(0, count, chunk_size):
+            if task is not None:
+                task.progress(f"Writing ballot {start + 1:,} of {count:,}...")
+            yield history[start:min(start + chunk_size, count)]
+
+    @classmethod
+    def report_lines(cls, results, snapshot, task=None):
+        """Lines of the text report: results_rows() then the history snapshot"""
+        yield "Voting Results Summary\n"
+        yield "=====================\n\n"
+        current = None
+        for position, rank, candidate, party, votes, percentage in results:
+            if position != current:
+                current = position
+                yield f"\n{position}\n"
+            yield f"  {rank}. {candidate}: {votes} votes ({percentage:.1f}%)\n"
+        
+        yield "\n\nVoting History\n"
+        yield "==============\n\n"
+        for chunk in cls.history_chunks(snapshot, task):
+            yield "".join(
+                f"{vote['timestamp']}: {vote['voter']} voted for {vote['candidate']}\n"
+                for vote in chunk
+            )
+
+    @classmethod
+    def history_rows(cls, snapshot, task=None):
+        """CSV rows of a history snapshot, header first"""
+        yield ['Timestamp', 'Voter', 'Candidate', 'Role']
+        for chunk in cls.history_chunks(snapshot, task):
+            yield from (
+                [vote['timestamp'], vote['voter'], vote['candidate'], vote.get('role', '')]
+                for vote in chunk
+            )
+
+    @staticmethod
+    def write_export(task, filename, data, write=None, newline=None):
+        """Write data (an iterable) to filename as it is produced, removing the file if cancelled"""
         try:
-            import darkdetect as darkdetect_module
-        except ImportError:
-            # Create dummy darkdetect if import still fails
-            class DarkDetect:
-                @staticmethod
-                def isDark():
-                    return False
-            darkdetect_module = DarkDetect()
-    else:
-        # Create dummy darkdetect if installation fails
-        class DarkDetect:
-            @staticmethod
-            def isDark():
-                return False
-        darkdetect_module = DarkDetect()
+            with open(filename, 'w', newline=newline, encoding='utf-8') as f:
+                if write is None:
+                    f.writelines(data)
+                else:
+                    write(f, data)
+        except TaskCancelled:
+            if os.path.exists(filename):
+                os.remove(filename)
+            raise
+        return filename
+
+    def export(self, filename, kind='text', task=None):
+        """Write the results and history ('text') or the history alone ('csv'), returns filename"""
+        snapshot = self.history_snapshot()
+        if kind == 'text':
+            return self.write_export(task, filename, self.report_lines(self.results_rows(), snapshot, task))
+        if kind == 'csv':
+            return self.write_export(
+                task, filename, self.history_rows(snapshot, task),
+                write=lambda f, rows: csv.writer(f).writerows(rows), newline=''
+            )
+        raise ValueError(f"Unknown export kind: {kind}")
+
+
+def engine_attribute(name):
+    """A VotingSystem property for the engine attribute of the same name"""
+    return property(
+        lambda self: getattr(self.engine, name),
+        lambda self, value: setattr(self.engine, name, value)
+    )
 
-# Create global reference
-darkdetect = darkdetect_module
 
 class VotingSystem:
-    def __init__(self, root):
+    # The data and rules live in the ElectionEngine, the views keep using these names for them
+    storage = engine_attribute('storage')
+    admin_data = engine_attribute('admin_data')
+    voters = engine_attribute('voters')
+    candidates = engine_attribute('candidates')
+    voting_history = engine_attribute('voting_history')
+    candidate_index = engine_attribute('candidate_index')
+    ballot_index = engine_attribute('ballot_index')
+    tally = engine_attribute('tally')
+    credentials = engine_attribute('credentials')
+    identity = engine_attribute('identity')
+    voter_rules = engine_attribute('voter_rules')
+    candidate_rules = engine_attribute('candidate_rules')
+    profile_rules = engine_attribute('profile_rules')
+
+    def __init__(self, root, storage=None, flush_interval=None):
         self.root = root
         self.root.title("Voting System")
         self.root.geometry("1080x720")
         
-        # Detect system theme
-        self.is_dark_mode = darkdetect.isDark()
+        # Detect system theme, without letting a slow probe hold up startup
+        self.is_dark_mode = detect_dark_mode()
+        startup_trace("theme detected")
         
         # Update style dictionary based on system theme
         if self.is_dark_mode:
@@ -94,63 +3222,88 @@ class VotingSystem:
         
         self.root.configure(bg=self.style['bg'])
         
-        # Load or initialize data
-        self.votes_file = Path("votes.json")
-        self.admin_file = Path("admin.json")
-        self.voters_file = Path("voters.json")
-        self.load_votes()
-        self.load_admin()
-        self.load_voters()
+        # Seconds to wait before writing dirty data; 0 writes once the current event is handled
+        if flush_interval is None:
+            flush_interval = float(os.environ.get('VOTING_FLUSH_INTERVAL', 0))
+        self.flush_interval = flush_interval
+        self._flush_job = None
+        # Load or initialize data. Seconds one password check should take: VOTING_KDF_TARGET,
+        # calibrated on first login
+        self.engine = ElectionEngine(
+            storage if storage is not None else create_storage(),
+            float(os.environ.get('VOTING_KDF_TARGET', 0.1)),
+            on_dirty=self.schedule_flush
+        )
+        self._login_task = None
+        self._credential_task = None  # Password hashing/checking outside the login screen, see run_credentials()
+        self.analytics = None  # HistoryAnalytics, created the first time the report window opens
+        self._sync_pending = False
+        self.voter_search = None  # Built on first search, see voter_search_index()
+        self.candidate_search = None
+        self._search_jobs = {}
+        self.thumbnails = ThumbnailCache()
+        self.backgrounds = BackgroundCache(self.style['bg'])
+        self.executor = TaskExecutor(self.root)
+        # Login screen animation rate: VOTING_ANIMATION_FPS, 0 keeps the symbols still
+        self.frames = FrameScheduler(self.root, float(os.environ.get('VOTING_ANIMATION_FPS', 20)))
+        self.engine.load()
+        startup_trace("data loaded")
         self.current_user = None
         
         self.is_admin = False
         
         self.show_login_screen()
-        
-    def load_votes(self):
-        if self.votes_file.exists():
-            with open(self.votes_file, 'r') as f:
-                data = json.load(f)
-                self.candidates = data.get('candidates', {})
-                self.voting_history = data.get('history', [])
-        else:
-            self.candidates = {}
-            self.voting_history = []
-            
-    def load_admin(self):
-        if self.admin_file.exists():
-            try:
-                with open(self.admin_file, 'r') as f:
-                    self.admin_data = json.load(f)
-                    print(f"Loaded admin data: {self.admin_data}")
-            except:
-                # If there's any error loading the file, reset to default
-                self.admin_data = {}
-        
-        # Always ensure default admin exists
-        default_password = "admin123".encode('utf-8')
-        default_hash = hashlib.sha256(default_password).hexdigest()
-        
-        # Set or reset admin credentials
-        self.admin_data = {"admin": default_hash}
-        print(f"Setting admin data: {self.admin_data}")
-        self.save_admin()
-        
-    def load_voters(self):
-        if self.voters_file.exists():
-            with open(self.voters_file, 'r') as f:
-                self.voters = json.load(f)
-        else:
-            self.voters = {}
-            self.save_voters()
+        startup_trace("login screen built")
+        self.root.after_idle(lambda: startup_trace("login screen shown"))
+        
+    def seed(self, name, records, digest=None):
+        """Apply a fixture, see ElectionEngine.seed()"""
+        added = self.engine.seed(name, records, digest)
+        if added:
+            # Rebuilt on the next search
+            self.voter_search = None
+            self.candidate_search = None
+        return added
+
+    def seed_file(self, path):
+        """Apply a fixture file, see ElectionEngine.seed_file()"""
+        added = self.engine.seed_file(path)
+        if added:
+            self.voter_search = None
+            self.candidate_search = None
+        return added
+
+    def find_candidate(self, full_name):
+        """Return (username, record) for a candidate, or (None, None)"""
+        return self.engine.find_candidate(full_name)
             
     def save_admin(self):
-        with open(self.admin_file, 'w') as f:
-            json.dump(self.admin_data, f)
+        self.mark_dirty('admin')
             
     def save_voters(self):
-        with open(self.voters_file, 'w') as f:
-            json.dump(self.voters, f)
+        self.mark_dirty('voters')
+
+    def mark_dirty(self, part):
+        """Schedule part of the data to be written; repeated saves before the flush are merged"""
+        self.engine.mark_dirty(part)
+
+    def schedule_flush(self, part):
+        """The engine's on_dirty hook"""
+        if self._flush_job is None:
+            if self.flush_interval > 0:
+                self._flush_job = self.root.after(int(self.flush_interval * 1000), self.flush_storage)
+            else:
+                self._flush_job = self.root.after_idle(self.flush_storage)
+
+    def flush_storage(self):
+        """Write every dirty part now, also called on exit"""
+        if self._flush_job is not None:
+            try:
+                self.root.after_cancel(self._flush_job)
+            except tk.TclError:
+                pass  # The window is already gone
+            self._flush_job = None
+        self.engine.flush()
             
     def show_login_screen(self):
         # Clear current window
@@ -166,19 +3319,20 @@ class VotingSystem:
         self.bg_canvas.place(relwidth=1, relheight=1)
         
         # Function to arrange symbols based on current window size
-        def arrange_symbols():
+        def arrange_symbols(width, height):
             # Clear existing symbols
             for item in self.bg_canvas.find_all():
                 self.bg_canvas.delete(item)
             
             # Draw background pattern
-            create_pattern()
+            draw_background(width, height)
             
             # Calculate window width for proper symbol distribution
-            window_width = max(self.root.winfo_width(), 800)  # Use minimum width of 800
+            window_width = max(width, 800)  # Use minimum width of 800
             spacing = window_width / (len(symbols) + 1)
             
             # Add floating symbols to background with proper spacing
+            floating = []
             for i, (symbol, _) in enumerate(symbols):
                 x = spacing * (i + 1)  # Position symbols with equal spacing
                 y = 50 + (i % 3) * 100  # Stagger vertical positions
@@ -188,36 +3342,54 @@ class VotingSystem:
                     font=('Arial', 24),
                     fill='#81C784'  # Light green for symbols
                 )
-                # Start floating animation with random speed
-                speed = random.uniform(0.5, 1.5)
-                float_symbol(text_id, x, y, speed=speed)
-        
-        # Draw background pattern
-        def create_pattern():
-            # Create hexagonal pattern
-            hex_size = 40
-            hex_points = []
-            window_width = max(self.root.winfo_width(), 800)  # Use minimum width of 800
-            window_height = max(self.root.winfo_height(), 600)  # Use minimum height of 600
-            
-            for x in range(-50, window_width + 50, hex_size * 2):
-                for y in range(-50, window_height + 50, hex_size * 2):
-                    points = []
-                    for angle in range(0, 360, 60):
-                        rad = math.radians(angle)
-                        px = x + hex_size * math.cos(rad)
-                        py = y + hex_size * math.sin(rad)
-                        points.extend([px, py])
-                    hex_points.append(points)
+                # Float at a random speed, in pixels per second
+                floating.append([text_id, x, y, 1, random.uniform(10, 30)])
             
-            # Draw hexagons with different opacities
-            for points in hex_points:
+            # One animation moves every symbol, replacing the one from the previous layout
+            self.frames.add('login symbols', self.bg_canvas, lambda dt: float_symbols(floating, height, dt))
+        
+        # Draw background pattern as one image, rendered on a worker the first time a size is needed
+        def draw_background(width, height):
+            size = self.backgrounds.size_for(width, height)
+            photo = self.backgrounds.cached(size)
+            if photo is not None:
+                show_background(photo)
+            elif not self.backgrounds.available:
+                draw_hexagons(size)
+            else:
+                def on_done(image):
+                    # Skip it if the canvas is gone or has been resized to another bucket since
+                    if self.bg_canvas.winfo_exists() and self.backgrounds.size_for(
+                            self.bg_canvas.winfo_width(), self.bg_canvas.winfo_height()) == size:
+                        show_background(self.backgrounds.add(size, image))
+                
+                def on_error(error):
+                    if isinstance(error, ImportError):
+                        self.backgrounds.available = False
+                    else:
+                        print(f"Error rendering login background: {error}")
+                    if self.bg_canvas.winfo_exists():
+                        draw_hexagons(size)
+                
+                self.executor.submit(lambda task: self.backgrounds.render(size), on_done=on_done, on_error=on_error)
+        
+        def show_background(photo):
+            self.bg_canvas.delete('background')
+            self.bg_canvas.create_image(0, 0, image=photo, anchor='nw', tags='background')
+            self.bg_canvas.tag_lower('background')
+        
+        # Fallback without Pillow: one polygon per hexagon
+        def draw_hexagons(size):
+            self.bg_canvas.delete('background')
+            for x, y in self.backgrounds.centers(*size):
                 self.bg_canvas.create_polygon(
-                    points,
-                    fill='#E8F5E9',  # Very light green
-                    outline='#C8E6C9',  # Light green
-                    width=1
+                    self.backgrounds.outline(x, y),
+                    fill=BackgroundCache.FILL,
+                    outline=BackgroundCache.OUTLINE,
+                    width=1,
+                    tags='background'
                 )
+            self.bg_canvas.tag_lower('background')
         
         # Add floating election symbols
         symbols = [
@@ -227,47 +3399,28 @@ class VotingSystem:
             ("🏛️", "Government"),
             ("📜", "Constitution"),
             ("⚖️", "Justice"),
-            ("🎗️", "Ribbon"),
-            ("🌟", "Success"),
-            ("🔔", "Alert"),
-            ("🎯", "Target")
-        ]
-        
-        # Function to create floating animation
-        def float_symbol(symbol, x, y, direction=1, speed=1):
-            try:
-                # Check if canvas still exists
-                if self.bg_canvas.winfo_exists():
-                    # Move symbol up and down
-                    new_y = y + (direction * speed)
-                    if new_y > self.bg_canvas.winfo_height() - 20:
-                        direction = -1
-                        new_y = self.bg_canvas.winfo_height() - 20
-                    elif new_y < 20:
-                        direction = 1
-                        new_y = 20
-                        
-                    # Update symbol position
-                    self.bg_canvas.coords(symbol, x, new_y)
-                    
-                    # Schedule next movement
-                    self.root.after(50, lambda: float_symbol(symbol, x, new_y, direction, speed))
-            except tk.TclError:
-                pass  # Canvas was destroyed
-        
-        # Update symbol positions when window is resized
-        def update_symbol_positions(event=None):
-            try:
-                if self.bg_canvas.winfo_exists():
-                    arrange_symbols()
-            except tk.TclError:
-                pass  # Canvas was destroyed
-        
-        # Bind resize event
-        self.root.bind('<Configure>', update_symbol_positions)
+            ("🎗️", "Ribbon"),
+            ("🌟", "Success"),
+            ("🔔", "Alert"),
+            ("🎯", "Target")
+        ]
         
-        # Initial arrangement after a short delay to ensure window is ready
-        self.root.after(100, arrange_symbols)
+        # Move each symbol up and down, bouncing off the canvas edges
+        def float_symbols(floating, height, dt):
+            for symbol in floating:
+                text_id, x, y, direction, speed = symbol
+                new_y = y + direction * speed * dt
+                if new_y > height - 20:
+                    direction = -1
+                    new_y = height - 20
+                elif new_y < 20:
+                    direction = 1
+                    new_y = 20
+                symbol[2:4] = new_y, direction
+                self.bg_canvas.coords(text_id, x, new_y)
+        
+        # Re-layout once a resize settles, not on every <Configure> event
+        self.frames.on_resize(self.bg_canvas, arrange_symbols)
         
         # Create semi-transparent overlay for login container
         overlay_frame = tk.Frame(main_frame, bg='#FFFFFF')
@@ -566,51 +3719,133 @@ class VotingSystem:
         # Show the menu at the calculated position
         registration_menu.post(x, y)
         
+    def check_login(self, username, password, kind, on_success):
+        """Verify an 'admin', 'candidate' or 'voter' login on a worker, then call on_success()
+
+        The steps of ElectionEngine.authenticate(), with the password
+        check moved off the event loop. Attempts are throttled per
+        username.
+        """
+        if self._login_task is not None and not self._login_task.done():
+            return  # Still checking the previous attempt
+        try:
+            self.engine.login_attempt(username)
+        except ElectionError as error:
+            messagebox.showerror("Error", str(error))
+            return
+        stored = self.engine.password_hash(username, kind)
+        
+        def verify(task):
+            return self.engine.check_password(password, stored)
+        
+        def finish():
+            self._login_task = None
+            if self.login_button.winfo_exists():
+                self.login_button.configure(state=tk.NORMAL)
+        
+        def on_done(result):
+            finish()
+            valid, new_hash = result
+            if not valid:
+                messagebox.showerror("Error", self.engine.LOGIN_FAILURES[kind])
+                return
+            self.engine.accept_login(username, kind, stored, new_hash)
+            on_success()
+        
+        def on_error(error):
+            finish()
+            messagebox.showerror("Error", f"Login failed: {str(error)}")
+        
+        self.login_button.configure(state=tk.DISABLED)
+        self._login_task = self.executor.submit(verify, on_done=on_done, on_error=on_error)
+
+    def run_credentials(self, work, on_done):
+        """Run work(task), KDF hashing or checking, on a worker and pass its result to on_done()
+
+        The KDF is slow on purpose, so it never runs on the Tk thread.
+        One such task runs at a time, clicks meanwhile are ignored.
+        """
+        if self._credential_task is not None and not self._credential_task.done():
+            return
+        
+        def finish(result):
+            self._credential_task = None
+            on_done(result)
+        
+        def on_error(error):
+            self._credential_task = None
+            messagebox.showerror("Error", f"Password check failed: {str(error)}")
+        
+        self._credential_task = self.executor.submit(work, on_done=finish, on_error=on_error)
+
+    def hash_password(self, password, on_done):
+        """Hash a new password on a worker, then call on_done(hash)"""
+        self.run_credentials(lambda task: self.credentials.hash(password), on_done)
+
+    def confirm_password(self, username, kind, password, on_valid, new_password=None,
+                         failure="Current password is incorrect!"):
+        """Check the password of an 'admin', 'candidate' or 'voter' account, then call on_valid(new_hash)
+
+        Attempts count against the account's login throttle. new_hash is
+        new_password hashed on the same worker, or None without one.
+        """
+        if self._credential_task is not None and not self._credential_task.done():
+            return
+        try:
+            self.engine.login_attempt(username)
+        except ElectionError as error:
+            messagebox.showerror("Error", str(error))
+            return
+        stored = self.engine.password_hash(username, kind)
+        
+        def check(task):
+            if not self.credentials.verify(password, stored):
+                return False, None
+            return True, self.credentials.hash(new_password) if new_password is not None else None
+        
+        def on_done(result):
+            valid, new_hash = result
+            if not valid:
+                messagebox.showerror("Error", failure)
+                return
+            self.credentials.reset(username)
+            on_valid(new_hash)
+        
+        self.run_credentials(check, on_done)
+
     def admin_login(self):
         username = self.username_entry.get().strip()
         password = self.password_entry.get().strip()
-        
-        # Use the exact same hashing process
-        input_hash = hashlib.sha256(password.encode('utf-8')).hexdigest()
-        
-        # Debug prints
         print(f"Attempting login with username: {username}")
-        print(f"Admin data: {self.admin_data}")
-        print(f"Input password hash: {input_hash}")
-        print(f"Stored password hash: {self.admin_data.get(username, 'Not found')}")
         
-        if username in self.admin_data and self.admin_data[username] == input_hash:
+        def accept():
             self.is_admin = True
             self.create_main_interface()
-        else:
-            messagebox.showerror("Error", "Invalid admin credentials!")
+        
+        self.check_login(username, password, 'admin', accept)
             
     def candidate_login(self):
         """Handle candidate login"""
         username = self.username_entry.get()
         password = self.password_entry.get()
-        hashed_password = hashlib.sha256(password.encode()).hexdigest()
         
-        if (username in self.voters and 
-            self.voters[username]['password'] == hashed_password and 
-            self.voters[username].get('is_candidate', False)):
+        def accept():
             self.is_admin = False
             self.current_user = username
             self.create_candidate_interface()
-        else:
-            messagebox.showerror("Error", "Invalid candidate credentials!")
+        
+        self.check_login(username, password, 'candidate', accept)
             
     def voter_login(self):
         username = self.username_entry.get()
         password = self.password_entry.get()
-        hashed_password = hashlib.sha256(password.encode()).hexdigest()
         
-        if username in self.voters and self.voters[username]['password'] == hashed_password:
+        def accept():
             self.is_admin = False
             self.current_user = username
             self.create_main_interface()
-        else:
-            messagebox.showerror("Error", "Invalid credentials!")
+        
+        self.check_login(username, password, 'voter', accept)
             
     def create_main_interface(self):
         # Clear current window
@@ -765,32 +4000,19 @@ class VotingSystem:
             foreground=[('selected', 'white')]
         )
         
-        # Create Treeview
+        # Create Treeview (virtual, only the visible rows are materialized)
         columns = ('Username', 'Full Name', 'Email', 'Phone', 'Registration Date')
-        self.voters_tree = ttk.Treeview(list_frame, columns=columns, show='headings', selectmode='browse')
+        self.voters_view = VirtualTreeview(list_frame, columns, self.voter_row, selectmode='browse')
+        self.voters_tree = self.voters_view.tree
         
         # Configure columns
         for col in columns:
             self.voters_tree.heading(col, text=col)
             self.voters_tree.column(col, width=150)
         
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.voters_tree.yview)
-        self.voters_tree.configure(yscrollcommand=scrollbar.set)
-        
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.voters_view.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.voters_tree.pack(fill='both', expand=True)
         
-        # Add row selection event
-        def on_select(event):
-            selected = self.voters_tree.selection()
-            if selected:
-                item = selected[0]
-                values = self.voters_tree.item(item)['values']
-                print(f"Selected voter: {values[0]}")  # Print selected username for debugging
-        
-        self.voters_tree.bind('<<TreeviewSelect>>', on_select)
-        
         # Buttons frame
         btn_frame = tk.Frame(container, bg=self.style['bg'])
         btn_frame.pack(fill='x', padx=20, pady=10)
@@ -822,11 +4044,29 @@ class VotingSystem:
             fg='white'
         ).pack(side=tk.LEFT, padx=5)
         
+        tk.Button(
+            btn_frame,
+            text="Import Voters",
+            command=self.import_voter_roll,
+            font=self.style['font'],
+            bg='#00BFFF',
+            fg='white'
+        ).pack(side=tk.LEFT, padx=5)
+        
+        tk.Button(
+            btn_frame,
+            text="Export Voters",
+            command=self.export_voter_roll,
+            font=self.style['font'],
+            bg='#00BFFF',
+            fg='white'
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Populate voters list
         self.update_voters_list()
         
         # Bind search functionality
-        search_entry.bind('<KeyRelease>', lambda e: self.search_voters(search_entry.get()))
+        search_entry.bind('<KeyRelease>', lambda e: self.debounce_search(self.search_voters, search_entry))
 
     def setup_candidates_tab(self, container):
         # Similar structure to voters tab but for candidates
@@ -855,16 +4095,14 @@ class VotingSystem:
         list_frame.pack(fill='both', expand=True, padx=20, pady=10)
         
         columns = ('Full Name', 'Party', 'Votes', 'Registration Date')
-        self.candidates_tree = ttk.Treeview(list_frame, columns=columns, show='headings')
+        self.candidates_view = VirtualTreeview(list_frame, columns, self.candidate_row, selectmode='browse')
+        self.candidates_tree = self.candidates_view.tree
         
         for col in columns:
             self.candidates_tree.heading(col, text=col)
             self.candidates_tree.column(col, width=150)
         
-        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.candidates_tree.yview)
-        self.candidates_tree.configure(yscrollcommand=scrollbar.set)
-        
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.candidates_view.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.candidates_tree.pack(fill='both', expand=True)
         
         # Buttons frame
@@ -902,7 +4140,7 @@ class VotingSystem:
         self.update_candidates_list()
         
         # Bind search functionality
-        search_entry.bind('<KeyRelease>', lambda e: self.search_candidates(search_entry.get()))
+        search_entry.bind('<KeyRelease>', lambda e: self.debounce_search(self.search_candidates, search_entry))
 
     def setup_results_tab(self, container):
         """Setup the results tab"""
@@ -941,6 +4179,24 @@ class VotingSystem:
             fg='white'
         ).pack(side=tk.LEFT, padx=5)
         
+        tk.Button(
+            btn_frame,
+            text="Export CSV",
+            command=self.export_history_as_csv,
+            font=self.style['font'],
+            bg='#00BFFF',
+            fg='white'
+        ).pack(side=tk.LEFT, padx=5)
+        
+        tk.Button(
+            btn_frame,
+            text="Analytics",
+            command=self.show_analytics,
+            font=self.style['font'],
+            bg='#00BFFF',
+            fg='white'
+        ).pack(side=tk.LEFT, padx=5)
+        
         tk.Button(
             btn_frame,
             text="Reset All Votes",
@@ -1030,7 +4286,7 @@ class VotingSystem:
         scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
         self.candidates_frame = tk.Frame(canvas, bg=self.style['bg'])
         
-        canvas.configure(yscrollcommand=scrollbar.set)
+        canvas.configure(yscrollcommand=self.card_scroll_command(scrollbar))
         canvas.pack(side=tk.LEFT, fill='both', expand=True, pady=10)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
@@ -1079,7 +4335,7 @@ class VotingSystem:
         scrollbar = ttk.Scrollbar(candidates_container, orient="vertical", command=self.canvas.yview)
         self.candidates_frame = tk.Frame(self.canvas, bg=self.style['bg'])
         
-        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.canvas.configure(yscrollcommand=self.card_scroll_command(scrollbar))
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.canvas.pack(side=tk.LEFT, fill='both', expand=True)
         
@@ -1095,6 +4351,13 @@ class VotingSystem:
         if new_name and new_name != candidate:
             votes = self.candidates.pop(candidate)
             self.candidates[new_name] = votes
+            # Keep the candidate's record and the index in step with the rename
+            username, data = self.find_candidate(candidate)
+            if data is not None:
+                data['full_name'] = new_name
+                self.candidate_index.update(candidate, username, data)
+                self.refresh_search_entries(username, candidate)
+                self.save_voters()
             self.save_votes()
             # Pass True since this is called from admin interface
             self.update_candidates_display(True)
@@ -1105,8 +4368,9 @@ class VotingSystem:
             messagebox.showwarning("Warning", "Please select a candidate first!")
             return
         
-        item = selection[0]
-        candidate_name = self.candidates_tree.item(item)['values'][0]  # Get candidate name from first column
+        candidate_name = self.candidates_view.key_for(selection[0])  # Candidates are keyed by full name
+        if candidate_name is None:
+            return
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {candidate_name}?"):
             if candidate_name in self.candidates:
@@ -1114,10 +4378,10 @@ class VotingSystem:
                 del self.candidates[candidate_name]
                 
                 # Remove candidate flag from voters
-                for username, data in self.voters.items():
-                    if data.get('is_candidate', False) and data['full_name'] == candidate_name:
-                        data['is_candidate'] = False
-                        break
+                username = self.candidate_index.remove(candidate_name)
+                if username in self.voters:
+                    self.voters[username]['is_candidate'] = False
+                    self.refresh_search_entries(username, candidate_name)
                 
                 self.save_votes()
                 self.save_voters()
@@ -1127,115 +4391,20 @@ class VotingSystem:
                 messagebox.showerror("Error", "Candidate not found!")
             
     def update_candidates_display(self, is_admin):
-        # Clear existing candidates
-        for widget in self.candidates_frame.winfo_children():
-            widget.destroy()
-        
-        if not self.candidates:
-            # Show message if no candidates
-            tk.Label(
-                self.candidates_frame,
-                text="No candidates available at this time",
-                font=('Arial', 12, 'italic'),
-                bg=self.style['bg'],
-                fg='#888888'
-            ).pack(pady=20)
-            return
-        
-        # Create a card for each candidate
-        for candidate in self.candidates:
-            # Find candidate data
-            candidate_data = None
-            for voter in self.voters.values():
-                if voter.get('is_candidate', False) and voter['full_name'] == candidate:
-                    candidate_data = voter
-                    break
-            
-            if not candidate_data:
-                continue
-            
-            # Card frame with border effect
-            card = tk.Frame(
-                self.candidates_frame,
-                bg='#1A1A1A',
-                padx=20,
-                pady=15,
-                relief=tk.GROOVE,
-                bd=1
-            )
-            card.pack(fill='x', padx=10, pady=5)
-            
-            # Left side: Candidate info
-            info_frame = tk.Frame(card, bg='#1A1A1A')
-            info_frame.pack(side=tk.LEFT, fill='both', expand=True)
-            
-            # Candidate name
-            tk.Label(
-                info_frame,
-                text=candidate,
-                font=('Arial', 14, 'bold'),
-                bg='#1A1A1A',
-                fg='#00BFFF'
-            ).pack(anchor='w')
-            
-            # Party and Position
-            party = candidate_data.get('party', 'Independent')
-            position = candidate_data.get('desired_position', 'Not specified')
-            
-            tk.Label(
-                info_frame,
-                text=f"Party: {party} | Running for: {position}",
-                font=('Arial', 10),
-                bg='#1A1A1A',
-                fg='#888888'
-            ).pack(anchor='w')
-            
-            # View Details button
-            details_btn = tk.Button(
-                info_frame,
-                text="View Details",
-                command=lambda c=candidate_data: self.show_candidate_details_popup(c),
-                font=('Arial', 10),
-                bg='#2C2C2C',
-                fg='white',
-                relief=tk.FLAT,
-                padx=10,
-                pady=2,
-                cursor='hand2'
-            )
-            details_btn.pack(anchor='w', pady=5)
-            
-            # Add hover effect for details button
-            details_btn.bind('<Enter>', lambda e: e.widget.configure(bg='#404040'))
-            details_btn.bind('<Leave>', lambda e: e.widget.configure(bg='#2C2C2C'))
-            
-            # Right side: Vote button or vote count
-            if is_admin:
-                tk.Label(
-                    card,
-                    text=f"Votes: {self.candidates[candidate]}",
-                    font=self.style['font'],
-                    bg='#1A1A1A',
-                    fg='#00BFFF'
-                ).pack(side=tk.RIGHT, padx=10)
-            else:
-                vote_btn = tk.Button(
-                    card,
-                    text="🗳️ Vote",
-                    command=lambda c=candidate: self.vote(c),
-                    font=self.style['font'],
-                    bg='#00BFFF',
-                    fg='white',
-                    relief=tk.FLAT,
-                    padx=20,
-                    pady=5,
-                    cursor='hand2'
-                )
-                vote_btn.pack(side=tk.RIGHT, padx=10)
-                
-                # Add hover effect
-                vote_btn.bind('<Enter>', lambda e: e.widget.configure(bg='#33CCFF'))
-                vote_btn.bind('<Leave>', lambda e: e.widget.configure(bg='#00BFFF'))
+        # Reuse the existing cards unless the screen was rebuilt
+        pool = getattr(self, 'card_pool', None)
+        if pool is None or pool.frame is not self.candidates_frame or pool.is_admin != is_admin:
+            self.card_pool = CandidateCardPool(self, self.candidates_frame, is_admin)
+        self.card_pool.refresh()
+
+    def card_scroll_command(self, scrollbar):
+        """yscrollcommand for the candidate canvas that builds more cards near the bottom"""
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            pool = getattr(self, 'card_pool', None)
+            if pool is not None and float(last) >= 0.9:
+                pool.load_more()
+        return on_scroll
 
     def on_frame_configure(self, event=None):
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
@@ -1257,80 +4426,183 @@ class VotingSystem:
             
     def vote(self, candidate):
         """Cast a vote for a candidate"""
-        # Get candidate's role
-        candidate_role = None
-        for voter in self.voters.values():
-            if voter.get('is_candidate', False) and voter['full_name'] == candidate:
-                candidate_role = voter.get('desired_position')
-                break
-        
-        if not candidate_role:
-            messagebox.showerror("Error", "Could not determine candidate's role!")
+        try:
+            ballot = self.engine.cast(self.current_user, candidate)
+        except AlreadyVoted as error:
+            messagebox.showwarning("Warning", str(error))
             return
-        
-        # Check if voter has already voted for this role
-        for vote in self.voting_history:
-            if vote['voter'] == self.current_user:
-                voted_candidate = None
-                # Find the role of the candidate they voted for
-                for voter in self.voters.values():
-                    if voter.get('is_candidate', False) and voter['full_name'] == vote['candidate']:
-                        voted_role = voter.get('desired_position')
-                        if voted_role == candidate_role:
-                            messagebox.showwarning(
-                                "Warning", 
-                                f"You have already voted for a {candidate_role}!\n"
-                                f"Your vote was cast for {vote['candidate']}"
-                            )
-                            return
-        
-        # If not voted for this role before, proceed with voting
-        self.candidates[candidate] += 1
-        self.voting_history.append({
-            'candidate': candidate,
-            'voter': self.current_user,
-            'role': candidate_role,
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
-        self.save_votes()
-        self.update_candidates_display(False)
-        messagebox.showinfo("Success", f"Vote cast for {candidate} as {candidate_role}")
-        
+        except ElectionError as error:
+            messagebox.showerror("Error", str(error))
+            return
+        self.schedule_sync()
+        # Only the cards for this role change state
+        self.card_pool.refresh(self.candidate_index.names_for(ballot.role))
+        messagebox.showinfo("Success", f"Vote cast for {candidate} as {ballot.role}")
+        
+    def current_tally(self):
+        """The tally engine, brought up to date with any candidate changes"""
+        return self.engine.current_tally()
+
     def update_results_display(self):
         for widget in self.results_frame.winfo_children():
             widget.destroy()
-            
-        sorted_candidates = sorted(
-            self.candidates.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )
         
-        for candidate, votes in sorted_candidates:
-            frame = tk.Frame(self.results_frame, bg=self.style['highlight_bg'])
-            frame.pack(fill='x', pady=2)
-            
+        tally = self.current_tally()
+        for position in tally.positions():
+            # Position header with the votes cast for it
             tk.Label(
-                frame,
-                text=f"{candidate}:",
-                font=self.style['font'],
-                bg=self.style['highlight_bg'],
+                self.results_frame,
+                text=f"{position} ({tally.position_total(position)} votes)",
+                font=(self.style['font'][0], self.style['font'][1], 'bold'),
+                bg=self.style['bg'],
                 fg=self.style['fg']
-            ).pack(side=tk.LEFT, padx=5)
+            ).pack(anchor='w', pady=(8, 2))
             
-            tk.Label(
-                frame,
-                text=str(votes),
-                font=self.style['font'],
-                bg=self.style['highlight_bg'],
-                fg=self.style['fg']
-            ).pack(side=tk.RIGHT, padx=5)
+            for rank, candidate, votes, percentage in tally.standings(position):
+                frame = tk.Frame(self.results_frame, bg=self.style['highlight_bg'])
+                frame.pack(fill='x', pady=2)
+                
+                tk.Label(
+                    frame,
+                    text=f"{rank}. {candidate}:",
+                    font=self.style['font'],
+                    bg=self.style['highlight_bg'],
+                    fg=self.style['fg']
+                ).pack(side=tk.LEFT, padx=5)
+                
+                tk.Label(
+                    frame,
+                    text=f"{votes} ({percentage:.1f}%)",
+                    font=self.style['font'],
+                    bg=self.style['highlight_bg'],
+                    fg=self.style['fg']
+                ).pack(side=tk.RIGHT, padx=5)
+            
+    def voter_ballots(self, username):
+        """Ballots cast by username, found through the analytics arrays once they are loaded"""
+        history = self.voting_history
+        if self.analytics is not None:
+            return [history[i] for i in self.analytics.sync(history).voter_rows(username)]
+        return [vote for vote in history if vote.get('voter') == username]
+
+    def voter_group(self, attribute):
+        """Function mapping a username to its demographic group for HistoryAnalytics.demographics()"""
+        today = datetime.now()
+        
+        def group(username):
+            data = self.voters.get(username) or {}
+            if attribute == 'age':
+                try:
+                    age = (today - datetime.strptime(data['date_of_birth'], '%Y-%m-%d')).days // 365
+                except (KeyError, ValueError):
+                    return 'Unknown'
+                for low, high in ((18, 24), (25, 34), (35, 44), (45, 54), (55, 64)):
+                    if age <= high:
+                        return f"{low}-{high}" if age >= low else f"Under {low}"
+                return "65+"
+            if attribute == 'state':
+                return (data.get('address') or {}).get('state') or 'Not specified'
+            return data.get(attribute) or 'Not specified'
+        return group
+
+    def show_analytics(self):
+        """Turnout and demographic breakdowns of the voting history"""
+        if self.analytics is None:
+            try:
+                self.analytics = HistoryAnalytics()
+            except ImportError:
+                messagebox.showerror("Missing Library", "The numpy library is required for analytics.\nInstall it with: pip install numpy")
+                return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Voting Analytics")
+        window.geometry("900x600")
+        window.configure(bg=self.style['bg'])
+        
+        # Report name -> (column headings, function returning the rows)
+        hours = [f"{hour:02d}" for hour in range(24)]
+        reports = {
+            "Turnout per hour": (
+                ('Hour', 'Ballots'), lambda a: a.turnout(3600)),
+            "Turnout per day": (
+                ('Day', 'Ballots'), lambda a: a.turnout(86400)),
+            "New voters per hour": (
+                ('Hour', 'Voters'), lambda a: a.turnout(3600, distinct_voters=True)),
+            "Ballots per role": (
+                ('Role', 'Ballots'), lambda a: sorted(a.role_counts().items())),
+            "Candidate votes by hour of day": (
+                ('Candidate', *hours), lambda a: [(name, *counts) for name, counts in sorted(a.candidate_by_hour().items())]),
+        }
+        for label, attribute in (("gender", 'gender'), ("age group", 'age'), ("state/province", 'state')):
+            reports[f"Votes by {label}"] = (
+                (label.capitalize(), 'Candidate', 'Ballots'),
+                lambda a, attribute=attribute: [
+                    (group, candidate, count)
+                    for group, counts in sorted(a.demographics(self.voter_group(attribute)).items())
+                    for candidate, count in sorted(counts.items())
+                ]
+            )
+        
+        # Report picker
+        top_frame = tk.Frame(window, bg=self.style['bg'])
+        top_frame.pack(fill='x', padx=20, pady=10)
+        
+        tk.Label(
+            top_frame,
+            text="Report:",
+            font=self.style['font'],
+            bg=self.style['bg'],
+            fg=self.style['fg']
+        ).pack(side=tk.LEFT)
+        
+        report_var = tk.StringVar(value=next(iter(reports)))
+        ttk.Combobox(
+            top_frame,
+            textvariable=report_var,
+            values=list(reports),
+            state='readonly',
+            width=35
+        ).pack(side=tk.LEFT, padx=10)
+        
+        status = tk.Label(
+            top_frame,
+            font=('Arial', 10),
+            bg=self.style['bg'],
+            fg='#888888'
+        )
+        status.pack(side=tk.RIGHT)
+        
+        # Report table
+        table_frame = tk.Frame(window, bg=self.style['bg'])
+        table_frame.pack(fill='both', expand=True, padx=20, pady=(0, 20))
+        
+        tree = ttk.Treeview(table_frame, show='headings')
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(fill='both', expand=True)
+        
+        def show_report(event=None):
+            columns, compute = reports[report_var.get()]
+            start = time.perf_counter()
+            rows = compute(self.analytics.sync(self.voting_history))
+            elapsed = (time.perf_counter() - start) * 1000
             
+            tree.delete(*tree.get_children())
+            tree['columns'] = columns
+            for col in columns:
+                tree.heading(col, text=col)
+                tree.column(col, width=40 if len(columns) > 10 and col != columns[0] else 150)
+            for row in rows:
+                tree.insert('', 'end', values=row)
+            status.configure(text=f"{self.analytics.count:,} ballots, {elapsed:.1f} ms")
+        
+        report_var.trace_add('write', lambda *args: show_report())
+        show_report()
+
     def reset_votes(self):
         if messagebox.askyesno("Confirm Reset", "Are you sure you want to reset all votes?"):
-            self.candidates = {candidate: 0 for candidate in self.candidates}
-            self.voting_history = []
-            self.save_votes()
+            self.engine.reset_votes()
             
             # Update results display first
             self.update_results_display()
@@ -1342,90 +4614,154 @@ class VotingSystem:
 
     def export_results(self):
         """Export voting results as PDF"""
-        try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import letter
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-        except ImportError:
+        # Check without importing, ReportLab is only loaded once a PDF is actually built
+        if importlib.util.find_spec('reportlab') is None:
             # If reportlab is not installed, fall back to text file export
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"voting_results_{timestamp}.txt"
-            
-            with open(filename, 'w') as f:
-                f.write("Voting Results Summary\n")
-                f.write("=====================\n\n")
-                
-                sorted_candidates = sorted(
-                    self.candidates.items(),
-                    key=lambda x: x[1],
-                    reverse=True
-                )
-                
-                total_votes = sum(self.candidates.values())
-                
-                for candidate, votes in sorted_candidates:
-                    percentage = (votes / total_votes * 100) if total_votes > 0 else 0
-                    f.write(f"{candidate}: {votes} votes ({percentage:.1f}%)\n")
-                
-                f.write("\n\nVoting History\n")
-                f.write("==============\n\n")
-                
-                for vote in self.voting_history:
-                    f.write(f"{vote['timestamp']}: {vote['voter']} voted for {vote['candidate']}\n")
-                
-            messagebox.showinfo("Success", f"Results exported to {filename}")
-            
-            # Open the file with the default text editor
-            try:
-                if os.name == 'nt':  # Windows
-                    os.startfile(filename)
-                elif os.name == 'posix':  # macOS and Linux
-                    import subprocess
-                    subprocess.call(('open' if sys.platform == 'darwin' else 'xdg-open', filename))
-            except Exception as e:
-                messagebox.showwarning("Warning", f"File created but could not be opened automatically.\nLocation: {os.path.abspath(filename)}")
+            self.export_results_as_text()
             return
+        self.export_results_as_pdf()
+
+    def results_rows(self):
+        """(position, rank, candidate, party, votes, percentage) rows, grouped by position in rank order"""
+        return self.engine.results_rows()
 
-        # Rest of the PDF export code...
+    def history_snapshot(self):
+        """The ballots cast so far as (history, count), see ElectionEngine.history_snapshot()"""
+        return self.engine.history_snapshot()
+
+    def export_results_as_text(self):
+        """Export voting results and history as a text file, streamed in chunks"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"voting_results_{timestamp}.pdf"
+        filename = f"voting_results_{timestamp}.txt"
+        results = self.results_rows()
+        snapshot = self.history_snapshot()
         
-        # Create the PDF document
-        doc = SimpleDocTemplate(filename, pagesize=letter)
-        elements = []
+        def build(task):
+            return self.engine.write_export(task, filename, self.engine.report_lines(results, snapshot, task))
         
-        # ... (rest of the existing PDF export code)
+        self.run_export(build, "Text file")
+
+    def export_history_as_csv(self):
+        """Export the voting history as CSV, streamed in chunks"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"voting_history_{timestamp}.csv"
+        snapshot = self.history_snapshot()
         
-        # Build PDF
-        try:
-            doc.build(elements)
-            messagebox.showinfo("Success", f"Results exported to {filename}")
-            # Open the PDF file
-            try:
-                if os.name == 'nt':  # Windows
-                    os.startfile(filename)
-                elif os.name == 'posix':  # macOS and Linux
-                    import subprocess
-                    subprocess.call(('open' if sys.platform == 'darwin' else 'xdg-open', filename))
-            except Exception as e:
-                messagebox.showwarning("Warning", f"PDF created but could not be opened automatically.\nLocation: {os.path.abspath(filename)}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to create PDF: {str(e)}")
+        def build(task):
+            def write(f, data):
+                csv.writer(f).writerows(data)
+            
+            return self.engine.write_export(
+                task, filename, self.engine.history_rows(snapshot, task), write=write, newline=''
+            )
+        
+        self.run_export(build, "CSV file")
+
+    def voter_roll_snapshot(self):
+        """(username, record) pairs for a worker to read while the app keeps running"""
+        if hasattr(self.storage, 'read_voters'):
+            # Rows are read over their own connection, so pending edits go out first
+            self.flush_storage()
+            return self.storage.read_voters()
+        return list(self.voters.items())
+
+    def export_voter_roll(self):
+        """Export the voter roll as CSV, streamed on a worker
+
+        One-way: the columns are VOTER_ROLL_EXPORT_COLUMNS, the import
+        layout without passwords, so import_voter_roll() rejects every row
+        of an export until a password column is added.
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"voter_roll_{timestamp}.csv"
+        snapshot = self.voter_roll_snapshot()
+        
+        def build(task):
+            def rows():
+                yield VOTER_ROLL_EXPORT_COLUMNS
+                for count, (username, data) in enumerate(snapshot, 1):
+                    if data.get('is_candidate', False):
+                        continue
+                    if count % 5000 == 0:
+                        task.progress(f"Writing voter {count:,}...")
+                    address = data.get('address') or {}
+                    yield [
+                        username if column == 'username'
+                        else address.get(column[8:], '') if column.startswith('address.')
+                        else data.get(column, '')
+                        for column in VOTER_ROLL_EXPORT_COLUMNS
+                    ]
+            
+            def write(f, data):
+                csv.writer(f).writerows(data)
+            
+            return self.engine.write_export(task, filename, rows(), write=write, newline='')
+        
+        self.run_export(build, "CSV file")
+
+    def import_voter_roll(self):
+        """Bulk-register voters from a CSV, JSONL or JSON file
+
+        Rows are read and validated on a worker with the registration
+        rules; the accepted ones are added and saved in one go, and the
+        rejected ones are written to an error report. Every row needs a
+        password, so a file from export_voter_roll() is not accepted as is.
+        """
+        filename = filedialog.askopenfilename(
+            title="Import Voter Roll",
+            filetypes=[
+                ('Voter roll', '*.csv *.jsonl *.json'),
+                ('All files', '*.*')
+            ]
+        )
+        if not filename:
+            return
+        # The worker checks identities against a copy taken before it starts
+        validator = self.voter_rules.using(self.identity.snapshot())
+        
+        def build(task):
+            # Each accepted row's password is hashed here too, see hash_fixture_password()
+            return VoterRollImport(validator, self.credentials).run(read_fixture(filename), task)
+        
+        def on_done(result):
+            added = 0
+            for username, (number, record) in result.accepted.items():
+                # Registered while the import was running
+                message = self.voter_rules.conflict(username, record)
+                if message is not None:
+                    result.reject(number, username, message)
+                    continue
+                self.voters[username] = record
+                self.identity.add(username, record)
+                added += 1
+            if added:
+                self.save_voters()
+                self.flush_storage()
+                self.voter_search = None  # Rebuilt on the next search
+                if self.voters_tree.winfo_exists():
+                    self.update_voters_list()
+            
+            message = f"Imported {added:,} of {result.rows:,} voters."
+            if result.errors:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                report = result.write_report(f"voter_import_errors_{timestamp}.csv")
+                message += f"\n{len(result.errors):,} rows were rejected, see {os.path.abspath(report)}"
+                messagebox.showwarning("Import Finished", message)
+            else:
+                messagebox.showinfo("Import Finished", message)
+        
+        self.run_in_background(build, "Importing voters", on_done, "import the voter roll")
 
     def show_results(self):
         result_text = "Voting Results:\n\n"
         if not self.candidates:
             result_text += "No candidates yet!"
         else:
-            sorted_candidates = sorted(
-                self.candidates.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )
-            for candidate, votes in sorted_candidates:
-                result_text += f"{candidate}: {votes} votes\n"
+            tally = self.current_tally()
+            for position in tally.positions():
+                result_text += f"{position}:\n"
+                for rank, candidate, votes, percentage in tally.standings(position):
+                    result_text += f"  {rank}. {candidate}: {votes} votes ({percentage:.1f}%)\n"
             
         messagebox.showinfo("Results", result_text)
 
@@ -1772,59 +5108,27 @@ class VotingSystem:
             if isinstance(entry, tuple):  # Date field
                 year, month, day = entry
                 try:
-                    # Validate and format date
-                    date_str = f"{year.get()}-{int(month.get()):02d}-{int(day.get()):02d}"
-                    # Verify it's a valid date
-                    datetime.strptime(date_str, '%Y-%m-%d')
-                    data[field] = date_str
+                    # Format the date, RegistrationValidator checks it is a real one
+                    data[field] = f"{year.get()}-{int(month.get()):02d}-{int(day.get()):02d}"
                 except (ValueError, TypeError):
                     messagebox.showerror("Error", f"Invalid date format for {field}")
                     return
-            else:
-                data[field] = entry.get().strip()
-        
-        # Validation
-        if not all(data.values()):
-            messagebox.showerror("Error", "All fields are required!")
-            return
-        
-        if data['Password'] != data['Confirm Password']:
-            messagebox.showerror("Error", "Passwords do not match!")
-            return
-        
-        # Validate email format
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, data['Email Address']):
-            messagebox.showerror("Error", "Invalid email address!")
-            return
-        
-        # Validate date format
-        try:
-            year, month, day = entries['Date of Birth']  # Get the tuple of year, month, day comboboxes
-            try:
-                # Construct date string
-                date_str = f"{year.get()}-{int(month.get()):02d}-{int(day.get()):02d}"
-                birth_date = datetime.strptime(date_str, '%Y-%m-%d')
-                age = (datetime.now() - birth_date).days // 365
-                if age < 18:
-                    messagebox.showerror("Error", "Must be 18 or older to register!")
-                    return
-            except (ValueError, TypeError):
-                messagebox.showerror("Error", "Invalid date format! Please select valid date.")
-                return
-        except KeyError:
-            messagebox.showerror("Error", "Date of Birth is required!")
+            else:
+                data[field] = entry.get().strip()
+        
+        # Validation
+        if not all(data.values()):
+            messagebox.showerror("Error", "All fields are required!")
             return
         
-        if data['Username'] in self.voters or data['Username'] in self.admin_data:
-            messagebox.showerror("Error", "Username already exists!")
+        if data['Password'] != data['Confirm Password']:
+            messagebox.showerror("Error", "Passwords do not match!")
             return
         
-        # Add voter with extended information
-        self.voters[data['Username']] = {
-            'password': hashlib.sha256(data['Password'].encode()).hexdigest(),
+        record = {
+            'password': data['Password'],
             'full_name': data['Full Name'],
-            'date_of_birth': date_str,
+            'date_of_birth': data['Date of Birth'],
             'national_id': data['National ID Number'],
             'phone': data['Phone Number'],
             'email': data['Email Address'],
@@ -1840,10 +5144,26 @@ class VotingSystem:
             'is_candidate': False,
             'registration_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
+        try:
+            self.engine.validate(data['Username'], record)
+        except ElectionError as error:
+            messagebox.showerror("Error", str(error))
+            return
+        
+        def add(password_hash):
+            try:
+                # Add voter with extended information (checked again, the form stayed usable meanwhile)
+                self.engine.register(data['Username'], dict(record, password=password_hash), hashed=True)
+            except ElectionError as error:
+                messagebox.showerror("Error", str(error))
+                return
+            
+            self.refresh_search_entries(data['Username'])
+            messagebox.showinfo("Success", "Registration successful! You can now login.")
+            if window.winfo_exists():
+                window.destroy()
         
-        self.save_voters()
-        messagebox.showinfo("Success", "Registration successful! You can now login.")
-        window.destroy()
+        self.hash_password(data['Password'], add)
 
     def show_candidate_registration(self):
         registration_window = tk.Toplevel(self.root)
@@ -2254,11 +5574,8 @@ class VotingSystem:
             if isinstance(entry, tuple):  # Date field
                 year, month, day = entry
                 try:
-                    # Validate and format date
-                    date_str = f"{year.get()}-{int(month.get()):02d}-{int(day.get()):02d}"
-                    # Verify it's a valid date
-                    datetime.strptime(date_str, '%Y-%m-%d')
-                    data[field] = date_str
+                    # Format the date, RegistrationValidator checks it is a real one
+                    data[field] = f"{year.get()}-{int(month.get()):02d}-{int(day.get()):02d}"
                 except (ValueError, TypeError):
                     messagebox.showerror("Error", f"Invalid date format for {field}")
                     return
@@ -2276,30 +5593,8 @@ class VotingSystem:
             messagebox.showerror("Error", "Passwords do not match!")
             return
         
-        # Validate email format
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, data['Email Address']):
-            messagebox.showerror("Error", "Invalid email address!")
-            return
-        
-        # Validate age
-        try:
-            birth_date = datetime.strptime(data['Date of Birth'], '%Y-%m-%d')
-            age = (datetime.now() - birth_date).days // 365
-            if age < 25:
-                messagebox.showerror("Error", "Must be 25 or older to register as a candidate!")
-                return
-        except ValueError:
-            messagebox.showerror("Error", "Invalid date format! Use YYYY-MM-DD")
-            return
-        
-        if data['Username'] in self.voters or data['Username'] in self.admin_data:
-            messagebox.showerror("Error", "Username already exists!")
-            return
-        
-        # Add candidate with extended information
-        self.voters[data['Username']] = {
-            'password': hashlib.sha256(data['Password'].encode()).hexdigest(),
+        record = {
+            'password': data['Password'],
             'full_name': data['Full Name'],
             'date_of_birth': data['Date of Birth'],
             'national_id': data['National ID Number'],
@@ -2326,14 +5621,26 @@ class VotingSystem:
             'vision': data['Vision Statement'],
             'registration_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
+        try:
+            self.engine.validate(data['Username'], record)
+        except ElectionError as error:
+            messagebox.showerror("Error", str(error))
+            return
         
-        # Add to candidates list
-        self.candidates[data['Full Name']] = 0
+        def add(password_hash):
+            try:
+                # Add candidate with extended information, and to the candidates list
+                self.engine.register(data['Username'], dict(record, password=password_hash), hashed=True)
+            except ElectionError as error:
+                messagebox.showerror("Error", str(error))
+                return
+            self.refresh_search_entries(data['Username'])
+            
+            messagebox.showinfo("Success", "Candidate registration successful! You can now login.")
+            if window.winfo_exists():
+                window.destroy()
         
-        self.save_voters()
-        self.save_votes()
-        messagebox.showinfo("Success", "Candidate registration successful! You can now login.")
-        window.destroy()
+        self.hash_password(data['Password'], add)
 
     def show_profile(self):
         """Show user profile and voting history"""
@@ -2450,12 +5757,11 @@ class VotingSystem:
         
         # Group votes by role
         user_votes = {}
-        for vote in self.voting_history:
-            if vote.get('voter') == self.current_user:
-                role = vote.get('role', 'Unknown Role')
-                if role not in user_votes:
-                    user_votes[role] = []
-                user_votes[role].append(vote)
+        for vote in self.voter_ballots(self.current_user):
+            role = vote.get('role', 'Unknown Role')
+            if role not in user_votes:
+                user_votes[role] = []
+            user_votes[role].append(vote)
         
         if user_votes:
             for role, votes in user_votes.items():
@@ -2615,11 +5921,6 @@ class VotingSystem:
             new = new_pass.get()
             confirm = confirm_pass.get()
             
-            # Validate current password
-            if hashlib.sha256(current.encode()).hexdigest() != self.voters[self.current_user]['password']:
-                messagebox.showerror("Error", "Current password is incorrect!")
-                return
-            
             if new != confirm:
                 messagebox.showerror("Error", "New passwords do not match!")
                 return
@@ -2628,11 +5929,15 @@ class VotingSystem:
                 messagebox.showerror("Error", "Password must be at least 6 characters!")
                 return
             
-            # Update password
-            self.voters[self.current_user]['password'] = hashlib.sha256(new.encode()).hexdigest()
-            self.save_voters()
-            messagebox.showinfo("Success", "Password changed successfully!")
-            change_window.destroy()
+            def store(new_hash):
+                # Update password
+                self.engine.set_password(self.current_user, new_hash)
+                messagebox.showinfo("Success", "Password changed successfully!")
+                if change_window.winfo_exists():
+                    change_window.destroy()
+            
+            # Validate current password, then hash the new one, both on a worker
+            self.confirm_password(self.current_user, 'voter', current, store, new_password=new)
         
         # Buttons frame
         btn_frame = tk.Frame(change_window, bg=self.style['bg'])
@@ -2671,67 +5976,114 @@ class VotingSystem:
         cancel_btn.bind('<Enter>', lambda e: e.widget.configure(bg='#FF6666'))
         cancel_btn.bind('<Leave>', lambda e: e.widget.configure(bg='#FF4444'))
 
+    def list_usernames(self, candidates=False):
+        """Usernames of all voters (or all candidates), in registration order"""
+        if hasattr(self.voters, 'usernames'):
+            return self.voters.usernames(candidates)
+        return [
+            username for username, data in self.voters.items()
+            if data.get('is_candidate', False) == candidates
+        ]
+
+    def peek_voter(self, username):
+        """A voter record for display only, read without filling the SQLite map's cache"""
+        if hasattr(self.voters, 'peek'):
+            return self.voters.peek(username)
+        return self.voters[username]
+
+    def voter_row(self, username):
+        """Treeview values for one voter"""
+        data = self.peek_voter(username)
+        return (
+            username,
+            data['full_name'],
+            data['email'],
+            data['phone'],
+            data['registration_date']
+        )
+
+    def candidate_row(self, full_name):
+        """Treeview values for one candidate"""
+        _, data = self.find_candidate(full_name)
+        if data is None:
+            raise KeyError(full_name)
+        return (
+            data['full_name'],
+            data.get('party', 'Independent'),
+            self.candidates.get(data['full_name'], 0),
+            data['registration_date']
+        )
+
     def update_voters_list(self):
         """Update the voters treeview"""
-        for item in self.voters_tree.get_children():
-            self.voters_tree.delete(item)
-        
-        for username, data in self.voters.items():
-            if not data.get('is_candidate', False):  # Show only voters
-                self.voters_tree.insert('', 'end', values=(
-                    username,
-                    data['full_name'],
-                    data['email'],
-                    data['phone'],
-                    data['registration_date']
-                ))
+        self.voters_view.set_keys(self.list_usernames(candidates=False))  # Show only voters
 
     def update_candidates_list(self):
         """Update the candidates treeview"""
-        for item in self.candidates_tree.get_children():
-            self.candidates_tree.delete(item)
-        
-        for username, data in self.voters.items():
-            if data.get('is_candidate', False):  # Show only candidates
-                self.candidates_tree.insert('', 'end', values=(
-                    data['full_name'],
-                    data.get('party', 'Independent'),
-                    self.candidates.get(data['full_name'], 0),
-                    data['registration_date']
-                ))
+        self.candidates_view.set_keys(list(self.candidate_index.by_name))
+
+    def voter_search_index(self):
+        """Search index over voter username, full name and email"""
+        if self.voter_search is None:
+            self.voter_search = SearchIndex()
+            self.voter_search.build(
+                (username, (username, data['full_name'], data.get('email', '')))
+                for username, data in self.voters.items()
+                if not data.get('is_candidate', False)
+            )
+        return self.voter_search
+
+    def candidate_search_index(self):
+        """Search index over candidate full name, party and email"""
+        if self.candidate_search is None:
+            self.candidate_search = SearchIndex()
+            entries = []
+            for full_name in self.candidate_index.by_name:
+                _, data = self.find_candidate(full_name)
+                if data is not None:
+                    entries.append((full_name, (full_name, data.get('party', ''), data.get('email', ''))))
+            self.candidate_search.build(entries)
+        return self.candidate_search
+
+    def refresh_search_entries(self, username, old_full_name=None):
+        """Update the search indexes after a voter was added, edited or deleted"""
+        data = self.voters[username] if username in self.voters else None
+        is_candidate = data is not None and data.get('is_candidate', False)
+        
+        if self.voter_search is not None:
+            if data is not None and not is_candidate:
+                self.voter_search.add(username, username, data['full_name'], data.get('email', ''))
+            else:
+                self.voter_search.remove(username)
+        
+        if self.candidate_search is not None:
+            if old_full_name:
+                self.candidate_search.remove(old_full_name)
+            if is_candidate:
+                self.candidate_search.add(
+                    data['full_name'], data['full_name'], data.get('party', ''), data.get('email', '')
+                )
+
+    def debounce_search(self, search, entry, delay=150):
+        """Run a search once typing pauses instead of on every keystroke"""
+        job = self._search_jobs.pop(search.__name__, None)
+        if job is not None:
+            self.root.after_cancel(job)
+        
+        def run():
+            self._search_jobs.pop(search.__name__, None)
+            if entry.winfo_exists():
+                search(entry.get())
+        
+        self._search_jobs[search.__name__] = self.root.after(delay, run)
 
     def search_voters(self, query):
-        """Search voters by name or username"""
-        for item in self.voters_tree.get_children():
-            self.voters_tree.delete(item)
-        
-        for username, data in self.voters.items():
-            if not data.get('is_candidate', False):
-                if (query.lower() in username.lower() or 
-                    query.lower() in data['full_name'].lower()):
-                    self.voters_tree.insert('', 'end', values=(
-                        username,
-                        data['full_name'],
-                        data['email'],
-                        data['phone'],
-                        data['registration_date']
-                    ))
+        """Search voters by username, name or email"""
+        self.voters_view.set_keys(self.voter_search_index().search(query))
 
     def search_candidates(self, query):
-        """Search candidates by name or party"""
-        for item in self.candidates_tree.get_children():
-            self.candidates_tree.delete(item)
-        
-        for username, data in self.voters.items():
-            if data.get('is_candidate', False):
-                if (query.lower() in data['full_name'].lower() or 
-                    query.lower() in data.get('party', '').lower()):
-                    self.candidates_tree.insert('', 'end', values=(
-                        data['full_name'],
-                        data.get('party', 'Independent'),
-                        self.candidates.get(data['full_name'], 0),
-                        data['registration_date']
-                    ))
+        """Search candidates by name, party or email"""
+        self.candidates_view.set_keys(self.candidate_search_index().search(query))
 
     def view_candidate_details(self, selection):
         """Show detailed information about selected candidate"""
@@ -2739,17 +6091,12 @@ class VotingSystem:
             messagebox.showwarning("Warning", "Please select a candidate first!")
             return
         
-        item = selection[0]
-        candidate_name = self.candidates_tree.item(item)['values'][0]
+        candidate_name = self.candidates_view.key_for(selection[0])
+        if candidate_name is None:
+            return
         
         # Find candidate data
-        candidate_data = None
-        candidate_username = None
-        for username, data in self.voters.items():
-            if data.get('is_candidate') and data['full_name'] == candidate_name:
-                candidate_data = data
-                candidate_username = username
-                break
+        candidate_username, candidate_data = self.find_candidate(candidate_name)
         
         if candidate_data:
             details_window = tk.Toplevel(self.root)
@@ -2917,8 +6264,6 @@ class VotingSystem:
                             show="•",
                             width=30
                         )
-                        if current_value:
-                            entry.insert(0, current_value)
                         
                         # Add show/hide password toggle
                         show_var = tk.BooleanVar()
@@ -3017,7 +6362,6 @@ class VotingSystem:
                         year, month, day = entry
                         try:
                             date_str = f"{year.get()}-{int(month.get()):02d}-{int(day.get()):02d}"
-                            datetime.strptime(date_str, '%Y-%m-%d')  # Validate date
                             if '.' in field_name:
                                 parts = field_name.split('.')
                                 if parts[0] not in updated_data:
@@ -3047,26 +6391,49 @@ class VotingSystem:
                         else:
                             updated_data[field_name] = value
                 
-                # Update the voter data
-                self.voters[candidate_username].update(updated_data)
+                # Only ever stored as a hash, never as a field of the record
+                new_password = updated_data.pop('new_password', '')
                 
-                # Update password if new one is provided
-                new_password = entries.get('new_password')
-                if new_password and new_password.get().strip():
-                    self.voters[candidate_username]['password'] = hashlib.sha256(
-                        new_password.get().strip().encode()
-                    ).hexdigest()
+                problem = self.profile_rules.check(candidate_username, updated_data, editing=True)
+                if problem is not None:
+                    messagebox.showerror("Error", f"{problem}!")
+                    return
                 
-                # Update candidates list if name changed
-                if updated_data['full_name'] != candidate_name:
-                    votes = self.candidates.pop(candidate_name)
-                    self.candidates[updated_data['full_name']] = votes
+                def apply(password_hash=None):
+                    # Checked again when the password was hashed first, the window stayed usable meanwhile
+                    problem = self.profile_rules.check(candidate_username, updated_data, editing=True)
+                    if problem is not None:
+                        messagebox.showerror("Error", f"{problem}!")
+                        return
+                    
+                    # Update the voter data
+                    self.identity.remove(candidate_username, self.voters[candidate_username])
+                    self.voters[candidate_username].update(updated_data)
+                    self.voters[candidate_username].pop('new_password', None)  # Left in the record by older versions
+                    self.identity.add(candidate_username, self.voters[candidate_username])
+                    
+                    # Update password if new one is provided
+                    if password_hash is not None:
+                        self.voters[candidate_username]['password'] = password_hash
+                    
+                    # Update candidates list if name changed
+                    if updated_data['full_name'] != candidate_name:
+                        votes = self.candidates.pop(candidate_name)
+                        self.candidates[updated_data['full_name']] = votes
+                    self.candidate_index.update(candidate_name, candidate_username, self.voters[candidate_username])
+                    self.refresh_search_entries(candidate_username, candidate_name)
+                    
+                    self.save_voters()
+                    self.save_votes()
+                    self.update_candidates_list()
+                    if details_window.winfo_exists():
+                        details_window.destroy()
+                    messagebox.showinfo("Success", "Candidate information updated successfully!")
                 
-                self.save_voters()
-                self.save_votes()
-                self.update_candidates_list()
-                details_window.destroy()
-                messagebox.showinfo("Success", "Candidate information updated successfully!")
+                if new_password:
+                    self.hash_password(new_password, apply)
+                else:
+                    apply()
             
             # Buttons frame
             btn_frame = tk.Frame(scrollable_frame, bg=self.style['bg'])
@@ -3407,11 +6774,6 @@ class VotingSystem:
             return
             
         current_admin = next(iter(self.admin_data.keys()))
-        
-        # Verify current password
-        if hashlib.sha256(current_password.encode()).hexdigest() != self.admin_data[current_admin]:
-            messagebox.showerror("Error", "Current password is incorrect!")
-            return
             
         # Validate new username
         if len(new_username) < 4:
@@ -3421,14 +6783,22 @@ class VotingSystem:
         if new_username in self.voters:
             messagebox.showerror("Error", "Username already exists!")
             return
+        
+        def rename(_):
+            if current_admin not in self.admin_data or new_username in self.voters:
+                messagebox.showerror("Error", "Username already exists!")
+                return
+            # Update admin username
+            self.admin_data[new_username] = self.admin_data.pop(current_admin)
+            self.save_admin()
             
-        # Update admin username
-        self.admin_data[new_username] = self.admin_data.pop(current_admin)
-        self.save_admin()
+            messagebox.showinfo("Success", "Admin username updated successfully!")
+            if window.winfo_exists():
+                window.destroy()
+            self.show_admin_settings()
         
-        messagebox.showinfo("Success", "Admin username updated successfully!")
-        window.destroy()
-        self.show_admin_settings()
+        # Verify current password on a worker
+        self.confirm_password(current_admin, 'admin', current_password, rename)
         
     def create_new_admin(self, username, password, current_password, window):
         """Create a new admin account"""
@@ -3437,11 +6807,6 @@ class VotingSystem:
             return
             
         current_admin = next(iter(self.admin_data.keys()))
-        
-        # Verify current admin's password
-        if hashlib.sha256(current_password.encode()).hexdigest() != self.admin_data[current_admin]:
-            messagebox.showerror("Error", "Your current password is incorrect!")
-            return
             
         # Validate new admin credentials
         if len(username) < 4:
@@ -3455,14 +6820,25 @@ class VotingSystem:
         if username in self.admin_data or username in self.voters:
             messagebox.showerror("Error", "Username already exists!")
             return
-            
-        # Create new admin account
-        self.admin_data[username] = hashlib.sha256(password.encode()).hexdigest()
-        self.save_admin()
         
-        messagebox.showinfo("Success", f"New admin account '{username}' created successfully!")
-        window.destroy()
-        self.show_admin_settings()
+        def create(password_hash):
+            if username in self.admin_data or username in self.voters:
+                messagebox.showerror("Error", "Username already exists!")
+                return
+            # Create new admin account
+            self.admin_data[username] = password_hash
+            self.save_admin()
+            
+            messagebox.showinfo("Success", f"New admin account '{username}' created successfully!")
+            if window.winfo_exists():
+                window.destroy()
+            self.show_admin_settings()
+        
+        # Verify current admin's password and hash the new one on a worker
+        self.confirm_password(
+            current_admin, 'admin', current_password, create, new_password=password,
+            failure="Your current password is incorrect!"
+        )
 
     def show_admin_management_interface(self, container):
         """Show admin management interface"""
@@ -3618,11 +6994,6 @@ class VotingSystem:
             new = new_pass.get()
             confirm = confirm_pass.get()
             
-            # Validate current password
-            if hashlib.sha256(current.encode()).hexdigest() != self.voters[self.current_user]['password']:
-                messagebox.showerror("Error", "Current password is incorrect!")
-                return
-            
             if new != confirm:
                 messagebox.showerror("Error", "New passwords do not match!")
                 return
@@ -3631,11 +7002,15 @@ class VotingSystem:
                 messagebox.showerror("Error", "Password must be at least 6 characters!")
                 return
             
-            # Update password
-            self.voters[self.current_user]['password'] = hashlib.sha256(new.encode()).hexdigest()
-            self.save_voters()
-            messagebox.showinfo("Success", "Password changed successfully!")
-            change_window.destroy()
+            def store(new_hash):
+                # Update password
+                self.engine.set_password(self.current_user, new_hash)
+                messagebox.showinfo("Success", "Password changed successfully!")
+                if change_window.winfo_exists():
+                    change_window.destroy()
+            
+            # Validate current password, then hash the new one, both on a worker
+            self.confirm_password(self.current_user, 'voter', current, store, new_password=new)
         
         tk.Button(
             change_window,
@@ -3720,8 +7095,8 @@ class VotingSystem:
             messagebox.showwarning("Warning", "Please select a voter to edit!")
             return
         
-        item = selection[0]
-        username = self.voters_tree.item(item)['values'][0]
+        # The row items are reused while scrolling, the view knows which voter each one shows
+        username = self.voters_view.key_for(selection[0])
         
         if username not in self.voters:
             messagebox.showerror("Error", "Voter not found!")
@@ -3813,30 +7188,43 @@ class VotingSystem:
             # Get new username and password
             new_password = entries['Password'].get().strip()
             
-            # Validate email
-            email = entries['Email'].get().strip()
-            email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            if not re.match(email_pattern, email):
-                messagebox.showerror("Error", "Invalid email address!")
-                return
-            
             # Update voter data
             updated_data = {
                 'full_name': entries['Full Name'].get().strip(),
-                'email': email,
+                'email': entries['Email'].get().strip(),
                 'phone': entries['Phone'].get().strip()
             }
+            problem = self.profile_rules.check(username, updated_data, editing=True)
+            if problem is not None:
+                messagebox.showerror("Error", f"{problem}!")
+                return
             
-            # Only update password if a new one is provided
-            if new_password:
-                updated_data['password'] = hashlib.sha256(new_password.encode('utf-8')).hexdigest()
+            def apply(password_hash=None):
+                # Checked again when the password was hashed first, the window stayed usable meanwhile
+                problem = self.profile_rules.check(username, updated_data, editing=True)
+                if problem is not None:
+                    messagebox.showerror("Error", f"{problem}!")
+                    return
+                
+                # Only update password if a new one is provided
+                if password_hash is not None:
+                    updated_data['password'] = password_hash
+                
+                # Update the voter's data
+                self.identity.remove(username, self.voters[username])
+                self.voters[username].update(updated_data)
+                self.identity.add(username, self.voters[username])
+                self.refresh_search_entries(username)
+                self.save_voters()
+                self.update_voters_list()
+                if edit_window.winfo_exists():
+                    edit_window.destroy()
+                messagebox.showinfo("Success", "Voter information updated!")
             
-            # Update the voter's data
-            self.voters[username].update(updated_data)
-            self.save_voters()
-            self.update_voters_list()
-            edit_window.destroy()
-            messagebox.showinfo("Success", "Voter information updated!")
+            if new_password:
+                self.hash_password(new_password, apply)
+            else:
+                apply()
         
         # Buttons frame
         btn_frame = tk.Frame(scrollable_frame, bg=self.style['bg'])
@@ -3874,12 +7262,17 @@ class VotingSystem:
             messagebox.showwarning("Warning", "Please select a voter to delete!")
             return
         
-        item = selection[0]
-        username = self.voters_tree.item(item)['values'][0]
+        username = self.voters_view.key_for(selection[0])
+        if username is None:
+            return
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete voter {username}?"):
             if username in self.voters:
-                del self.voters[username]
+                removed = self.voters.pop(username)
+                self.identity.remove(username, removed)
+                if removed.get('is_candidate', False):
+                    self.candidate_index.update(removed['full_name'], username, {})
+                self.refresh_search_entries(username, removed['full_name'])
                 self.save_voters()
                 self.update_voters_list()
                 messagebox.showinfo("Success", "Voter deleted successfully!")
@@ -3891,98 +7284,30 @@ class VotingSystem:
         try:
             from reportlab.lib import colors
             from reportlab.lib.pagesizes import letter
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Flowable
             from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
             from reportlab.lib.units import inch
         except ImportError:
-            if messagebox.askyesno("Missing Library", "The reportlab library is required for PDF export. Would you like to install it?"):
-                self.install_reportlab()
-                messagebox.showinfo("Success", "Please try exporting again now that reportlab is installed.")
+            messagebox.showerror("Missing Library", "The reportlab library is required for PDF export.\nInstall it with: pip install reportlab")
             return
 
         # Create timestamp for filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"voting_results_{timestamp}.pdf"
         
-        # Create the PDF document
-        doc = SimpleDocTemplate(filename, pagesize=letter)
-        elements = []
-        
-        # Add title
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30
-        )
-        elements.append(Paragraph("Voting Results Report", title_style))
-        elements.append(Spacer(1, 20))
-        
-        # Add timestamp
-        elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles["Normal"]))
-        elements.append(Spacer(1, 20))
-        
         # Prepare results data
-        total_votes = sum(self.candidates.values())
-        data = [['Candidate', 'Party', 'Votes', 'Percentage']]
-        
-        # Sort candidates by votes (descending)
-        sorted_candidates = sorted(
-            self.candidates.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )
-        
-        # Add candidate data
-        for candidate_name, votes in sorted_candidates:
-            # Find candidate's party from voters data
-            party = "Independent"
-            for voter in self.voters.values():
-                if voter.get('is_candidate', False) and voter['full_name'] == candidate_name:
-                    party = voter.get('party', 'Independent')
-                    break
-            
-            percentage = (votes / total_votes * 100) if total_votes > 0 else 0
+        data = [['Position', 'Rank', 'Candidate', 'Party', 'Votes', 'Percentage']]
+        for position, rank, candidate_name, party, votes, percentage in self.results_rows():
             data.append([
+                position,
+                str(rank),
                 candidate_name,
                 party,
                 str(votes),
                 f"{percentage:.2f}%"
             ])
         
-        # Create table
-        table = Table(data, colWidths=[2.5*inch, 2*inch, 1*inch, 1.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.blue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 12),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        elements.append(table)
-        elements.append(Spacer(1, 20))
-        
-        # Add voting history
-        elements.append(Paragraph("Voting History", styles["Heading2"]))
-        elements.append(Spacer(1, 10))
-        
-        history_data = [['Time', 'Candidate']]
-        for vote in self.voting_history:
-            history_data.append([
-                vote['timestamp'],
-                vote['candidate']
-            ])
-        
-        history_table = Table(history_data, colWidths=[3*inch, 4*inch])
-        history_table.setStyle(TableStyle([
+        history_style = TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.blue),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -3995,37 +7320,195 @@ class VotingSystem:
             ('FONTSIZE', (0, 1), (-1, -1), 10),
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
             ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        elements.append(history_table)
+        ])
+        
+        class HistoryChunk(Flowable):
+            """One slice of the history table, only built while ReportLab lays it out"""
+            def __init__(self, history, start, stop):
+                Flowable.__init__(self)
+                self.history = history
+                self.start = start
+                self.stop = stop
+                self._table = None
+            
+            def table(self):
+                if self._table is None:
+                    rows = [['Time', 'Candidate']]
+                    for i in range(self.start, self.stop):
+                        vote = self.history[i]
+                        rows.append([vote['timestamp'], vote['candidate']])
+                    self._table = Table(rows, colWidths=[3*inch, 4*inch], repeatRows=1)
+                    self._table.setStyle(history_style)
+                return self._table
+            
+            def wrap(self, availWidth, availHeight):
+                return self.table().wrap(availWidth, availHeight)
+            
+            def split(self, availWidth, availHeight):
+                parts = self.table().split(availWidth, availHeight)
+                self._table = None
+                return parts
+            
+            def drawOn(self, canvas, x, y, _sW=0):
+                self.table().drawOn(canvas, x, y, _sW)
+                self._table = None  # Drawn, let the rows go
+        
+        history, count = self.history_snapshot()
+        
+        def build(task):
+            # Runs on a worker thread: only touches the snapshots above
+            doc = SimpleDocTemplate(filename, pagesize=letter)
+            elements = []
+            
+            # Add title
+            styles = getSampleStyleSheet()
+            title_style = ParagraphStyle(
+                'CustomTitle',
+                parent=styles['Heading1'],
+                fontSize=24,
+                spaceAfter=30
+            )
+            elements.append(Paragraph("Voting Results Report", title_style))
+            elements.append(Spacer(1, 20))
+            
+            # Add timestamp
+            elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles["Normal"]))
+            elements.append(Spacer(1, 20))
+            
+            # Create table
+            table = Table(data, colWidths=[1.3*inch, 0.6*inch, 1.7*inch, 1.4*inch, 0.8*inch, 1.2*inch], repeatRows=1)
+            table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.blue),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 14),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                ('FONTSIZE', (0, 1), (-1, -1), 12),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+            elements.append(table)
+            elements.append(Spacer(1, 20))
+            
+            # Add voting history
+            elements.append(Paragraph("Voting History", styles["Heading2"]))
+            elements.append(Spacer(1, 10))
+            
+            # Page-sized slices of the history, each turned into a table only when laid out
+            for start in range(0, count, EXPORT_CHUNK_ROWS):
+                elements.append(HistoryChunk(history, start, min(start + EXPORT_CHUNK_ROWS, count)))
+            task.check()
+            
+            return self.build_pdf(task, doc, elements)
         
-        # Build PDF
+        # Build PDF in the background
+        self.run_export(build, "PDF")
+
+    @staticmethod
+    def build_pdf(task, doc, elements):
+        """Build a ReportLab document on a worker, reporting each page and honouring cancel"""
+        def on_page(canvas, doc):
+            task.progress(f"Rendering page {doc.page}...")
         try:
-            doc.build(elements)
-            messagebox.showinfo("Success", f"Results exported to {filename}")
-            # Open the PDF file
-            import os
-            os.startfile(filename)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to create PDF: {str(e)}")
+            doc.build(elements, onFirstPage=on_page, onLaterPages=on_page)
+        except TaskCancelled:
+            # Don't leave a half written report behind
+            if os.path.exists(doc.filename):
+                os.remove(doc.filename)
+            raise
+        return doc.filename
+
+    def run_export(self, build, kind):
+        """Run build(task) on a worker with a cancellable progress window, then open the result"""
+        def on_done(path):
+            messagebox.showinfo("Success", f"Results exported to {path}")
+            self.open_exported_file(path, kind)
+        
+        return self.run_in_background(build, f"Exporting {kind}", on_done, f"create {kind}")
+
+    def run_in_background(self, build, title, on_done, action):
+        """Run build(task) on a worker with a cancellable progress window, on_done(result) gets the result"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title(title)
+        dialog.configure(bg=self.style['bg'])
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        
+        status = tk.Label(
+            dialog,
+            text="Preparing...",
+            font=self.style['font'],
+            bg=self.style['bg'],
+            fg=self.style['fg']
+        )
+        status.pack(padx=20, pady=(15, 5))
+        
+        bar = ttk.Progressbar(dialog, mode='indeterminate', length=250)
+        bar.pack(padx=20, pady=5)
+        bar.start(15)
+        
+        def close():
+            if dialog.winfo_exists():
+                dialog.destroy()
+        
+        def on_progress(text):
+            if status.winfo_exists():
+                status.configure(text=text)
+        
+        def finished(result):
+            close()
+            on_done(result)
+        
+        def on_error(error):
+            close()
+            messagebox.showerror("Error", f"Failed to {action}: {str(error)}")
+        
+        task = self.executor.submit(build, on_done=finished, on_error=on_error, on_progress=on_progress)
+        
+        def cancel():
+            task.cancel()
+            close()
+        
+        tk.Button(
+            dialog,
+            text="Cancel",
+            command=cancel,
+            font=self.style['font'],
+            bg='#FF4444',
+            fg='white',
+            cursor='hand2'
+        ).pack(pady=(5, 15))
+        dialog.protocol("WM_DELETE_WINDOW", cancel)
+        return task
 
-    def install_reportlab(self):
-        """Install the reportlab library"""
+    def open_exported_file(self, filename, kind):
+        """Open an exported file with the platform's default application"""
         try:
-            import subprocess
-            subprocess.check_call(['pip', 'install', 'reportlab'])
-            return True
+            if os.name == 'nt':  # Windows
+                os.startfile(filename)
+            elif os.name == 'posix':  # macOS and Linux
+                subprocess.call(('open' if sys.platform == 'darwin' else 'xdg-open', filename))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to install reportlab: {str(e)}")
-            return False
+            messagebox.showwarning("Warning", f"{kind} created but could not be opened automatically.\nLocation: {os.path.abspath(filename)}")
 
     def save_votes(self):
         """Save votes and voting history to file"""
-        data = {
-            'candidates': self.candidates,
-            'history': self.voting_history
-        }
-        with open(self.votes_file, 'w') as f:
-            json.dump(data, f)
+        self.mark_dirty('votes')
+    
+    def schedule_sync(self):
+        """After a ballot is appended, make sure its journal batch is synced"""
+        if self.storage.pending_sync and not self._sync_pending:
+            # Make sure a trailing batch is synced even if no more votes arrive
+            self._sync_pending = True
+            self.root.after(int(self.storage.sync_interval * 1000), self.sync_storage)
+    
+    def sync_storage(self):
+        self._sync_pending = False
+        self.storage.sync()
 
     def create_candidate_interface(self):
         """Create interface for candidate users"""
@@ -4080,9 +7563,10 @@ class VotingSystem:
         stats_frame = tk.Frame(dashboard_frame, bg='#1A1A1A', padx=20, pady=20)
         stats_frame.pack(fill='x', pady=10)
         
-        votes = self.candidates.get(user_data['full_name'], 0)
-        total_votes = sum(self.candidates.values())
-        vote_percentage = (votes / total_votes * 100) if total_votes > 0 else 0
+        # Share of the votes cast for the position this candidate is running for
+        tally = self.current_tally()
+        votes = tally.votes(user_data['full_name'])
+        vote_percentage = tally.percentage(user_data['full_name'])
         
         # Stats in a grid layout
         stats_grid = tk.Frame(stats_frame, bg='#1A1A1A')
@@ -4250,21 +7734,8 @@ class VotingSystem:
         
         # Load and display profile photo if it exists
         if 'profile_photo' in user_data:
-            try:
-                image = Image.open(user_data['profile_photo'])
-                # Calculate dimensions to maintain aspect ratio within 150x150
-                width, height = image.size
-                ratio = min(150/width, 150/height)
-                new_width = int(width * ratio)
-                new_height = int(height * ratio)
-                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                photo = ImageTk.PhotoImage(image)
-                photo_display.configure(image=photo)
-                photo_display.image = photo  # Keep reference
-                self.profile_image_path = user_data['profile_photo']
-            except Exception as e:
-                photo_display.configure(text="Unable to load photo")
+            self.show_photo(photo_display, user_data['profile_photo'])
+            self.profile_image_path = user_data['profile_photo']
         
         # Rest of the profile sections...
         # Personal Information Section
@@ -4704,20 +8175,6 @@ class VotingSystem:
         preview_btn.pack(side=tk.LEFT, padx=5)
         
         def save_changes():
-            # Validate required fields
-            required_fields = ['full_name', 'email', 'phone']
-            for field in required_fields:
-                if not entries[field].get().strip():
-                    messagebox.showerror("Error", f"{field.replace('_', ' ').title()} is required!")
-                    return
-            
-            # Validate email format
-            email = entries['email'].get().strip()
-            email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            if not re.match(email_pattern, email):
-                messagebox.showerror("Error", "Invalid email address!")
-                return
-            
             # Collect updated values
             updated_data = {}
             for key, entry in entries.items():
@@ -4727,16 +8184,25 @@ class VotingSystem:
                     value = entry.get().strip()
                 updated_data[key] = value
             
-            # Update the voter data
+            problem = self.profile_rules.check(self.current_user, updated_data, editing=True)
+            if problem is not None:
+                messagebox.showerror("Error", f"{problem}!")
+                return
+            
+            # Update the voter data (user_data is the same record, so grab the old name first)
+            old_name = user_data['full_name']
+            self.identity.remove(self.current_user, user_data)
             self.voters[self.current_user].update(updated_data)
+            self.identity.add(self.current_user, user_data)
             
             # Update candidates list if name changed
             if user_data.get('is_candidate', False):
-                old_name = user_data['full_name']
                 new_name = updated_data['full_name']
                 if new_name != old_name:
-                    votes = self.candidates.pop(old_name)
+                    votes = self.candidates.pop(old_name, 0)
                     self.candidates[new_name] = votes
+                self.candidate_index.update(old_name, self.current_user, user_data)
+            self.refresh_search_entries(self.current_user, old_name)
             
             self.save_voters()
             self.save_votes()
@@ -4939,6 +8405,38 @@ class VotingSystem:
         except tk.TclError:
             pass  # No selection
 
+    def show_photo(self, label, path, resize_label=False):
+        """Show a profile photo thumbnail in label, decoding it in the background on a cache miss"""
+        def apply(photo):
+            if not label.winfo_exists():
+                return
+            if resize_label:
+                label.configure(image=photo, width=photo.width(), height=photo.height())
+            else:
+                label.configure(image=photo)
+            label.image = photo  # Keep reference
+        
+        def loaded(image):
+            try:
+                apply(self.thumbnails.add(path, image))
+            except OSError:
+                failed(None)
+        
+        def failed(error):
+            if label.winfo_exists():
+                label.configure(text="Unable to load photo")
+        
+        try:
+            photo = self.thumbnails.cached(path)
+        except OSError:
+            failed(None)
+            return
+        if photo is not None:
+            apply(photo)
+            return
+        label.configure(text="Loading photo...")
+        self.executor.submit(lambda task: self.thumbnails.image(path), on_done=loaded, on_error=failed)
+
     def create_image_upload(self, container):
         """Create an image upload section for profile photo"""
         frame = tk.Frame(container, bg='#1A1A1A')
@@ -4961,67 +8459,68 @@ class VotingSystem:
         # Load existing profile photo if available
         user_data = self.voters[self.current_user]
         if 'profile_photo' in user_data:
-            try:
-                image = Image.open(user_data['profile_photo'])
-                # Calculate dimensions to maintain aspect ratio within 150x150
-                width, height = image.size
-                ratio = min(150/width, 150/height)
-                new_width = int(width * ratio)
-                new_height = int(height * ratio)
-                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                photo = ImageTk.PhotoImage(image)
-                self.preview_label.configure(image=photo, width=new_width, height=new_height)
-                self.preview_label.image = photo  # Keep reference
-                self.profile_image_path = user_data['profile_photo']
-            except Exception as e:
-                self.preview_label.configure(text="Unable to load photo")  # Changed from photo_display to self.preview_label
+            self.show_photo(self.preview_label, user_data['profile_photo'], resize_label=True)
+            self.profile_image_path = user_data['profile_photo']
+        
+        def process_upload(task, username, filename, new_filename):
+            # Runs on a worker thread: decode, resize and save without blocking the UI
+            image = self.thumbnails.decode(filename)
+            task.check()
+            
+            # Ensure directory exists
+            os.makedirs("profile_photos", exist_ok=True)
+            
+            # Save the image and its cached thumbnail
+            image.save(new_filename)
+            return username, new_filename, self.thumbnails.prime(new_filename, image)
+        
+        def upload_done(result):
+            username, new_filename, image = result
+            if upload_btn.winfo_exists():
+                upload_btn.configure(state=tk.NORMAL, text="Upload Photo")
+            
+            # Update preview, priming the thumbnail cache for the profile and popups
+            photo = self.thumbnails.add(new_filename, image)
+            if self.preview_label.winfo_exists():
+                self.preview_label.configure(image=photo, width=photo.width(), height=photo.height())
+                self.preview_label.image = photo
+            
+            # Save image path
+            self.profile_image_path = new_filename
+            
+            # Update voter data
+            self.voters[username]['profile_photo'] = new_filename
+            self.save_voters()
+            
+            messagebox.showinfo("Success", "Image uploaded successfully!")
+            
+            # Refresh the candidate interface to show the new photo
+            if self.current_user == username:
+                self.create_candidate_interface()
+        
+        def upload_failed(error):
+            if upload_btn.winfo_exists():
+                upload_btn.configure(state=tk.NORMAL, text="Upload Photo")
+            if isinstance(error, ImportError):
+                messagebox.showerror("Missing Library", "The Pillow library is required for profile photos.\nInstall it with: pip install Pillow")
+                return
+            messagebox.showerror("Error", f"Failed to load image: {str(error)}")
         
         def upload_image():
-            try:
-                file_types = [
-                    ('Image files', '*.png *.jpg *.jpeg *.gif *.bmp'),
-                    ('All files', '*.*')
-                ]
-                filename = filedialog.askopenfilename(filetypes=file_types)
-                
-                if filename:
-                    # Create a copy of the image in the application's directory
-                    image = Image.open(filename)
-                    # Calculate dimensions to maintain aspect ratio within 150x150
-                    width, height = image.size
-                    ratio = min(150/width, 150/height)
-                    new_width = int(width * ratio)
-                    new_height = int(height * ratio)
-                    image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    
-                    # Create unique filename using timestamp
-                    new_filename = f"profile_photos/{self.current_user}_{int(time.time())}.png"
-                    
-                    # Ensure directory exists
-                    os.makedirs("profile_photos", exist_ok=True)
-                    
-                    # Save the image
-                    image.save(new_filename)
-                    
-                    # Update preview
-                    photo = ImageTk.PhotoImage(image)
-                    self.preview_label.configure(image=photo, width=new_width, height=new_height)
-                    self.preview_label.image = photo
-                    
-                    # Save image path
-                    self.profile_image_path = new_filename
-                    
-                    # Update voter data
-                    self.voters[self.current_user]['profile_photo'] = new_filename
-                    self.save_voters()
-                    
-                    messagebox.showinfo("Success", "Image uploaded successfully!")
-                    
-                    # Refresh the candidate interface to show the new photo
-                    self.create_candidate_interface()
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load image: {str(e)}")
+            file_types = [
+                ('Image files', '*.png *.jpg *.jpeg *.gif *.bmp'),
+                ('All files', '*.*')
+            ]
+            filename = filedialog.askopenfilename(filetypes=file_types)
+            
+            if filename:
+                # Create unique filename using timestamp
+                new_filename = f"profile_photos/{self.current_user}_{int(time.time())}.png"
+                upload_btn.configure(state=tk.DISABLED, text="Uploading...")
+                self.executor.submit(
+                    process_upload, self.current_user, filename, new_filename,
+                    on_done=upload_done, on_error=upload_failed
+                )
         
         # Upload button
         upload_btn = tk.Button(
@@ -5041,6 +8540,7 @@ class VotingSystem:
             self.preview_label.image = None
             if hasattr(self, 'profile_image_path'):
                 # Remove the file if it exists
+                self.thumbnails.discard(self.profile_image_path)
                 if os.path.exists(self.profile_image_path):
                     try:
                         os.remove(self.profile_image_path)
@@ -5103,20 +8603,7 @@ class VotingSystem:
         
         # Load and display profile photo if it exists
         if 'profile_photo' in candidate_data:
-            try:
-                image = Image.open(candidate_data['profile_photo'])
-                # Calculate dimensions to maintain aspect ratio within 150x150
-                width, height = image.size
-                ratio = min(150/width, 150/height)
-                new_width = int(width * ratio)
-                new_height = int(height * ratio)
-                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                photo = ImageTk.PhotoImage(image)
-                photo_display.configure(image=photo)
-                photo_display.image = photo  # Keep reference
-            except Exception as e:
-                photo_display.configure(text="Unable to load photo")
+            self.show_photo(photo_display, candidate_data['profile_photo'])
         
         # Name and role on the right
         text_container = tk.Frame(info_container, bg='#1A1A1A')
@@ -5280,11 +8767,6 @@ class VotingSystem:
         
         current_admin = next(iter(self.admin_data.keys()))
         
-        # Verify current password
-        if hashlib.sha256(current_password.encode()).hexdigest() != self.admin_data[current_admin]:  # Fixed variable name
-            messagebox.showerror("Error", "Current password is incorrect!")
-            return
-        
         if new_password != confirm_password:
             messagebox.showerror("Error", "New passwords do not match!")
             return
@@ -5293,13 +8775,17 @@ class VotingSystem:
             messagebox.showerror("Error", "Password must be at least 8 characters!")
             return
         
-        # Update password
-        self.admin_data[current_admin] = hashlib.sha256(new_password.encode()).hexdigest()
-        self.save_admin()
+        def store(new_hash):
+            # Update password
+            self.engine.set_password(current_admin, new_hash, 'admin')
+            
+            messagebox.showinfo("Success", "Admin password updated successfully!")
+            if settings_window.winfo_exists():
+                settings_window.destroy()
+            self.show_admin_settings()
         
-        messagebox.showinfo("Success", "Admin password updated successfully!")
-        settings_window.destroy()
-        self.show_admin_settings()
+        # Verify current password, then hash the new one, both on a worker
+        self.confirm_password(current_admin, 'admin', current_password, store, new_password=new_password)
 
     # Add this method to the VotingSystem class
     def show_terms_and_conditions(self):
@@ -5419,298 +8905,293 @@ class VotingSystem:
             lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
         )
 
-# Try to import PIL, install if not available
-try:
-    from PIL import Image, ImageTk
-except ImportError:
-    def install_pillow():
-        try:
-            subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'Pillow'])
-            return True
-        except subprocess.CalledProcessError:
-            return False
-    
-    if install_pillow():
-        from PIL import Image, ImageTk
-    else:
-        messagebox.showerror("Error", "Failed to install Pillow library. Image upload feature will not work.")
 
-if __name__ == "__main__":
-    root = tk.Tk()
-    app = VotingSystem(root)
-    
-    # Add pre-registered candidates
-    candidates_data = {
-        'candidate1': {
-            'username': 'candidate1',
-            'password': '1234',
-            'full_name': 'Maria Santos',
-            'date_of_birth': '1975-06-15',
-            'gender': 'Female',
-            'national_id': 'PH123456789',
-            'phone': '+63 912 345 6789',
-            'email': 'maria.santos@email.com',
-            'address': {
-                'street': '123 Makati Avenue',
-                'city': 'Manila',
-                'state': 'Metro Manila',
-                'postal_code': '1200',
-                'country': 'Philippines'
-            },
-            'party': 'PDP-Laban',
-            'current_position': 'Senator',
-            'desired_position': 'President',
-            'term_length': '6 Years',
-            'education': 'PhD in Public Administration, University of the Philippines',
-            'experience': '15 years in public service, Former Secretary of Education',
-            'platform': 'Focus on education reform, economic development, and poverty alleviation',
-            'promises': 'Universal education access, job creation, and infrastructure development',
-            'vision': 'A prosperous and educated Philippines with opportunities for all',
-            'is_candidate': True,
-            'registration_date': '2024-01-15 08:00:00'
+# Demo candidates registered on first launch, passwords are hashed when seeded
+DEMO_CANDIDATES = {
+    'candidate1': {
+        'username': 'candidate1',
+        'password': '1234',
+        'full_name': 'Maria Santos',
+        'date_of_birth': '1975-06-15',
+        'gender': 'Female',
+        'national_id': 'PH123456789',
+        'phone': '+63 912 345 6789',
+        'email': 'maria.santos@email.com',
+        'address': {
+            'street': '123 Makati Avenue',
+            'city': 'Manila',
+            'state': 'Metro Manila',
+            'postal_code': '1200',
+            'country': 'Philippines'
         },
-        'candidate2': {
-            'username': 'candidate2',
-            'password': '1234',
-            'full_name': 'Ahmad Rahman',
-            'date_of_birth': '1980-03-20',
-            'gender': 'Male',
-            'national_id': 'ID987654321',
-            'phone': '+62 811 234 5678',
-            'email': 'ahmad.rahman@email.com',
-            'address': {
-                'street': '45 Sudirman Street',
-                'city': 'Jakarta',
-                'state': 'Jakarta',
-                'postal_code': '10210',
-                'country': 'Indonesia'
-            },
-            'party': 'PDI-P',
-            'current_position': 'Governor',
-            'desired_position': 'President',
-            'term_length': '5 Years',
-            'education': 'Masters in Economics, University of Indonesia',
-            'experience': '12 years as Regional Governor',
-            'platform': 'Economic reform, environmental protection, and social welfare',
-            'promises': 'Green energy transition, social security enhancement',
-            'vision': 'Sustainable and inclusive development for Indonesia',
-            'is_candidate': True,
-            'registration_date': '2024-01-16 09:30:00'
+        'party': 'PDP-Laban',
+        'current_position': 'Senator',
+        'desired_position': 'President',
+        'term_length': '6 Years',
+        'education': 'PhD in Public Administration, University of the Philippines',
+        'experience': '15 years in public service, Former Secretary of Education',
+        'platform': 'Focus on education reform, economic development, and poverty alleviation',
+        'promises': 'Universal education access, job creation, and infrastructure development',
+        'vision': 'A prosperous and educated Philippines with opportunities for all',
+        'is_candidate': True,
+        'registration_date': '2024-01-15 08:00:00'
+    },
+    'candidate2': {
+        'username': 'candidate2',
+        'password': '1234',
+        'full_name': 'Ahmad Rahman',
+        'date_of_birth': '1980-03-20',
+        'gender': 'Male',
+        'national_id': 'ID987654321',
+        'phone': '+62 811 234 5678',
+        'email': 'ahmad.rahman@email.com',
+        'address': {
+            'street': '45 Sudirman Street',
+            'city': 'Jakarta',
+            'state': 'Jakarta',
+            'postal_code': '10210',
+            'country': 'Indonesia'
         },
-        'candidate3': {
-            'username': 'candidate3',
-            'password': '1234',
-            'full_name': 'Somchai Thaksin',
-            'date_of_birth': '1978-09-10',
-            'gender': 'Male',
-            'national_id': 'TH456789012',
-            'phone': '+66 89 123 4567',
-            'email': 'somchai.thaksin@email.com',
-            'address': {
-                'street': '78 Sukhumvit Road',
-                'city': 'Bangkok',
-                'state': 'Bangkok',
-                'postal_code': '10110',
-                'country': 'Thailand'
-            },
-            'party': 'Pheu Thai',
-            'current_position': 'Member of Parliament',
-            'desired_position': 'Prime Minister',
-            'term_length': '4 Years',
-            'education': 'MBA, Chulalongkorn University',
-            'experience': '10 years in Parliament',
-            'platform': 'Digital economy transformation and agricultural modernization',
-            'promises': 'Rural development, technology investment',
-            'vision': 'Thailand 4.0 - A modern, innovative nation',
-            'is_candidate': True,
-            'registration_date': '2024-01-17 10:15:00'
+        'party': 'PDI-P',
+        'current_position': 'Governor',
+        'desired_position': 'President',
+        'term_length': '5 Years',
+        'education': 'Masters in Economics, University of Indonesia',
+        'experience': '12 years as Regional Governor',
+        'platform': 'Economic reform, environmental protection, and social welfare',
+        'promises': 'Green energy transition, social security enhancement',
+        'vision': 'Sustainable and inclusive development for Indonesia',
+        'is_candidate': True,
+        'registration_date': '2024-01-16 09:30:00'
+    },
+    'candidate3': {
+        'username': 'candidate3',
+        'password': '1234',
+        'full_name': 'Somchai Thaksin',
+        'date_of_birth': '1978-09-10',
+        'gender': 'Male',
+        'national_id': 'TH456789012',
+        'phone': '+66 89 123 4567',
+        'email': 'somchai.thaksin@email.com',
+        'address': {
+            'street': '78 Sukhumvit Road',
+            'city': 'Bangkok',
+            'state': 'Bangkok',
+            'postal_code': '10110',
+            'country': 'Thailand'
         },
-        'candidate4': {
-            'username': 'candidate4',
-            'password': '1234',
-            'full_name': 'Tan Wei Ming',
-            'date_of_birth': '1982-12-05',
-            'gender': 'Male',
-            'national_id': 'SG789012345',
-            'phone': '+65 9123 4567',
-            'email': 'tan.weiming@email.com',
-            'address': {
-                'street': '90 Orchard Road',
-                'city': 'Singapore',
-                'state': 'Singapore',
-                'postal_code': '238875',
-                'country': 'Singapore'
-            },
-            'party': 'PAP',
-            'current_position': 'Minister of Trade',
-            'desired_position': 'Prime Minister',
-            'term_length': '5 Years',
-            'education': 'PhD in International Relations, NUS',
-            'experience': '8 years in Cabinet',
-            'platform': 'Smart nation initiatives and international trade expansion',
-            'promises': 'Technology innovation, economic growth',
-            'vision': 'Singapore as a global hub for innovation',
-            'is_candidate': True,
-            'registration_date': '2024-01-18 11:45:00'
+        'party': 'Pheu Thai',
+        'current_position': 'Member of Parliament',
+        'desired_position': 'Prime Minister',
+        'term_length': '4 Years',
+        'education': 'MBA, Chulalongkorn University',
+        'experience': '10 years in Parliament',
+        'platform': 'Digital economy transformation and agricultural modernization',
+        'promises': 'Rural development, technology investment',
+        'vision': 'Thailand 4.0 - A modern, innovative nation',
+        'is_candidate': True,
+        'registration_date': '2024-01-17 10:15:00'
+    },
+    'candidate4': {
+        'username': 'candidate4',
+        'password': '1234',
+        'full_name': 'Tan Wei Ming',
+        'date_of_birth': '1982-12-05',
+        'gender': 'Male',
+        'national_id': 'SG789012345',
+        'phone': '+65 9123 4567',
+        'email': 'tan.weiming@email.com',
+        'address': {
+            'street': '90 Orchard Road',
+            'city': 'Singapore',
+            'state': 'Singapore',
+            'postal_code': '238875',
+            'country': 'Singapore'
         },
-        'candidate5': {
-            'username': 'candidate5',
-            'password': '1234',
-            'full_name': 'Nurul Izzah',
-            'date_of_birth': '1985-08-25',
-            'gender': 'Female',
-            'national_id': 'MY234567890',
-            'phone': '+60 12 345 6789',
-            'email': 'nurul.izzah@email.com',
-            'address': {
-                'street': '123 Jalan Sultan',
-                'city': 'Kuala Lumpur',
-                'state': 'Selangor',
-                'postal_code': '50000',
-                'country': 'Malaysia'
-            },
-            'party': 'PKR',
-            'current_position': 'State Assembly Member',
-            'desired_position': 'Prime Minister',
-            'term_length': '5 Years',
-            'education': 'Masters in Political Science, University of Malaya',
-            'experience': '10 years in politics',
-            'platform': 'Racial harmony and economic equality',
-            'promises': 'Unity government, corruption elimination',
-            'vision': 'A united and progressive Malaysia',
-            'is_candidate': True,
-            'registration_date': '2024-01-19 13:20:00'
+        'party': 'PAP',
+        'current_position': 'Minister of Trade',
+        'desired_position': 'Prime Minister',
+        'term_length': '5 Years',
+        'education': 'PhD in International Relations, NUS',
+        'experience': '8 years in Cabinet',
+        'platform': 'Smart nation initiatives and international trade expansion',
+        'promises': 'Technology innovation, economic growth',
+        'vision': 'Singapore as a global hub for innovation',
+        'is_candidate': True,
+        'registration_date': '2024-01-18 11:45:00'
+    },
+    'candidate5': {
+        'username': 'candidate5',
+        'password': '1234',
+        'full_name': 'Nurul Izzah',
+        'date_of_birth': '1985-08-25',
+        'gender': 'Female',
+        'national_id': 'MY234567890',
+        'phone': '+60 12 345 6789',
+        'email': 'nurul.izzah@email.com',
+        'address': {
+            'street': '123 Jalan Sultan',
+            'city': 'Kuala Lumpur',
+            'state': 'Selangor',
+            'postal_code': '50000',
+            'country': 'Malaysia'
         },
-        'candidate6': {
-            'username': 'candidate6',
-            'password': '1234',
-            'full_name': 'Nguyen Van Minh',
-            'date_of_birth': '1977-04-30',
-            'gender': 'Male',
-            'national_id': 'VN345678901',
-            'phone': '+84 90 123 4567',
-            'email': 'nguyen.vanminh@email.com',
-            'address': {
-                'street': '56 Le Loi Street',
-                'city': 'Ho Chi Minh City',
-                'state': 'Ho Chi Minh',
-                'postal_code': '700000',
-                'country': 'Vietnam'
-            },
-            'party': 'Independent',
-            'current_position': 'City Council Member',
-            'desired_position': 'Governor',
-            'term_length': '5 Years',
-            'education': 'Masters in Urban Planning, Vietnam National University',
-            'experience': '15 years in local government',
-            'platform': 'Urban development and environmental protection',
-            'promises': 'Smart city development, pollution reduction',
-            'vision': 'Sustainable urban development for Vietnam',
-            'is_candidate': True,
-            'registration_date': '2024-01-20 14:10:00'
+        'party': 'PKR',
+        'current_position': 'State Assembly Member',
+        'desired_position': 'Prime Minister',
+        'term_length': '5 Years',
+        'education': 'Masters in Political Science, University of Malaya',
+        'experience': '10 years in politics',
+        'platform': 'Racial harmony and economic equality',
+        'promises': 'Unity government, corruption elimination',
+        'vision': 'A united and progressive Malaysia',
+        'is_candidate': True,
+        'registration_date': '2024-01-19 13:20:00'
+    },
+    'candidate6': {
+        'username': 'candidate6',
+        'password': '1234',
+        'full_name': 'Nguyen Van Minh',
+        'date_of_birth': '1977-04-30',
+        'gender': 'Male',
+        'national_id': 'VN345678901',
+        'phone': '+84 90 123 4567',
+        'email': 'nguyen.vanminh@email.com',
+        'address': {
+            'street': '56 Le Loi Street',
+            'city': 'Ho Chi Minh City',
+            'state': 'Ho Chi Minh',
+            'postal_code': '700000',
+            'country': 'Vietnam'
         },
-        'candidate7': {
-            'username': 'candidate7',
-            'password': '1234',
-            'full_name': 'Sok Channary',
-            'date_of_birth': '1983-11-15',
-            'gender': 'Female',
-            'national_id': 'KH456789012',
-            'phone': '+855 12 345 678',
-            'email': 'sok.channary@email.com',
-            'address': {
-                'street': '34 Norodom Blvd',
-                'city': 'Phnom Penh',
-                'state': 'Phnom Penh',
-                'postal_code': '12000',
-                'country': 'Cambodia'
-            },
-            'party': 'Independent',
-            'current_position': 'Provincial Council Member',
-            'desired_position': 'Senator',
-            'term_length': '6 Years',
-            'education': 'BA in Political Science, Royal University of Phnom Penh',
-            'experience': '8 years in local politics',
-            'platform': 'Rural development and education access',
-            'promises': 'School construction, agricultural support',
-            'vision': 'Educational and economic opportunities for rural Cambodia',
-            'is_candidate': True,
-            'registration_date': '2024-01-21 15:30:00'
+        'party': 'Independent',
+        'current_position': 'City Council Member',
+        'desired_position': 'Governor',
+        'term_length': '5 Years',
+        'education': 'Masters in Urban Planning, Vietnam National University',
+        'experience': '15 years in local government',
+        'platform': 'Urban development and environmental protection',
+        'promises': 'Smart city development, pollution reduction',
+        'vision': 'Sustainable urban development for Vietnam',
+        'is_candidate': True,
+        'registration_date': '2024-01-20 14:10:00'
+    },
+    'candidate7': {
+        'username': 'candidate7',
+        'password': '1234',
+        'full_name': 'Sok Channary',
+        'date_of_birth': '1983-11-15',
+        'gender': 'Female',
+        'national_id': 'KH456789012',
+        'phone': '+855 12 345 678',
+        'email': 'sok.channary@email.com',
+        'address': {
+            'street': '34 Norodom Blvd',
+            'city': 'Phnom Penh',
+            'state': 'Phnom Penh',
+            'postal_code': '12000',
+            'country': 'Cambodia'
         },
-        'candidate8': {
-            'username': 'candidate8',
-            'password': '1234',
-            'full_name': 'Aung Min Thant',
-            'date_of_birth': '1979-07-20',
-            'gender': 'Male',
-            'national_id': 'MM567890123',
-            'phone': '+95 9 876 5432',
-            'email': 'aung.minthant@email.com',
-            'address': {
-                'street': '78 Anawrahta Road',
-                'city': 'Yangon',
-                'state': 'Yangon',
-                'postal_code': '11181',
-                'country': 'Myanmar'
-            },
-            'party': 'Independent',
-            'current_position': 'Township Administrator',
-            'desired_position': 'Member of Parliament',
-            'term_length': '5 Years',
-            'education': 'Masters in Public Administration, Yangon University',
-            'experience': '12 years in public service',
-            'platform': 'Democratic reforms and economic development',
-            'promises': 'Transparency in governance, foreign investment',
-            'vision': 'A democratic and prosperous Myanmar',
-            'is_candidate': True,
-            'registration_date': '2024-01-22 16:45:00'
+        'party': 'Independent',
+        'current_position': 'Provincial Council Member',
+        'desired_position': 'Senator',
+        'term_length': '6 Years',
+        'education': 'BA in Political Science, Royal University of Phnom Penh',
+        'experience': '8 years in local politics',
+        'platform': 'Rural development and education access',
+        'promises': 'School construction, agricultural support',
+        'vision': 'Educational and economic opportunities for rural Cambodia',
+        'is_candidate': True,
+        'registration_date': '2024-01-21 15:30:00'
+    },
+    'candidate8': {
+        'username': 'candidate8',
+        'password': '1234',
+        'full_name': 'Aung Min Thant',
+        'date_of_birth': '1979-07-20',
+        'gender': 'Male',
+        'national_id': 'MM567890123',
+        'phone': '+95 9 876 5432',
+        'email': 'aung.minthant@email.com',
+        'address': {
+            'street': '78 Anawrahta Road',
+            'city': 'Yangon',
+            'state': 'Yangon',
+            'postal_code': '11181',
+            'country': 'Myanmar'
         },
-        'candidate9': {
-            'username': 'candidate9',
-            'password': '1234',
-            'full_name': 'Bounmy Thammavong',
-            'date_of_birth': '1981-02-28',
-            'gender': 'Male',
-            'national_id': 'LA678901234',
-            'phone': '+856 20 123 4567',
-            'email': 'bounmy.thammavong@email.com',
-            'address': {
-                'street': '45 Setthathirath Road',
-                'city': 'Vientiane',
-                'state': 'Vientiane',
-                'postal_code': '01000',
-                'country': 'Laos'
-            },
-            'party': 'Independent',
-            'current_position': 'District Chief',
-            'desired_position': 'Governor',
-            'term_length': '5 Years',
-            'education': 'BA in Economics, National University of Laos',
-            'experience': '10 years in district administration',
-            'platform': 'Rural modernization and poverty reduction',
-            'promises': 'Infrastructure development, tourism promotion',
-            'vision': 'Balanced development between urban and rural Laos',
-            'is_candidate': True,
-            'registration_date': '2024-01-23 17:15:00'
-        }
+        'party': 'Independent',
+        'current_position': 'Township Administrator',
+        'desired_position': 'Member of Parliament',
+        'term_length': '5 Years',
+        'education': 'Masters in Public Administration, Yangon University',
+        'experience': '12 years in public service',
+        'platform': 'Democratic reforms and economic development',
+        'promises': 'Transparency in governance, foreign investment',
+        'vision': 'A democratic and prosperous Myanmar',
+        'is_candidate': True,
+        'registration_date': '2024-01-22 16:45:00'
+    },
+    'candidate9': {
+        'username': 'candidate9',
+        'password': '1234',
+        'full_name': 'Bounmy Thammavong',
+        'date_of_birth': '1981-02-28',
+        'gender': 'Male',
+        'national_id': 'LA678901234',
+        'phone': '+856 20 123 4567',
+        'email': 'bounmy.thammavong@email.com',
+        'address': {
+            'street': '45 Setthathirath Road',
+            'city': 'Vientiane',
+            'state': 'Vientiane',
+            'postal_code': '01000',
+            'country': 'Laos'
+        },
+        'party': 'Independent',
+        'current_position': 'District Chief',
+        'desired_position': 'Governor',
+        'term_length': '5 Years',
+        'education': 'BA in Economics, National University of Laos',
+        'experience': '10 years in district administration',
+        'platform': 'Rural modernization and poverty reduction',
+        'promises': 'Infrastructure development, tourism promotion',
+        'vision': 'Balanced development between urban and rural Laos',
+        'is_candidate': True,
+        'registration_date': '2024-01-23 17:15:00'
     }
+}
+
+
+if __name__ == "__main__":
+    # Storage backend: --storage sqlite, or the VOTING_STORAGE environment variable
+    storage_kind = None
+    if '--storage' in sys.argv[1:-1]:
+        storage_kind = sys.argv[sys.argv.index('--storage') + 1]
+    # Write delay in seconds: --flush-interval 2, or the VOTING_FLUSH_INTERVAL environment variable
+    flush_interval = None
+    if '--flush-interval' in sys.argv[1:-1]:
+        flush_interval = float(sys.argv[sys.argv.index('--flush-interval') + 1])
     
-    # Add candidates to the system
-    for username, data in candidates_data.items():
-        # Add to voters database
-        app.voters[username] = data
-        # Add to candidates list with 0 votes
-        app.candidates[data['full_name']] = 0
+    root = tk.Tk()
+    app = VotingSystem(root, storage=create_storage(storage_kind), flush_interval=flush_interval)
     
-    # Save the updated data
-    app.save_voters()
-    app.save_votes()
+    # Add pre-registered candidates, only the ones that are missing
+    app.seed('demo-candidates', DEMO_CANDIDATES.values())
+    # Extra voter/candidate fixtures: --seed voters.csv (may be repeated)
+    for i, arg in enumerate(sys.argv[1:-1], 1):
+        if arg == '--seed':
+            added = app.seed_file(sys.argv[i + 1])
+            print(f"Seeded {added} records from {sys.argv[i + 1]}")
     
     root.mainloop()
-
-# Delete admin.json if it exists
-if os.path.exists("admin.json"):
-    os.remove("admin.json")
-    print("admin.json deleted successfully")
-else:
-    print("admin.json does not exist") 
\ No newline at end of file
+    app.executor.shutdown()
+    app.flush_storage()
+    app.storage.close()
+    
+    # Delete admin.json if it exists
+    if os.path.exists("admin.json"):
+        os.remove("admin.json")
+        print("admin.json deleted successfully")
+    else:
+        print("admin.json does not exist") 
\ No newline at end of file